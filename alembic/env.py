@@ -14,6 +14,8 @@ from app.db.database import Base
 
 # Import all models here so Alembic can detect them
 from app.models.user import User  # noqa
+from app.models.conversation import Conversation, ConversationMember  # noqa
+from app.models.message import Message  # noqa
 
 # Alembic Config Object
 config = context.config
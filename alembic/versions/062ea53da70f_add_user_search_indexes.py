@@ -0,0 +1,50 @@
+"""add user search indexes
+
+Revision ID: 062ea53da70f
+Revises: ae9d18aeffde
+Create Date: 2026-10-17 09:12:44.301552
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '062ea53da70f'
+down_revision: Union[str, None] = 'ae9d18aeffde'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Trigram operator classes for substring and similarity search
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Prefix search: lower(username) LIKE 'abc%' in any collation
+    op.create_index(
+        'ix_users_username_lower_pattern',
+        'users',
+        [sa.text('lower(username) text_pattern_ops')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_users_username_trgm',
+        'users',
+        [sa.text('lower(username) gin_trgm_ops')],
+        unique=False,
+        postgresql_using='gin',
+    )
+    op.create_index(
+        'ix_users_display_name_trgm',
+        'users',
+        [sa.text('lower(display_name) gin_trgm_ops')],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_display_name_trgm', table_name='users')
+    op.drop_index('ix_users_username_trgm', table_name='users')
+    op.drop_index('ix_users_username_lower_pattern', table_name='users')
@@ -3,8 +3,9 @@ API depenedencies for authentication and database sessions.
 
 """
 
-from typing import Annotated
-from fastapi import Depends, HTTPException, status
+import logging
+from typing import Annotated, Optional
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -12,10 +13,44 @@ from sqlalchemy import select
 
 from app.models.user import User
 from app.db.database import get_db
+from app.core.config import settings
+from app.core.logger import RateLimitedLogger
 from app.core.security import decode_token
+from app.core.token_cache import token_cache
+from app.services.token_service import TokenService
+from app.services.user_loader import UserLoader
+
+# Failed auth can arrive at attacker-controlled rates; keep it off the hot path
+auth_failures = RateLimitedLogger(logging.getLogger("app.auth"), per_second=1, burst=20)
 
 # OAuth2 schema for JWT token
 oauth2_schema = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+# Same, for endpoints where only some requests need a token
+optional_oauth2_schema = OAuth2PasswordBearer(
+    tokenUrl="/api/v1/auth/login", auto_error=False
+)
+
+
+def get_client_ip(request: Request) -> Optional[str]:
+    """
+    IP of the client behind the request. When the peer is one of
+    trusted_proxies, the nearest untrusted address in X-Forwarded-For
+    (entries further left were written by the client and can be forged).
+    """
+    if request.client is None:
+        return None
+    host = request.client.host
+    trusted = settings.trusted_proxies_list
+    if host not in trusted:
+        return host
+    forwarded = ",".join(request.headers.getlist("x-forwarded-for")).split(",")
+    for address in reversed([address.strip() for address in forwarded]):
+        if not address:
+            continue
+        if address not in trusted:
+            return address
+        host = address
+    return host
 
 
 async def get_current_user(
@@ -33,31 +68,53 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    # Fast path: token already verified and user snapshot still fresh
+    payload, snapshot = token_cache.get(token)
+    if snapshot is not None:
+        if await TokenService.is_revoked(payload):
+            auth_failures.warning("rejected revoked token", key="revoked")
+            raise credentials_exception
+        return await db.merge(User.from_snapshot(snapshot), load=False)
+
     # Decode token
-    payload = decode_token(token)
     if payload is None:
-        raise credentials_exception
+        payload = decode_token(token)
+        if payload is None:
+            auth_failures.warning("rejected invalid token", key="invalid_token")
+            raise credentials_exception
 
     user_id: str = payload.get("sub")
     if user_id is None:
+        auth_failures.warning("rejected token without subject", key="no_subject")
         raise credentials_exception
 
     # verify token type
     token_type: str = payload.get("type")
     if token_type != "access":
+        auth_failures.warning("rejected %s token", token_type, key="token_type")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token type",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    result = db.execute(select(User).where(User.id == user_id))
+    if await TokenService.is_revoked(payload):
+        auth_failures.warning("rejected revoked token", key="revoked")
+        raise credentials_exception
+
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
+    if user is None:
+        auth_failures.warning("rejected token for unknown user", key="unknown_user")
+        raise credentials_exception
+
+    token_cache.set_claims(token, payload)
+    token_cache.set_user(user.to_snapshot())
     return user
 
 
 async def get_current_active_user(
-    current_user: Annotated[User, get_current_user],
+    current_user: Annotated[User, Depends(get_current_user)],
 ) -> User:
     """
     Get current active user (can add additional checks here).
@@ -67,3 +124,27 @@ async def get_current_active_user(
     # if current_user is banned:
     #   raise HTTPException(status_Code=400, detail= "User is banned.")
     return current_user
+
+
+async def get_directory_admin(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+) -> User:
+    """
+    Current user, if allowed to read the whole user directory
+    Raises:
+        HTTPException: If they are not in user_directory_admins
+    """
+    if current_user.username not in settings.user_directory_admins_list:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+    return current_user
+
+
+async def get_user_loader(db: AsyncSession = Depends(get_db)) -> UserLoader:
+    """
+    Request-scoped UserLoader, stored on the request's session so every
+    dependency and handler in the request shares one batch and cache.
+    """
+    loader = db.info.get("user_loader")
+    if loader is None:
+        loader = db.info["user_loader"] = UserLoader(db)
+    return loader
@@ -0,0 +1,80 @@
+"""
+Registration, login, token refresh and logout endpoints
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_client_ip
+from app.db.database import get_db
+from app.schemas.serialization import RawJSONResponse, user_serializer
+from app.schemas.user import (
+    RefreshTokenRequest,
+    Token,
+    UserCreate,
+    UserLogin,
+    UserResponse,
+)
+from app.services.token_service import InvalidRefreshToken, TokenService
+from app.services.user_service import UserService
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+
+def invalid_refresh_token(exc: InvalidRefreshToken) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=str(exc),
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+@router.post(
+    "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
+)
+async def register(data: UserCreate, db: AsyncSession = Depends(get_db)):
+    try:
+        user = await UserService.create_user(db, data)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return RawJSONResponse(
+        user_serializer.dump(user), status_code=status.HTTP_201_CREATED
+    )
+
+
+@router.post("/login", response_model=Token)
+async def login(
+    data: UserLogin, request: Request, db: AsyncSession = Depends(get_db)
+):
+    user = await UserService.authenticate_user(
+        db, data.username, data.password, get_client_ip(request)
+    )
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return await TokenService.issue(user.id)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(data: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    """Rotate a refresh token; reusing an old one revokes its whole family."""
+    try:
+        user_id, tokens = await TokenService.rotate(data.refresh_token)
+    except InvalidRefreshToken as exc:
+        raise invalid_refresh_token(exc)
+    if await UserService.get_by_id(db, user_id) is None:
+        raise invalid_refresh_token(InvalidRefreshToken("Invalid refresh token"))
+    return tokens
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(data: RefreshTokenRequest):
+    """Revoke the refresh token's family and every access token issued from it."""
+    try:
+        await TokenService.revoke(data.refresh_token)
+    except InvalidRefreshToken as exc:
+        raise invalid_refresh_token(exc)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,112 @@
+"""
+Conversation and message history endpoints
+"""
+
+import uuid
+from typing import Annotated, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_active_user, get_user_loader
+from app.db.database import get_db
+from app.models.user import User
+from app.schemas.user import UserPublicResponse
+from app.schemas.message import (
+    ConversationCreate,
+    ConversationResponse,
+    MessageCreate,
+    MessageHistoryResponse,
+    MessageResponse,
+)
+from app.services.connection_manager import manager
+from app.services.message_service import MessageService, conversation_room
+from app.services.message_writer import message_writer
+from app.services.user_loader import UserLoader
+
+router = APIRouter(prefix="/conversations", tags=["conversations"])
+
+
+async def require_member(
+    conversation_id: uuid.UUID,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    if not await MessageService.is_member(db, conversation_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this conversation",
+        )
+    return current_user
+
+
+@router.post(
+    "", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED
+)
+async def create_conversation(
+    data: ConversationCreate,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    try:
+        return await MessageService.create_conversation(db, current_user.id, data)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.post(
+    "/{conversation_id}/messages",
+    response_model=MessageResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def send_message(
+    conversation_id: uuid.UUID,
+    data: MessageCreate,
+    current_user: Annotated[User, Depends(require_member)],
+    db: AsyncSession = Depends(get_db),
+):
+    message = await message_writer.submit(
+        conversation_id, current_user.id, data.content
+    )
+    response = MessageResponse.model_validate(message)
+    await manager.publish(
+        conversation_room(conversation_id),
+        {"type": "message", "message": response.model_dump(mode="json")},
+    )
+    return response
+
+
+@router.get("/{conversation_id}/members", response_model=List[UserPublicResponse])
+async def get_members(
+    conversation_id: uuid.UUID,
+    current_user: Annotated[User, Depends(require_member)],
+    loader: Annotated[UserLoader, Depends(get_user_loader)],
+    db: AsyncSession = Depends(get_db),
+):
+    member_ids = await MessageService.get_member_ids(db, conversation_id)
+    members = await loader.load_many(member_ids)
+    return [member for member in members if member is not None]
+
+
+@router.get("/{conversation_id}/messages", response_model=MessageHistoryResponse)
+async def get_history(
+    conversation_id: uuid.UUID,
+    current_user: Annotated[User, Depends(require_member)],
+    loader: Annotated[UserLoader, Depends(get_user_loader)],
+    db: AsyncSession = Depends(get_db),
+    before_seq: Optional[int] = Query(None, ge=1),
+    after_seq: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+):
+    messages, has_more = await MessageService.get_history(
+        db, conversation_id, before_seq=before_seq, after_seq=after_seq, limit=limit
+    )
+    # One query for all authors on the page, however many messages it has
+    authors = await loader.load_many(
+        {m.sender_id for m in messages if m.sender_id is not None}
+    )
+    return MessageHistoryResponse(
+        messages=[MessageResponse.model_validate(m) for m in messages],
+        has_more=has_more,
+        authors=[author for author in authors if author is not None],
+    )
@@ -0,0 +1,111 @@
+"""
+File upload and download endpoints
+"""
+
+from typing import Annotated, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import (
+    get_current_active_user,
+    get_current_user,
+    optional_oauth2_schema,
+)
+from app.core.config import settings
+from app.db.database import get_db
+from app.models.user import User
+from app.schemas.file import FileUploadResponse
+from app.services.file_serving import file_server
+from app.services.file_storage import StoredFile, file_store
+from app.services.thumbnails import thumbnailer
+
+router = APIRouter(prefix="/files", tags=["files"])
+
+
+def declared_size(request: Request) -> Optional[int]:
+    """The request's Content-Length, if it sent a valid one."""
+    try:
+        return int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+def upload_response(stored: StoredFile) -> FileUploadResponse:
+    return FileUploadResponse(
+        key=stored.key,
+        url=f"{settings.api_v1_prefix}/files/{stored.key}",
+        size=stored.size,
+        content_type=stored.content_type,
+        deduplicated=stored.deduplicated,
+    )
+
+
+@router.post(
+    "", response_model=FileUploadResponse, status_code=status.HTTP_201_CREATED
+)
+async def upload_file(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    filename: str = Query(..., min_length=1, max_length=255),
+):
+    """
+    Store the raw request body (not multipart) under its content hash.
+
+    The body is streamed to disk as it arrives; filename only supplies the
+    extension, which must match the content.
+    """
+    stored = await file_store.save(
+        request.stream(), filename, declared_size=declared_size(request)
+    )
+    if not stored.deduplicated:
+        thumbnailer.submit(stored.key)
+    return upload_response(stored)
+
+
+@router.api_route("/{key}", methods=["GET", "HEAD"])
+async def download_file(
+    key: str,
+    request: Request,
+    token: Annotated[Optional[str], Depends(optional_oauth2_schema)],
+    db: AsyncSession = Depends(get_db),
+    size: Optional[int] = Query(None, ge=1, le=4096),
+):
+    """
+    Serve a stored file, with Range and If-None-Match support.
+
+    For images, size selects a WebP thumbnail (the smallest at least that
+    many pixels across). Until it has been rendered the original is sent,
+    marked for revalidation so the thumbnail replaces it once ready.
+
+    Images need no authentication, since avatars must load in plain <img>
+    tags. Anything else needs a bearer token: the key is just the SHA-256
+    of the content, so anyone holding a copy of a file (or guessing a
+    small one) can compute its URL.
+    """
+    cache_control = None
+    if not file_store.is_image(key):
+        if token is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        await get_current_user(token, db)
+        cache_control = file_server.private_cache_control
+
+    variant = thumbnailer.variant_for(key, size) if size is not None else None
+    if variant is None:
+        response = await file_server.response(request, key, cache_control)
+    else:
+        response = await file_server.response(request, variant)
+        if response is None:
+            response = await file_server.response(request, key, "no-cache")
+            if response is not None:
+                # In case it was dropped (a no-op while queued or after failing)
+                thumbnailer.submit(key)
+    if response is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+        )
+    return response
@@ -0,0 +1,139 @@
+"""
+User profile endpoints
+"""
+
+import uuid
+from typing import Annotated, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_active_user, get_directory_admin
+from app.api.routes.files import declared_size, upload_response
+from app.core.config import settings
+from app.db.database import get_db
+from app.models.user import User, UserStatus
+from app.schemas.serialization import (
+    RawJSONResponse,
+    dump_user_page,
+    mention_serializer,
+    public_user_serializer,
+    user_serializer,
+)
+from app.schemas.user import (
+    UserListResponse,
+    UserMention,
+    UserPublicResponse,
+    UserResponse,
+    UserUpdate,
+)
+from app.services.file_storage import file_store
+from app.services.thumbnails import thumbnailer
+from app.services.user_export import MEDIA_TYPES, encode_users, stream_users
+from app.services.user_service import UserService
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.get("", response_model=UserListResponse)
+async def list_users(
+    current_user: Annotated[User, Depends(get_directory_admin)],
+    db: AsyncSession = Depends(get_db),
+    user_status: Optional[UserStatus] = Query(None, alias="status"),
+    after_id: Optional[uuid.UUID] = None,
+    limit: int = Query(100, ge=1, le=1000),
+):
+    users, has_more = await UserService.list_users(
+        db, status=user_status, after_id=after_id, limit=limit
+    )
+    return RawJSONResponse(dump_user_page(users, has_more))
+
+
+@router.get("/export")
+async def export_users(
+    current_user: Annotated[User, Depends(get_directory_admin)],
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    user_status: Optional[UserStatus] = Query(None, alias="status"),
+):
+    """Every user's public profile, streamed from a server-side cursor."""
+    return StreamingResponse(
+        encode_users(stream_users(user_status), fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="users.{fmt}"'},
+    )
+
+
+@router.get("/me", response_model=UserResponse)
+async def read_me(current_user: Annotated[User, Depends(get_current_active_user)]):
+    return RawJSONResponse(user_serializer.dump(current_user))
+
+
+@router.patch("/me", response_model=UserResponse)
+async def update_me(
+    data: UserUpdate,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    user = await UserService.update_user(db, current_user, data)
+    return RawJSONResponse(user_serializer.dump(user))
+
+
+@router.put("/me/avatar", response_model=UserResponse)
+async def upload_avatar(
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    filename: str = Query(..., min_length=1, max_length=255),
+    db: AsyncSession = Depends(get_db),
+):
+    """Store the raw request body as an image and make it the avatar."""
+    stored = await file_store.save(
+        request.stream(),
+        filename,
+        images_only=True,
+        declared_size=declared_size(request),
+    )
+    if not stored.deduplicated:
+        thumbnailer.submit(stored.key)
+    user = await UserService.update_user(
+        db, current_user, UserUpdate(avatar_url=upload_response(stored).url)
+    )
+    return RawJSONResponse(user_serializer.dump(user))
+
+
+@router.get("/search", response_model=list[UserPublicResponse])
+async def search_users(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=settings.user_search_max_results),
+    db: AsyncSession = Depends(get_db),
+):
+    """Users whose username or display name contains q, best matches first."""
+    users = await UserService.search_users(db, q, limit)
+    return RawJSONResponse(public_user_serializer.dump_many(users))
+
+
+@router.get("/autocomplete", response_model=list[UserMention])
+async def autocomplete_users(
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    prefix: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=settings.user_search_max_results),
+    db: AsyncSession = Depends(get_db),
+):
+    """@mention suggestions: usernames starting with prefix."""
+    mentions = await UserService.autocomplete(db, prefix, limit)
+    return RawJSONResponse(mention_serializer.dump_many(mentions))
+
+
+@router.get("/{user_id}", response_model=UserPublicResponse)
+async def read_user(
+    user_id: uuid.UUID,
+    current_user: Annotated[User, Depends(get_current_active_user)],
+    db: AsyncSession = Depends(get_db),
+):
+    user = await UserService.get_by_id(db, user_id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+    return RawJSONResponse(public_user_serializer.dump(user))
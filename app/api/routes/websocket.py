@@ -0,0 +1,112 @@
+"""
+Real-time WebSocket gateway.
+
+Clients connect to /ws?token=<access token> and send JSON frames:
+    {"action": "join", "room": "<room>"}
+    {"action": "leave", "room": "<room>"}
+    {"action": "message", "room": "<room>", "data": {...}}
+
+Rooms named conversation:<id> may only be joined by members of that
+conversation, and only the server publishes to them.
+"""
+
+import json
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect, status
+
+from app.core.security import decode_token
+from app.core.token_cache import token_cache
+from app.db.database import AsyncSessionLocal
+from app.services.connection_manager import manager
+from app.services.message_service import MessageService, room_conversation_id
+from app.services.token_service import TokenService
+
+router = APIRouter(tags=["websocket"])
+
+
+async def authenticate_token(token: str) -> Optional[str]:
+    """Return the user id of a valid, unrevoked access token, or None."""
+    payload = token_cache.get_claims(token)
+    if payload is None:
+        payload = decode_token(token)
+        if payload is None or payload.get("type") != "access":
+            return None
+    if await TokenService.is_revoked(payload):
+        return None
+    return payload.get("sub")
+
+
+async def join_error(user_id: str, room: str) -> Optional[str]:
+    """Why the user may not join room, or None if they may."""
+    try:
+        conversation_id = room_conversation_id(room)
+    except ValueError:
+        return "invalid room"
+    if conversation_id is None:
+        return None
+    async with AsyncSessionLocal() as db:
+        if await MessageService.is_member(db, conversation_id, uuid.UUID(user_id)):
+            return None
+    return "not a member"
+
+
+@router.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
+    user_id = await authenticate_token(token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = manager.connect(websocket, user_id)
+    try:
+        while True:
+            try:
+                frame = json.loads(await websocket.receive_text())
+            except ValueError:
+                frame = None
+            if not isinstance(frame, dict):
+                connection.send_nowait('{"type":"error","detail":"invalid frame"}')
+                continue
+
+            action = frame.get("action")
+            room = frame.get("room")
+            if not isinstance(room, str) or not room:
+                connection.send_nowait('{"type":"error","detail":"room is required"}')
+                continue
+
+            if action == "join":
+                error = await join_error(user_id, room)
+                if error is not None:
+                    connection.send_nowait(
+                        json.dumps({"type": "error", "detail": error})
+                    )
+                    continue
+                await manager.join(connection, room)
+            elif action == "leave":
+                await manager.leave(connection, room)
+            elif action == "message":
+                if room not in connection.rooms:
+                    connection.send_nowait('{"type":"error","detail":"not in room"}')
+                    continue
+                if room_conversation_id(room) is not None:
+                    # Conversation messages go through the REST API
+                    connection.send_nowait('{"type":"error","detail":"read-only room"}')
+                    continue
+                await manager.publish(
+                    room,
+                    {
+                        "type": "message",
+                        "room": room,
+                        "sender": user_id,
+                        "data": frame.get("data"),
+                    },
+                )
+            else:
+                connection.send_nowait('{"type":"error","detail":"unknown action"}')
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await manager.disconnect(connection)
@@ -16,6 +16,49 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 20
+    jwt_backend: str = "fast"  # "fast" or "jose"
+    jwt_private_key: str = ""  # PEM, for ES256 / EdDSA
+    jwt_private_key_file: str = ""
+    jwt_key_id: str = ""  # defaults to the public key's thumbprint
+
+    # Refresh-token families and revocation. "memory" is per process and
+    # only works with a single worker: a refresh token issued by one process
+    # is unknown to the others, so multi-worker deployments need "redis".
+    # Revocations reach other workers at once only if broadcast_backend is
+    # also "redis"; otherwise they pick them up on their next sync.
+    token_store_backend: str = "memory"  # "memory" or "redis"
+    revocation_capacity: int = 100000
+    revocation_error_rate: float = 0.001
+    revocation_sync_interval_seconds: float = 60.0
+
+    # Password Hashing
+    password_hash_executor: str = "thread"  # "thread" or "process"
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
+    # bcrypt cost; 0 calibrates at startup to the per-hash latency budget
+    password_hash_rounds: int = 0
+    password_hash_budget_ms: float = 250.0
+    password_hash_min_rounds: int = 10
+    password_hash_max_rounds: int = 16
+
+    # Login throttling, per client IP and per username (token buckets in
+    # Redis, or per process when REDIS_URL is empty)
+    login_limit_enabled: bool = True
+    login_ip_burst: int = 30
+    login_ip_per_minute: float = 30.0
+    login_username_burst: int = 10
+    login_username_per_minute: float = 5.0
+    login_limit_max_keys: int = 100000
+    # Reverse proxies (comma-separated IPs) whose X-Forwarded-For is
+    # believed when finding the client IP. Without them every client behind
+    # a proxy shares the proxy's IP bucket. Leave empty when uvicorn already
+    # runs with --proxy-headers --forwarded-allow-ips, which applies the
+    # header itself; never list addresses clients can connect from directly
+    trusted_proxies: str = ""
+
+    # Verified-token cache
+    token_cache_max_entries: int = 10000
+    token_cache_user_ttl_seconds: int = 30
 
     # Application Settings
     project_name: str = "Chat Backend API"
@@ -32,14 +75,73 @@ class Settings(BaseSettings):
     redis_url: str = "redis://localhost:6379/0"
     redis_password: str = ""
 
+    # User lookup cache (L1 in-process, L2 Redis)
+    user_cache_redis_enabled: bool = True
+    user_cache_l1_max_entries: int = 10000
+    user_cache_l1_ttl_seconds: int = 5
+    user_cache_l2_ttl_seconds: int = 300
+    user_cache_negative_ttl_seconds: int = 30
+
+    # Usernames allowed to list and export the whole user directory
+    # (comma-separated); empty means nobody
+    user_directory_admins: str = ""
+
+    # User search (in-process username prefix index for autocomplete)
+    user_search_index_enabled: bool = True
+    user_search_sync_interval_seconds: float = 300.0
+    user_search_max_results: int = 20
+
+    # Presence write-behind
+    presence_flush_interval_seconds: float = 2.0
+    presence_flush_batch_size: int = 1000
+    # Presence read from the database is cached per worker for this long
+    presence_cache_max_entries: int = 100000
+    presence_cache_ttl_seconds: float = 10.0
+
+    # WebSocket Gateway
+    websocket_send_queue_size: int = 256
+
+    # Cross-worker broadcast bus
+    broadcast_backend: str = "memory"  # "memory" or "redis"
+    broadcast_batch_size: int = 100
+    broadcast_max_pending: int = 10000
+
+    # Message group commit (6 bind params per row, keep batch <= 5000)
+    message_write_batch_size: int = 500
+    message_write_linger_ms: float = 5.0
+    message_write_max_pending: int = 10000
+
+    # Event-loop lag monitor
+    loop_monitor_enabled: bool = False
+    loop_monitor_interval_ms: float = 100.0
+    loop_monitor_threshold_ms: float = 100.0
+
     # File Upload Settings
     max_upload_size: int = 10485760
     upload_dir: str = "./uploads"
     allowed_image_extensions: str = "jpg,jpeg,jpg,png,gif,webp"
     allowed_file_extensions: str = "pdf,doc,docx,txt,zip"
 
+    # File serving (stored files are immutable, named by content hash)
+    file_stat_cache_entries: int = 4096
+    file_cache_max_age_seconds: int = 31536000
+    # Internal location nginx maps to upload_dir; when set, downloads are
+    # handed to nginx with X-Accel-Redirect so it can sendfile() them
+    file_accel_redirect_prefix: str = ""
+
+    # Image thumbnails (WebP variants rendered in a process pool)
+    thumbnail_enabled: bool = True
+    thumbnail_sizes: str = "32,64,128"
+    thumbnail_workers: int = 2
+    thumbnail_max_pending: int = 256
+    thumbnail_quality: int = 80
+    # Larger images are not decoded at all (decompression bombs)
+    thumbnail_max_pixels: int = 50000000
+
     # Logging
     LOG_LEVEL: str = "INFO"
+    log_json: bool = True
+    log_queue_size: int = 10000
 
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
@@ -65,6 +167,23 @@ class Settings(BaseSettings):
         """Parse allowed_file_extensions_list into a list"""
         return [ext.strip() for ext in self.allowed_file_extensions.split(",")]
 
+    @property
+    def trusted_proxies_list(self) -> List[str]:
+        """Parse trusted_proxies into a list"""
+        proxies = (proxy.strip() for proxy in self.trusted_proxies.split(","))
+        return [proxy for proxy in proxies if proxy]
+
+    @property
+    def user_directory_admins_list(self) -> List[str]:
+        """Parse user_directory_admins into a list"""
+        names = (name.strip() for name in self.user_directory_admins.split(","))
+        return [name for name in names if name]
+
+    @property
+    def thumbnail_sizes_list(self) -> List[int]:
+        """Parse thumbnail_sizes into a sorted list"""
+        return sorted(int(size) for size in self.thumbnail_sizes.split(","))
+
 
 # Create a single instance to be imported throughout the app
 settings = Settings()
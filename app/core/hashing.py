@@ -0,0 +1,167 @@
+"""
+Bounded worker pool for CPU-heavy password hashing.
+
+bcrypt is deliberately slow, so running it directly inside an async handler
+blocks the event loop for every other connection on the worker. The pool
+moves that work onto a thread or process executor and sheds load with
+HashingPoolFull once too many jobs are waiting.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+
+class HashingPoolFull(Exception):
+    """Raised when the hashing pool has no room for another job."""
+
+
+def _timed_call(fn: Callable[..., Any], *args: Any) -> Tuple[float, Any]:
+    """
+    Run fn inside the worker and return the time it started.
+
+    time.monotonic is system-wide, so the value is comparable with the
+    submit time recorded in the parent even when a process pool is used.
+    """
+    started = time.monotonic()
+    return started, fn(*args)
+
+
+class HashingPool:
+    """
+    Async front-end for a thread or process executor with a bounded queue.
+
+    Args:
+        max_workers: Number of worker threads or processes
+        max_pending: Maximum number of jobs (running + waiting) accepted
+        kind: "thread" or "process"
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, kind: str = "thread"):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown hashing pool kind: {kind!r}")
+
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor: Optional[Executor] = None
+
+        # Stats
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        """Lazily create the executor so importing the module stays cheap."""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="hashing"
+                )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of accepted jobs that are waiting for a free worker."""
+        return max(self.pending - self.max_workers, 0)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) on the pool.
+
+        Raises:
+            HashingPoolFull: If max_pending jobs are already in flight
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingPoolFull("Password hashing pool is saturated.")
+
+        self.pending += 1
+        submitted = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            started, result = await loop.run_in_executor(
+                self.executor, _timed_call, fn, *args
+            )
+        finally:
+            self.pending -= 1
+
+        finished = time.monotonic()
+        wait = max(started - submitted, 0.0)
+        self.completed += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.run_seconds_total += finished - started
+        return result
+
+    def stats(self) -> dict:
+        """Return a snapshot of the pool counters."""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.pending,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_max": self.wait_seconds_max,
+            "run_seconds_total": self.run_seconds_total,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the executor, waiting for running jobs to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+def calibrate_bcrypt_rounds(
+    budget: float, min_rounds: int = 10, max_rounds: int = 16, samples: int = 3
+) -> Tuple[int, float]:
+    """
+    Pick the highest bcrypt cost whose hash time on this machine fits the
+    budget.
+
+    Each extra round doubles the work, so one timing at min_rounds predicts
+    the rest; the prediction is then measured and stepped down if needed.
+    min_rounds is a security floor and is returned even when it is over
+    budget.
+
+    Args:
+        budget: Target seconds per hash
+        min_rounds: Lowest acceptable cost
+        max_rounds: Highest cost considered
+        samples: Timings per measurement (the fastest is used)
+
+    Returns:
+        (rounds, measured seconds per hash at that cost)
+    """
+    from passlib.hash import bcrypt
+
+    def measure(rounds: int) -> float:
+        handler = bcrypt.using(rounds=rounds)
+        timings = []
+        for _ in range(samples):
+            started = time.perf_counter()
+            handler.hash("calibration password")
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    base = measure(min_rounds)
+    rounds = min_rounds
+    while rounds < max_rounds and base * 2 ** (rounds + 1 - min_rounds) <= budget:
+        rounds += 1
+
+    elapsed = measure(rounds) if rounds != min_rounds else base
+    while elapsed > budget and rounds > min_rounds:
+        rounds -= 1
+        elapsed = measure(rounds)
+    return rounds, elapsed
@@ -0,0 +1,365 @@
+"""
+Pluggable JWT signing and verification.
+
+Keys are parsed and algorithm objects built once, when the backend is
+created, instead of on every call. Two backends share the same key
+material:
+
+- "jose": python-jose, with preconstructed key objects (HS256/384/512,
+  ES256)
+- "fast": a small compact-JWS implementation on top of hmac and
+  cryptography, with the header segment precomputed (HS256/384/512, ES256,
+  EdDSA with Ed25519)
+
+With an asymmetric algorithm the public key is published as a JWKS
+document, so other services can verify our tokens locally.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Optional
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import (
+    decode_dss_signature,
+    encode_dss_signature,
+)
+from jose import JWTError, jwk
+from jose import jwt as jose_jwt
+
+HMAC_ALGORITHMS = {"HS256": "sha256", "HS384": "sha384", "HS512": "sha512"}
+ASYMMETRIC_ALGORITHMS = ("ES256", "EdDSA")
+TIME_CLAIMS = ("exp", "iat", "nbf")
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, badly signed or expired."""
+
+
+def b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _b64str(data: bytes) -> str:
+    return b64encode(data).decode("ascii")
+
+
+class SigningKey:
+    """
+    Key material for one algorithm, parsed once.
+
+    Args:
+        algorithm: HS256/HS384/HS512, ES256 or EdDSA
+        secret: Shared secret for the HS algorithms
+        private_key_pem: PEM private key for ES256 (P-256) or EdDSA (Ed25519)
+        kid: Key id put in token headers and the JWKS; defaults to the
+            RFC 7638 thumbprint of the public key
+
+    Raises:
+        ValueError: If the key does not match the algorithm
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        secret: Optional[str] = None,
+        private_key_pem: Optional[str] = None,
+        kid: Optional[str] = None,
+    ):
+        self.algorithm = algorithm
+        self.secret: Optional[bytes] = None
+        self.private_key = None
+        self.public_key = None
+
+        if algorithm in HMAC_ALGORITHMS:
+            if not secret:
+                raise ValueError(f"{algorithm} needs a secret key")
+            self.secret = secret.encode()
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            if not private_key_pem:
+                raise ValueError(f"{algorithm} needs a private key (JWT_PRIVATE_KEY)")
+            self.private_key = serialization.load_pem_private_key(
+                private_key_pem.encode(), password=None
+            )
+            expected = (
+                ec.EllipticCurvePrivateKey
+                if algorithm == "ES256"
+                else ed25519.Ed25519PrivateKey
+            )
+            if not isinstance(self.private_key, expected) or (
+                algorithm == "ES256"
+                and not isinstance(self.private_key.curve, ec.SECP256R1)
+            ):
+                raise ValueError(f"The private key is not usable with {algorithm}")
+            self.public_key = self.private_key.public_key()
+        else:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+
+        self.kid = kid or (self.thumbprint() if self.public_key else None)
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return self.public_key is not None
+
+    def private_pem(self) -> str:
+        return self.private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+
+    def public_pem(self) -> str:
+        return self.public_key.public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+
+    def _jwk_members(self) -> dict:
+        if isinstance(self.public_key, ec.EllipticCurvePublicKey):
+            numbers = self.public_key.public_numbers()
+            return {
+                "crv": "P-256",
+                "kty": "EC",
+                "x": _b64str(numbers.x.to_bytes(32, "big")),
+                "y": _b64str(numbers.y.to_bytes(32, "big")),
+            }
+        raw = self.public_key.public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+        return {"crv": "Ed25519", "kty": "OKP", "x": _b64str(raw)}
+
+    def thumbprint(self) -> str:
+        """RFC 7638 JWK thumbprint of the public key."""
+        members = json.dumps(self._jwk_members(), separators=(",", ":"), sort_keys=True)
+        return _b64str(hashlib.sha256(members.encode()).digest())
+
+    def public_jwk(self) -> Optional[dict]:
+        """The public key as a JWK, or None for shared-secret algorithms."""
+        if not self.is_asymmetric:
+            return None
+        return {
+            **self._jwk_members(),
+            "kid": self.kid,
+            "alg": self.algorithm,
+            "use": "sig",
+        }
+
+
+def _normalize_claims(claims: dict) -> dict:
+    for name in TIME_CLAIMS:
+        value = claims.get(name)
+        if isinstance(value, datetime):
+            claims[name] = int(value.timestamp())
+    return claims
+
+
+class JWTBackend(ABC):
+    """Encodes and verifies tokens with one SigningKey."""
+
+    name = "base"
+    algorithms: tuple[str, ...] = ()
+
+    def __init__(self, key: SigningKey):
+        if key.algorithm not in self.algorithms:
+            raise ValueError(
+                f"The {self.name} JWT backend does not support {key.algorithm}"
+            )
+        self.key = key
+
+    @abstractmethod
+    def encode(self, claims: dict) -> str:
+        """Sign claims into a compact JWT."""
+
+    @abstractmethod
+    def decode(self, token: str) -> dict:
+        """
+        Verify a token and return its claims.
+
+        Raises:
+            TokenError: If the token is invalid or expired
+        """
+
+    def jwks(self) -> dict:
+        jwk_ = self.key.public_jwk()
+        return {"keys": [jwk_] if jwk_ else []}
+
+
+class JoseBackend(JWTBackend):
+    """python-jose with key objects constructed once."""
+
+    name = "jose"
+    algorithms = (*HMAC_ALGORITHMS, "ES256")
+
+    def __init__(self, key: SigningKey):
+        super().__init__(key)
+        if key.is_asymmetric:
+            self._signer = jwk.construct(key.private_pem(), key.algorithm)
+            self._verifier = jwk.construct(key.public_pem(), key.algorithm)
+        else:
+            self._signer = self._verifier = jwk.construct(key.secret, key.algorithm)
+        self._headers = {"kid": key.kid} if key.kid else None
+        self._allowed = [key.algorithm]
+
+    def encode(self, claims: dict) -> str:
+        return jose_jwt.encode(
+            claims, self._signer, algorithm=self.key.algorithm, headers=self._headers
+        )
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jose_jwt.decode(
+                token,
+                self._verifier,
+                algorithms=self._allowed,
+                options={"verify_aud": False},
+            )
+        except JWTError as exc:
+            raise TokenError(str(exc)) from exc
+
+
+class FastBackend(JWTBackend):
+    """
+    Minimal compact-JWS implementation.
+
+    Only what we issue is accepted: the header must name the configured
+    algorithm, the signature is checked before the payload is parsed, and
+    exp/nbf are enforced.
+    """
+
+    name = "fast"
+    algorithms = (*HMAC_ALGORITHMS, *ASYMMETRIC_ALGORITHMS)
+
+    def __init__(self, key: SigningKey):
+        super().__init__(key)
+        header = {"alg": key.algorithm, "typ": "JWT"}
+        if key.kid:
+            header["kid"] = key.kid
+        self._header_segment = b64encode(
+            json.dumps(header, separators=(",", ":")).encode()
+        )
+        self._digest = HMAC_ALGORITHMS.get(key.algorithm)
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        if self._digest is not None:
+            return hmac.digest(self.key.secret, signing_input, self._digest)
+        if self.key.algorithm == "ES256":
+            r, s = decode_dss_signature(
+                self.key.private_key.sign(signing_input, ec.ECDSA(hashes.SHA256()))
+            )
+            return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+        return self.key.private_key.sign(signing_input)
+
+    def _verify(self, signing_input: bytes, signature: bytes) -> bool:
+        if self._digest is not None:
+            expected = hmac.digest(self.key.secret, signing_input, self._digest)
+            return hmac.compare_digest(expected, signature)
+        try:
+            if self.key.algorithm == "ES256":
+                if len(signature) != 64:
+                    return False
+                der = encode_dss_signature(
+                    int.from_bytes(signature[:32], "big"),
+                    int.from_bytes(signature[32:], "big"),
+                )
+                self.key.public_key.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+            else:
+                self.key.public_key.verify(signature, signing_input)
+        except InvalidSignature:
+            return False
+        return True
+
+    def encode(self, claims: dict) -> str:
+        payload = json.dumps(
+            _normalize_claims(dict(claims)), separators=(",", ":"), default=str
+        )
+        signing_input = self._header_segment + b"." + b64encode(payload.encode())
+        return (signing_input + b"." + b64encode(self._sign(signing_input))).decode(
+            "ascii"
+        )
+
+    def decode(self, token: str) -> dict:
+        try:
+            raw = token.encode("ascii")
+            signing_input, signature_segment = raw.rsplit(b".", 1)
+            header_segment, payload_segment = signing_input.split(b".", 1)
+            if header_segment != self._header_segment:
+                header = json.loads(b64decode(header_segment))
+                if not isinstance(header, dict):
+                    raise TokenError("Malformed header")
+                if header.get("alg") != self.key.algorithm:
+                    raise TokenError("Unexpected algorithm")
+                if header.get("kid", self.key.kid) != self.key.kid:
+                    raise TokenError("Unknown key id")
+            signature = b64decode(signature_segment)
+        except (ValueError, TypeError) as exc:
+            raise TokenError("Malformed token") from exc
+
+        if not self._verify(signing_input, signature):
+            raise TokenError("Signature verification failed")
+
+        try:
+            claims = json.loads(b64decode(payload_segment))
+        except ValueError as exc:
+            raise TokenError("Malformed payload") from exc
+        if not isinstance(claims, dict):
+            raise TokenError("Malformed payload")
+
+        now = time.time()
+        exp = claims.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise TokenError("Invalid exp claim")
+            if now >= exp:
+                raise TokenError("Signature has expired")
+        nbf = claims.get("nbf")
+        if nbf is not None:
+            if not isinstance(nbf, (int, float)):
+                raise TokenError("Invalid nbf claim")
+            if now < nbf:
+                raise TokenError("The token is not yet valid")
+        return claims
+
+
+BACKENDS: dict[str, type[JWTBackend]] = {
+    JoseBackend.name: JoseBackend,
+    FastBackend.name: FastBackend,
+}
+
+
+def create_backend(name: str, key: SigningKey) -> JWTBackend:
+    """
+    Build a backend by name ("jose" or "fast").
+
+    Raises:
+        ValueError: If the name is unknown or the backend lacks the algorithm
+    """
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown JWT backend: {name!r}") from None
+    return backend(key)
+
+
+def load_signing_key(settings) -> SigningKey:
+    """SigningKey from settings (algorithm, secret or private key, kid)."""
+    private_key = settings.jwt_private_key
+    if not private_key and settings.jwt_private_key_file:
+        with open(settings.jwt_private_key_file, encoding="utf-8") as f:
+            private_key = f.read()
+    return SigningKey(
+        settings.algorithm,
+        secret=settings.secret_key,
+        private_key_pem=private_key or None,
+        kid=settings.jwt_key_id or None,
+    )
@@ -0,0 +1,300 @@
+"""
+Structured, non-blocking logging.
+
+The handler attached to the root logger only appends records to a bounded
+in-memory queue; a background thread drains it in batches, formats them as
+JSON and writes them to stdout. The event loop therefore never blocks on
+terminal or file I/O, and traceback formatting (which reads source files)
+also happens on the writer thread. If the writer falls behind and the queue
+fills up, records are dropped and counted instead of blocking the caller.
+
+Level checks stay cheap: Logger.isEnabledFor caches its answer per logger
+and level, and the per-record thread/process lookups are switched off, so a
+disabled call costs a dict lookup.
+
+Usage:
+    logger = logging.getLogger(__name__)
+    logger.info("message sent", extra={"conversation_id": str(cid)})
+"""
+
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+# Set per request by RequestIdMiddleware
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "request_id"}
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line, including `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        request_id = getattr(record, "request_id", None)
+        return f"{text} [{request_id}]" if request_id else text
+
+
+class NonBlockingQueueHandler(logging.Handler):
+    """
+    Handler that only appends records to an in-memory queue.
+
+    Only the request id is captured (it lives in a contextvar and would be
+    lost on the writer thread) and the message is merged with its args (so
+    mutable args are not read later). No handler lock is taken: deque
+    appends are atomic. When the queue is full the record is dropped.
+
+    Args:
+        max_pending: Records buffered before new ones are dropped
+    """
+
+    def __init__(self, max_pending: int = 10000):
+        super().__init__()
+        self.max_pending = max_pending
+        self.pending: deque[logging.LogRecord] = deque()
+        self.dropped = 0
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        if self.filters and not self.filter(record):
+            return False
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            return True
+        record.msg = record.getMessage()
+        record.args = None
+        record.request_id = request_id_var.get()
+        self.pending.append(record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
+class BackgroundWriter(threading.Thread):
+    """
+    Drains a NonBlockingQueueHandler on a timer and writes each batch with
+    one write() and flush(), so the event loop is woken or contended at most
+    once per interval rather than once per record.
+
+    Args:
+        handler: Handler whose queue is drained
+        stream: Destination
+        formatter: Formats each record as one line
+        interval: Seconds between drains
+    """
+
+    def __init__(
+        self,
+        handler: NonBlockingQueueHandler,
+        stream: TextIO,
+        formatter: logging.Formatter,
+        interval: float = 0.01,
+    ):
+        super().__init__(name="log-writer", daemon=True)
+        self.handler = handler
+        self.stream = stream
+        self.formatter = formatter
+        self.interval = interval
+        self._stopping = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            self.drain()
+        self.drain()
+
+    def drain(self) -> None:
+        pending = self.handler.pending
+        lines = []
+        while pending:
+            record = pending.popleft()
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                lines.append(f"unformattable log record from {record.name}")
+        if lines:
+            try:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass
+
+    def stop(self) -> None:
+        """Write what is still queued and stop the thread."""
+        self._stopping.set()
+        self.join()
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_writer: Optional[BackgroundWriter] = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    json_format: bool = True,
+    queue_size: int = 10000,
+    stream: Optional[TextIO] = None,
+) -> None:
+    """
+    Route all logging through the background writer.
+
+    Replaces the root logger's handlers and makes uvicorn's loggers
+    propagate to it, so their output is queued as well. Calling it again
+    reconfigures the level and formatter.
+
+    Args:
+        level: Root log level name, e.g. settings.LOG_LEVEL
+        json_format: JSON lines when True, plain text otherwise
+        queue_size: Records buffered before new ones are dropped
+        stream: Where the writer thread writes (defaults to stdout)
+    """
+    global _handler, _writer
+    shutdown_logging()
+
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    formatter = (
+        JSONFormatter()
+        if json_format
+        else _TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+    _handler = NonBlockingQueueHandler(queue_size)
+    _writer = BackgroundWriter(_handler, stream or sys.stdout, formatter)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers.clear()
+        uvicorn_logger.propagate = True
+
+    _writer.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _handler, _writer
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+        _handler = None
+
+
+def stats() -> dict:
+    if _handler is None:
+        return {"queue_depth": 0, "dropped": 0}
+    return {"queue_depth": len(_handler.pending), "dropped": _handler.dropped}
+
+
+class RateLimitedLogger:
+    """
+    Token-bucket rate limiting and sampling for hot-path log lines.
+
+    Each key gets its own bucket, so one noisy source does not silence the
+    others. Suppressed calls are counted and reported as `suppressed` on the
+    next record that gets through.
+
+    Args:
+        logger: Logger to emit to
+        per_second: Sustained records per second per key
+        burst: Records allowed back to back before limiting
+        sample_rate: Fraction of calls considered at all (1.0 = every call)
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        per_second: float = 1.0,
+        burst: int = 10,
+        sample_rate: float = 1.0,
+    ):
+        self.logger = logger
+        self.per_second = per_second
+        self.burst = burst
+        self.sample_rate = sample_rate
+        # key -> [tokens, last refill, suppressed since last emit]
+        self._buckets: dict[object, list] = {}
+
+    def log(
+        self, level: int, msg: str, *args, key: object = None, **kwargs
+    ) -> bool:
+        """Log if enabled, sampled in and within rate; return whether emitted."""
+        if not self.logger.isEnabledFor(level):
+            return False
+
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= 10000:
+                self._buckets.clear()
+            bucket = self._buckets[key] = [float(self.burst), now, 0]
+        else:
+            bucket[0] = min(
+                self.burst, bucket[0] + (now - bucket[1]) * self.per_second
+            )
+            bucket[1] = now
+
+        if bucket[0] < 1 or (
+            self.sample_rate < 1.0 and random.random() >= self.sample_rate
+        ):
+            bucket[2] += 1
+            return False
+
+        bucket[0] -= 1
+        if bucket[2]:
+            extra = dict(kwargs.pop("extra", None) or {})
+            extra["suppressed"] = bucket[2]
+            kwargs["extra"] = extra
+            bucket[2] = 0
+        self.logger.log(level, msg, *args, **kwargs)
+        return True
+
+    def info(self, msg: str, *args, **kwargs) -> bool:
+        return self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg: str, *args, **kwargs) -> bool:
+        return self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg: str, *args, **kwargs) -> bool:
+        return self.log(logging.ERROR, msg, *args, **kwargs)
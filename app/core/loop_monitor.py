@@ -0,0 +1,231 @@
+"""
+Event-loop lag monitor and blocking-call attribution.
+
+A heartbeat task sleeps for a fixed interval and records how late it wakes
+up; that lag is how long every other coroutine on the worker was stalled.
+A watchdog thread notices when the heartbeat is overdue by more than the
+threshold and, while the loop is still stuck, samples the loop thread's
+stack with sys._current_frames() and looks up the route of the task that
+is running. When the heartbeat finally runs, the stall is recorded with
+that stack and route, logged and counted.
+
+The cost is one timer per interval plus a thread that wakes a few times per
+threshold, so it can stay on in production. Tests can use
+assert_no_blocking() to fail when a handler blocks longer than a budget.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, NamedTuple, Optional
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+loop_lag = registry.histogram(
+    "event_loop_lag_seconds", "How late the loop monitor heartbeat woke up"
+)
+loop_blocked = registry.counter(
+    "event_loop_blocked_total", "Stalls longer than the threshold", ("route",)
+)
+
+# Task -> ASGI scope of the request it is serving, kept by TimingMiddleware.
+# The router fills in scope["route"] and scope["endpoint"] once matched.
+request_scopes: dict[asyncio.Task, dict] = {}
+
+
+class BlockedCall(NamedTuple):
+    """One stall of the event loop longer than the threshold."""
+
+    duration: float
+    route: Optional[str]
+    handler: Optional[str]
+    stack: Optional[str]
+
+
+def _describe(scope: Optional[dict]) -> tuple[Optional[str], Optional[str]]:
+    if scope is None:
+        return None, None
+    route = scope.get("route")
+    endpoint = scope.get("endpoint")
+    handler = (
+        f"{endpoint.__module__}.{endpoint.__qualname__}"
+        if endpoint is not None
+        else None
+    )
+    return getattr(route, "path", None), handler
+
+
+class LoopMonitor:
+    """
+    Measures event-loop lag and captures what blocked it.
+
+    Args:
+        interval: Seconds between heartbeats
+        threshold: Lag in seconds that counts as blocked
+        max_samples: Recent BlockedCall samples kept in `samples`
+        stack_limit: Innermost frames kept per stack sample
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        max_samples: int = 100,
+        stack_limit: int = 30,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_limit = stack_limit
+        self.samples: deque[BlockedCall] = deque(maxlen=max_samples)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        # Written by the heartbeat, read by the watchdog
+        self._expected = 0.0
+        # Written by the watchdog, consumed by the heartbeat
+        self._captured: Optional[tuple] = None
+        self._captured_for = 0.0
+
+        # Stats
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.blocked = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start the heartbeat on the running loop and the watchdog thread."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._expected = time.monotonic() + self.interval
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring, recording a stall that ended just before."""
+        if self._task is None:
+            return
+        self._check(time.monotonic())
+        self._stopping.set()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._check(now)
+            self._expected = now + self.interval
+
+    def _check(self, now: float) -> None:
+        lag = max(0.0, now - self._expected)
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        loop_lag.observe(lag)
+
+        captured, self._captured = self._captured, None
+        if lag < self.threshold:
+            return
+        route, handler, stack = captured or (None, None, None)
+        self.samples.append(BlockedCall(lag, route, handler, stack))
+        self.blocked += 1
+        loop_blocked.inc(1, route or "unknown")
+        logger.warning(
+            "event loop blocked for %.0fms in %s",
+            lag * 1000,
+            handler or "an unknown callback",
+            extra={"route": route, "handler": handler, "stack": stack},
+        )
+
+    def _watch(self) -> None:
+        poll = self.threshold / 4
+        while not self._stopping.wait(poll):
+            expected = self._expected
+            if (
+                time.monotonic() - expected >= self.threshold
+                and self._captured_for != expected
+            ):
+                self._captured_for = expected
+                self._captured = self._capture()
+
+    def _capture(self) -> tuple:
+        """Runs on the watchdog thread while the loop is stuck."""
+        try:
+            task = asyncio.current_task(self._loop)
+        except RuntimeError:
+            task = None
+        route, handler = _describe(request_scopes.get(task))
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = (
+            "".join(traceback.format_stack(frame, limit=self.stack_limit))
+            if frame is not None
+            else None
+        )
+        return route, handler, stack
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "last_lag_ms": round(self.last_lag * 1000, 3),
+            "max_lag_ms": round(self.max_lag * 1000, 3),
+            "blocked": self.blocked,
+        }
+
+
+loop_monitor = LoopMonitor(
+    interval=settings.loop_monitor_interval_ms / 1000,
+    threshold=settings.loop_monitor_threshold_ms / 1000,
+)
+
+
+@asynccontextmanager
+async def assert_no_blocking(budget: float = 0.05) -> AsyncIterator[LoopMonitor]:
+    """
+    Fail if the event loop is blocked longer than `budget` seconds inside
+    the block.
+
+    Usage:
+        async with assert_no_blocking(0.05):
+            await client.get("/api/v1/users/me", headers=headers)
+
+    Raises:
+        AssertionError: Naming the route, handler and stack of each stall
+    """
+    monitor = LoopMonitor(interval=min(budget / 5, 0.005), threshold=budget)
+    monitor.start()
+    try:
+        yield monitor
+    finally:
+        await monitor.stop()
+
+    if monitor.samples:
+        details = "\n".join(
+            f"- {sample.duration * 1000:.0f}ms in {sample.handler or 'unknown'} "
+            f"({sample.route or 'no route'})\n{sample.stack or ''}"
+            for sample in monitor.samples
+        )
+        raise AssertionError(
+            f"event loop blocked longer than {budget * 1000:.0f}ms:\n{details}"
+        )
@@ -0,0 +1,123 @@
+"""
+Request timing and request id middleware.
+
+Both are plain ASGI middleware (not BaseHTTPMiddleware) so they add no
+extra task or body buffering per request. The timing middleware opens a
+RequestStats for the database event hooks to fill in, records latency per
+route template and reports the breakdown in a Server-Timing header.
+"""
+
+import asyncio
+import time
+import uuid
+
+from app.core.logger import request_id_var
+from app.core.loop_monitor import request_scopes
+from app.core.metrics import (
+    RequestStats,
+    db_queries_per_request,
+    http_request_duration,
+    http_requests,
+    http_requests_in_progress,
+    request_stats,
+)
+
+
+def server_timing(stats: RequestStats) -> bytes:
+    """Format the Server-Timing header value (durations in milliseconds)."""
+    app_ms = (time.perf_counter() - stats.started) * 1000
+    return (
+        f'app;dur={app_ms:.2f}, db;dur={stats.db_time * 1000:.2f};desc="'
+        f'{stats.db_queries} queries", pool;dur={stats.pool_wait * 1000:.2f}'
+    ).encode("latin-1")
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, so /users/{user_id} is one series."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class TimingMiddleware:
+    """Per-route latency histograms and Server-Timing headers."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((b"server-timing", server_timing(stats)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        # Lets the loop monitor attribute a stall to this request's route
+        task = asyncio.current_task()
+        request_scopes[task] = scope
+
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            elapsed = time.perf_counter() - stats.started
+            request_scopes.pop(task, None)
+            request_stats.reset(token)
+            http_requests_in_progress.dec()
+            method = scope["method"]
+            route = route_template(scope)
+            http_request_duration.observe(elapsed, method, route)
+            http_requests.inc(1, method, route, status_code)
+            db_queries_per_request.observe(stats.db_queries)
+
+
+class RequestIdMiddleware:
+    """
+    Tag each HTTP request with an id for log correlation.
+
+    A well-formed incoming X-Request-ID is reused, otherwise a new one is
+    generated; either way it is echoed back on the response.
+    """
+
+    header = b"x-request-id"
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == self.header:
+                if 0 < len(value) <= 64 and value.isascii():
+                    request_id = value.decode()
+                break
+        if request_id is None:
+            request_id = uuid.uuid4().hex
+        encoded = request_id.encode()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((self.header, encoded))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id_var.reset(token)
@@ -0,0 +1,33 @@
+"""
+Shared async Redis client.
+"""
+
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+_client: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """
+    Return the process-wide Redis client, creating it on first use.
+    The client holds a connection pool and connects lazily.
+    """
+    global _client
+    if _client is None:
+        _client = Redis.from_url(
+            settings.redis_url,
+            password=settings.redis_password or None,
+        )
+    return _client
+
+
+async def close_redis() -> None:
+    """Close the shared client and its connection pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,19 +1,131 @@
+import logging
+import secrets
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional
-from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.hashing import HashingPool, calibrate_bcrypt_rounds
+from app.core.jwt import TokenError, create_backend, load_signing_key
 
-# Password hashing context
+logger = logging.getLogger(__name__)
+
+# Password hashing context; configure_password_hashing sets the cost
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hash_rounds: Optional[int] = None
+# Hash of a random password at the current cost, for unknown usernames
+_dummy_hash: Optional[str] = None
+
+# Keys and algorithm objects are loaded once, not per token
+jwt_backend = create_backend(settings.jwt_backend, load_signing_key(settings))
+ACCESS_TOKEN_EXPIRE = timedelta(minutes=settings.access_token_expire_minutes)
+REFRESH_TOKEN_EXPIRE = timedelta(days=settings.refresh_token_expire_days)
+
+# Worker pool that keeps bcrypt off the event loop
+hashing_pool = HashingPool(
+    max_workers=settings.password_hash_workers,
+    max_pending=settings.password_hash_max_pending,
+    kind=settings.password_hash_executor,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+@lru_cache(maxsize=None)
+def _bcrypt(rounds: int):
+    return pwd_context.handler("bcrypt").using(rounds=rounds)
+
+
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
+    """
+    Hash a password, at an explicit bcrypt cost if given.
+
+    Passing rounds matters with a process pool: workers import their own
+    pwd_context and never see the cost configured in the parent.
+    """
+    if rounds is None:
+        return pwd_context.hash(password)
+    return _bcrypt(rounds).hash(password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """Whether a hash uses a deprecated scheme or a lower bcrypt cost."""
+    return pwd_context.needs_update(hashed_password)
+
+
+async def configure_password_hashing() -> int:
+    """
+    Set the bcrypt cost from settings, calibrating it if not fixed.
+
+    Calibration runs on the hashing pool so it measures the workers that
+    will do the hashing. Hashes at a lower cost are then reported by
+    needs_rehash and upgraded on the user's next login. Higher costs are
+    left alone: workers may calibrate to different costs, and a slower
+    host must not quietly weaken hashes made elsewhere.
+
+    Returns:
+        The bcrypt cost in use
+    """
+    global password_hash_rounds, _dummy_hash
+
+    rounds = settings.password_hash_rounds
+    if not rounds:
+        budget = settings.password_hash_budget_ms / 1000
+        rounds, elapsed = await hashing_pool.run(
+            calibrate_bcrypt_rounds,
+            budget,
+            settings.password_hash_min_rounds,
+            settings.password_hash_max_rounds,
+        )
+        log = logger.warning if elapsed > budget else logger.info
+        log(
+            "calibrated bcrypt cost",
+            extra={"rounds": rounds, "hash_ms": round(elapsed * 1000, 1)},
+        )
+
+    pwd_context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+    password_hash_rounds = rounds
+    _dummy_hash = await hashing_pool.run(
+        get_password_hash, secrets.token_urlsafe(), rounds
+    )
+    return rounds
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the hashing pool.
+
+    Raises:
+        HashingPoolFull: If the pool is saturated
+    """
+    return await hashing_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_dummy_password_async(plain_password: str) -> bool:
+    """
+    Spend the same work as verify_password_async, for a user that does not
+    exist, so response times do not reveal which usernames are registered.
+
+    Raises:
+        HashingPoolFull: If the pool is saturated
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await get_password_hash_async(secrets.token_urlsafe())
+    await verify_password_async(plain_password, _dummy_hash)
+    return False
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the hashing pool.
+
+    Raises:
+        HashingPoolFull: If the pool is saturated
+    """
+    return await hashing_pool.run(get_password_hash, password, password_hash_rounds)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -28,40 +140,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         Encoded JWT token string
     """
     to_encode = data.copy()
-
-    if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
-    else:
-        expire = datetime.now(timezone.utc) + timedelta(
-            minutes=settings.access_token_expire_minutes
-        )
-
+    expire = datetime.now(timezone.utc) + (expires_delta or ACCESS_TOKEN_EXPIRE)
     to_encode.update({"exp": expire, "type": "access"})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.secret_key, algorithm=settings.algorithm
-    )
-    return encoded_jwt
+    return jwt_backend.encode(to_encode)
 
 
-def create_refresh_token(data: dict) -> str:
+def create_refresh_token(data: dict, expires_at: Optional[datetime] = None) -> str:
     """
     Create a JWT refresh token.
 
     Args:
         data: Dictionary containing the claims to encode (usually {"sub": user_id})
+        expires_at: Optional absolute expiry (defaults to refresh_token_expire_days)
 
     Returns:
         Encoded JWT refresh token string
     """
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(
-        days=settings.refresh_token_expire_days
-    )
+    expire = expires_at or datetime.now(timezone.utc) + REFRESH_TOKEN_EXPIRE
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.secret_key, algorithm=settings.algorithm
-    )
-    return encoded_jwt
+    return jwt_backend.encode(to_encode)
 
 
 def decode_token(token: str) -> Optional[dict]:
@@ -75,7 +173,6 @@ def decode_token(token: str) -> Optional[dict]:
         Decoded token payload or None if invalid
     """
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=settings.algorithm)
-        return payload
-    except JWTError:
+        return jwt_backend.decode(token)
+    except TokenError:
         return None
@@ -0,0 +1,84 @@
+"""
+Verified-token cache used by get_current_user.
+
+Chat clients send the same access token many times per minute, so the
+decoded claims are cached by token digest until the token's exp. User
+snapshots are cached separately by user id so that a profile or status
+change only has to refresh one entry, however many tokens the user holds.
+
+Snapshots are per process: other workers pick up changes once
+token_cache_user_ttl_seconds has passed.
+"""
+
+import hashlib
+from typing import Any, Optional, Tuple
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+
+def token_digest(token: str) -> bytes:
+    """Digest used as cache key so raw tokens are never kept in memory."""
+    return hashlib.sha256(token.encode()).digest()
+
+
+class TokenCache:
+    """
+    LRU cache of verified token claims and user snapshots.
+
+    Args:
+        max_entries: Maximum number of tokens (and of user snapshots) kept
+        user_ttl: Seconds a user snapshot is trusted before reloading it
+    """
+
+    def __init__(self, max_entries: int, user_ttl: float):
+        self._claims: LRUCache[dict] = LRUCache(max_entries)
+        self._users: LRUCache[dict] = LRUCache(max_entries, default_ttl=user_ttl)
+
+    def get_claims(self, token: str) -> Optional[dict]:
+        """Return cached claims for a token that has not expired yet."""
+        return self._claims.get(token_digest(token))
+
+    def set_claims(self, token: str, claims: dict) -> None:
+        """Cache verified claims until the token's exp."""
+        exp = claims.get("exp")
+        if exp is None:
+            return
+        self._claims.set(token_digest(token), claims, expires_at=float(exp))
+
+    def get_user(self, user_id: Any) -> Optional[dict]:
+        """Return the cached user snapshot, if fresh."""
+        return self._users.get(str(user_id))
+
+    def set_user(self, snapshot: dict) -> None:
+        """Store a user snapshot as produced by User.to_snapshot()."""
+        self._users.set(str(snapshot["id"]), snapshot)
+
+    def get(self, token: str) -> Tuple[Optional[dict], Optional[dict]]:
+        """Return (claims, user snapshot) for a token; either may be None."""
+        claims = self.get_claims(token)
+        if claims is None:
+            return None, None
+        return claims, self.get_user(claims.get("sub"))
+
+    def refresh_user(self, user: Any) -> None:
+        """Invalidation hook: replace the snapshot after the user changed."""
+        self.set_user(user.to_snapshot())
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """Drop the snapshot so the next request reloads it."""
+        self._users.pop(str(user_id))
+
+    def clear(self) -> None:
+        self._claims.clear()
+        self._users.clear()
+
+    def stats(self) -> dict:
+        """Hit and miss counters for sizing the cache."""
+        return {"tokens": self._claims.stats(), "users": self._users.stats()}
+
+
+token_cache = TokenCache(
+    max_entries=settings.token_cache_max_entries,
+    user_ttl=settings.token_cache_user_ttl_seconds,
+)
@@ -1,6 +1,27 @@
+import time
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core import metrics
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            metrics.db_pool_wait.observe(waited)
+            stats = metrics.request_stats.get()
+            if stats is not None:
+                stats.pool_wait += waited
+
 
 engine = create_async_engine(
     settings.database_url,
@@ -9,6 +30,48 @@ engine = create_async_engine(
     pool_pre_ping=True,  # Verify connections before using them
     pool_size=10,  # Number of connections to maintain
     max_overflow=20,  # Additional connections if pool is exhausted
+    poolclass=TimedQueuePool,
+)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    metrics.db_queries.inc()
+    metrics.db_query_duration.observe(elapsed)
+    stats = metrics.request_stats.get()
+    if stats is not None:
+        stats.db_queries += 1
+        stats.db_time += elapsed
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(context):
+    # after_cursor_execute does not fire for failed statements
+    if context.connection is not None and context.cursor is not None:
+        started = context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+# Read at scrape time
+metrics.registry.gauge(
+    "db_pool_size", "Configured pool size", callback=lambda: engine.pool.size()
+)
+metrics.registry.gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out",
+    callback=lambda: engine.pool.checkedout(),
+)
+metrics.registry.gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size (negative while the pool is filling)",
+    callback=lambda: engine.pool.overflow(),
 )
 
 AsyncSessionLocal = async_sessionmaker(
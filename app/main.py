@@ -1,6 +1,62 @@
-from fastapi import FastAPI
+import math
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.api.routes import auth, conversations, files, users, websocket
 from app.core.config import settings
+from app.core.hashing import HashingPoolFull
+from app.core.logger import setup_logging, shutdown_logging
+from app.core.logger import stats as logging_stats
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import registry
+from app.core.middleware import RequestIdMiddleware, TimingMiddleware
+from app.core.redis import close_redis
+from app.core.security import (
+    configure_password_hashing,
+    hashing_pool,
+    jwt_backend,
+)
+from app.core.token_cache import token_cache
+from app.services.broadcast import bus
+from app.services.connection_manager import manager
+from app.services.file_serving import file_server
+from app.services.file_storage import UploadError, file_store
+from app.services.login_limiter import LoginThrottled, login_limiter
+from app.services.message_writer import MessageQueueFull, message_writer
+from app.services.presence import presence_store
+from app.services.revocation import revocation_index
+from app.services.thumbnails import thumbnailer
+from app.services.user_cache import user_cache
+from app.services.user_search import user_search_index
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop background resources."""
+    setup_logging(settings.LOG_LEVEL, settings.log_json, settings.log_queue_size)
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+    await configure_password_hashing()
+    presence_store.start()
+    message_writer.start()
+    await bus.start()
+    await revocation_index.start()
+    if settings.user_search_index_enabled:
+        await user_search_index.start()
+    yield
+    await thumbnailer.stop()
+    await user_search_index.stop()
+    await revocation_index.stop()
+    await bus.stop()
+    await message_writer.stop()
+    await presence_store.stop()
+    hashing_pool.shutdown()
+    await close_redis()
+    await loop_monitor.stop()
+    shutdown_logging()
+
 
 app = FastAPI(
     title=settings.project_name,
@@ -9,8 +65,25 @@ app = FastAPI(
     docs_url=f"{settings.api_v1_prefix}/docs",
     redoc_url=f"{settings.api_v1_prefix}/redoc",
     openapi_url=f"{settings.api_v1_prefix}/openapi.json",
+    lifespan=lifespan,
 )
 
+registry.register_stats("password_hashing", hashing_pool.stats)
+registry.register_stats("token_cache", token_cache.stats)
+registry.register_stats("user_cache", user_cache.stats)
+registry.register_stats("presence", presence_store.stats)
+registry.register_stats("websocket", manager.stats)
+registry.register_stats("broadcast", bus.stats)
+registry.register_stats("message_writer", message_writer.stats)
+registry.register_stats("logging", logging_stats)
+registry.register_stats("event_loop", loop_monitor.stats)
+registry.register_stats("revocation", revocation_index.stats)
+registry.register_stats("login_limiter", login_limiter.stats)
+registry.register_stats("user_search", user_search_index.stats)
+registry.register_stats("uploads", file_store.stats)
+registry.register_stats("downloads", file_server.stats)
+registry.register_stats("thumbnails", thumbnailer.stats)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origin,
@@ -18,6 +91,39 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TimingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
+app.include_router(auth.router, prefix=settings.api_v1_prefix)
+app.include_router(users.router, prefix=settings.api_v1_prefix)
+app.include_router(conversations.router, prefix=settings.api_v1_prefix)
+app.include_router(files.router, prefix=settings.api_v1_prefix)
+app.include_router(websocket.router, prefix=settings.api_v1_prefix)
+
+
+@app.exception_handler(HashingPoolFull)
+@app.exception_handler(MessageQueueFull)
+async def overloaded_handler(request: Request, exc: Exception):
+    """Shed load quickly instead of queueing more work."""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry."},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(LoginThrottled)
+async def login_throttled_handler(request: Request, exc: LoginThrottled):
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": "Too many login attempts, please retry later."},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
+
+@app.exception_handler(UploadError)
+async def upload_error_handler(request: Request, exc: UploadError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
 
 
 @app.get("/")
@@ -31,4 +137,36 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "environment": settings.environment}
+    return {
+        "status": "healthy",
+        "environment": settings.environment,
+        "password_hashing": hashing_pool.stats(),
+        "token_cache": token_cache.stats(),
+        "user_cache": user_cache.stats(),
+        "presence": presence_store.stats(),
+        "websocket": manager.stats(),
+        "broadcast": bus.stats(),
+        "message_writer": message_writer.stats(),
+        "logging": logging_stats(),
+        "event_loop": loop_monitor.stats(),
+        "revocation": revocation_index.stats(),
+        "login_limiter": login_limiter.stats(),
+        "user_search": user_search_index.stats(),
+        "uploads": file_store.stats(),
+        "downloads": file_server.stats(),
+        "thumbnails": thumbnailer.stats(),
+    }
+
+
+@app.get("/.well-known/jwks.json")
+async def jwks():
+    """Public signing keys, for services verifying our tokens locally."""
+    return jwt_backend.jwks()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, database and component metrics."""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -4,6 +4,8 @@ Database models
 """
 
 from app.models.user import User, UserStatus
+from app.models.conversation import Conversation, ConversationMember
+from app.models.message import Message
 
 
-__all__ = ["User", "UserStatus"]
+__all__ = ["User", "UserStatus", "Conversation", "ConversationMember", "Message"]
@@ -0,0 +1,70 @@
+"""
+Conversation and membership database models
+"""
+
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.database import Base
+
+
+class Conversation(Base):
+    """A direct or group conversation"""
+
+    __tablename__ = "conversations"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    title: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    created_by: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+
+    # Sequence number of the newest message; bumped atomically on every insert
+    last_seq: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return f"<Conversation(id={self.id}, title={self.title})>"
+
+
+class ConversationMember(Base):
+    """Membership of a user in a conversation"""
+
+    __tablename__ = "conversation_members"
+
+    conversation_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("conversations.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+
+    # Highest message seq the member has read
+    last_read_seq: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    joined_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<ConversationMember(conversation_id={self.conversation_id}, "
+            f"user_id={self.user_id})>"
+        )
@@ -0,0 +1,52 @@
+"""
+Message database model
+"""
+
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.database import Base
+
+
+class Message(Base):
+    """A chat message, ordered within its conversation by seq"""
+
+    __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset pagination walks this index in both directions
+        Index(
+            "ix_messages_conversation_id_seq", "conversation_id", "seq", unique=True
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    conversation_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("conversations.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # Per-conversation monotonic sequence number
+    seq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    sender_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+
+    # Timestamps
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<Message(id={self.id}, conversation_id={self.conversation_id}, "
+            f"seq={self.seq})>"
+        )
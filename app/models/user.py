@@ -4,13 +4,16 @@ User database model
 
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, Enum
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, Enum, Index, func
+from sqlalchemy.orm import Mapped, mapped_column, make_transient_to_detached
 from sqlalchemy.dialects.postgresql import UUID
 import enum
 
 from app.db.database import Base
 
+# Columns kept out of User.to_snapshot(), and so out of every cache
+SNAPSHOT_EXCLUDED = frozenset({"password_hash"})
+
 
 class UserStatus(str, enum.Enum):
     """User online status enum"""
@@ -66,5 +69,49 @@ class User(Base):
         nullable=False,
     )
 
+    def to_snapshot(self) -> dict:
+        """
+        Plain dict of column values, safe to keep outside a session.
+
+        The password hash is left out, so snapshots can be cached anywhere;
+        a User rebuilt from one has it unloaded.
+        """
+        return {
+            column.key: getattr(self, column.key)
+            for column in self.__table__.columns
+            if column.key not in SNAPSHOT_EXCLUDED
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: dict) -> "User":
+        """
+        Rebuild a detached User from to_snapshot() output without a query.
+        Attach it with `await db.merge(user, load=False)`.
+        """
+        user = cls(**data)
+        make_transient_to_detached(user)
+        return user
+
     def __repr__(self) -> str:
         return f"<User(id={self.id}, username={self.username})>"
+
+
+# Search indexes (pg_trgm): prefix LIKE on lower(username), and substring
+# and similarity matches on lower(username) and lower(display_name)
+Index(
+    "ix_users_username_lower_pattern",
+    func.lower(User.username).label("username_lower"),
+    postgresql_ops={"username_lower": "text_pattern_ops"},
+)
+Index(
+    "ix_users_username_trgm",
+    func.lower(User.username).label("username_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"username_lower": "gin_trgm_ops"},
+)
+Index(
+    "ix_users_display_name_trgm",
+    func.lower(User.display_name).label("display_name_lower"),
+    postgresql_using="gin",
+    postgresql_ops={"display_name_lower": "gin_trgm_ops"},
+)
@@ -8,10 +8,20 @@ from app.schemas.user import (
     UserLogin,
     UserResponse,
     UserPublicResponse,
+    UserMention,
+    UserListResponse,
     Token,
     TokenData,
     RefreshTokenRequest,
 )
+from app.schemas.message import (
+    ConversationCreate,
+    ConversationResponse,
+    MessageCreate,
+    MessageResponse,
+    MessageHistoryResponse,
+)
+from app.schemas.file import FileUploadResponse
 
 __all__ = [
     "UserCreate",
@@ -19,7 +29,15 @@ __all__ = [
     "UserLogin",
     "UserResponse",
     "UserPublicResponse",
+    "UserMention",
+    "UserListResponse",
     "Token",
     "TokenData",
     "RefreshTokenRequest",
+    "ConversationCreate",
+    "ConversationResponse",
+    "MessageCreate",
+    "MessageResponse",
+    "MessageHistoryResponse",
+    "FileUploadResponse",
 ]
@@ -0,0 +1,29 @@
+"""
+Pydantic schemas for file uploads
+"""
+
+from pydantic import BaseModel, ConfigDict
+
+
+class FileUploadResponse(BaseModel):
+    """Schema for a stored upload; identical content always gets the same key"""
+
+    key: str
+    url: str
+    size: int
+    content_type: str
+    deduplicated: bool
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "key": "9f86d081884c7d659a2feaa0c55ad015"
+                "a3bf4f1b2b0b822cd15d6c15b0f00a08.png",
+                "url": "/api/v1/files/9f86d081884c7d659a2feaa0c55ad015"
+                "a3bf4f1b2b0b822cd15d6c15b0f00a08.png",
+                "size": 48213,
+                "content_type": "image/png",
+                "deduplicated": False,
+            }
+        },
+    )
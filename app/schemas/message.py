@@ -0,0 +1,83 @@
+"""
+Pydantic schemas for conversation and message api requests and responses
+"""
+
+import uuid
+from pydantic import BaseModel, Field, ConfigDict
+from typing import List, Optional
+from datetime import datetime
+
+from app.schemas.user import UserPublicResponse
+
+
+class ConversationCreate(BaseModel):
+    """Schema for starting a conversation"""
+
+    title: Optional[str] = Field(None, max_length=100)
+    member_ids: List[uuid.UUID] = Field(default_factory=list, max_length=1000)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "title": "Weekend plans",
+                "member_ids": ["550e8400-e29b-41d4-a716-446655440000"],
+            }
+        }
+    )
+
+
+class ConversationResponse(BaseModel):
+    """Schema for conversation data in API responses"""
+
+    id: uuid.UUID
+    title: Optional[str] = None
+    created_by: uuid.UUID
+    last_seq: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MessageCreate(BaseModel):
+    """Schema for sending a message"""
+
+    content: str = Field(..., min_length=1, max_length=4000)
+
+    model_config = ConfigDict(json_schema_extra={"example": {"content": "Hello!"}})
+
+
+class MessageResponse(BaseModel):
+    """Schema for message data in API responses"""
+
+    id: uuid.UUID
+    conversation_id: uuid.UUID
+    seq: int
+    sender_id: Optional[uuid.UUID] = None
+    content: str
+    created_at: datetime
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "example": {
+                "id": "7d3f2b1e-9c4a-4e8b-a1d2-3c4b5a6d7e8f",
+                "conversation_id": "1b2c3d4e-5f60-4718-8a9b-0c1d2e3f4a5b",
+                "seq": 42,
+                "sender_id": "550e8400-e29b-41d4-a716-446655440000",
+                "content": "Hello!",
+                "created_at": "2025-10-20T12:00:00Z",
+            }
+        },
+    )
+
+
+class MessageHistoryResponse(BaseModel):
+    """
+    A page of messages in ascending seq order.
+    Use the first seq as before_seq to scroll back, the last as after_seq
+    to catch up.
+    """
+
+    messages: List[MessageResponse]
+    has_more: bool
+    authors: List[UserPublicResponse] = Field(default_factory=list)
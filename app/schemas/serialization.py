@@ -0,0 +1,92 @@
+"""
+Fast response serialization for schemas built from ORM rows.
+
+The default FastAPI path validates the returned object against the response
+model (re-running EmailStr and friends on data that came from our own
+database), turns it into plain Python with jsonable_encoder and then encodes
+it with the stdlib json module. Here the schema's fields are read off the
+row into a plain dict and encoded straight to JSON bytes by pydantic-core,
+using TypeAdapters precompiled for a TypedDict mirror of the schema. Nothing
+is validated and no model instance is built.
+"""
+
+from operator import attrgetter
+from typing import Any, Generic, Iterable, TypeVar
+
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+from app.schemas.user import (
+    UserListResponse,
+    UserMention,
+    UserPublicResponse,
+    UserResponse,
+)
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class ModelSerializer(Generic[M]):
+    """
+    Precompiled single-object and list serializers for one schema.
+
+    Args:
+        model: Response schema whose fields are read from ORM attributes
+    """
+
+    def __init__(self, model: type[M]):
+        self.model = model
+        self.fields = tuple(model.model_fields)
+        self._get = attrgetter(*self.fields)
+        self.row_type = TypedDict(
+            f"{model.__name__}Row",
+            {name: field.annotation for name, field in model.model_fields.items()},
+        )
+        self.one = TypeAdapter(self.row_type)
+        self.many = TypeAdapter(list[self.row_type])
+
+    def to_row(self, obj: Any) -> dict:
+        """Read the schema's fields off a trusted object without validating."""
+        return dict(zip(self.fields, self._get(obj)))
+
+    def values(self, obj: Any) -> tuple:
+        """The schema's field values of a trusted object, in field order."""
+        return self._get(obj)
+
+    def dump(self, obj: Any) -> bytes:
+        return self.one.dump_json(self.to_row(obj))
+
+    def dump_many(self, objs: Iterable[Any]) -> bytes:
+        return self.many.dump_json([self.to_row(obj) for obj in objs])
+
+
+class RawJSONResponse(Response):
+    """JSON response whose body is already-encoded bytes."""
+
+    media_type = "application/json"
+
+    def render(self, content: bytes) -> bytes:
+        return content
+
+
+user_serializer = ModelSerializer(UserResponse)
+public_user_serializer = ModelSerializer(UserPublicResponse)
+mention_serializer = ModelSerializer(UserMention)
+
+_user_page = TypeAdapter(
+    TypedDict(
+        f"{UserListResponse.__name__}Row",
+        {"users": list[public_user_serializer.row_type], "has_more": bool},
+    )
+)
+
+
+def dump_user_page(users: Iterable[Any], has_more: bool) -> bytes:
+    """A UserListResponse for a page of trusted user rows."""
+    return _user_page.dump_json(
+        {
+            "users": [public_user_serializer.to_row(user) for user in users],
+            "has_more": has_more,
+        }
+    )
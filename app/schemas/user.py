@@ -4,7 +4,7 @@ Pydantic schemas for user api requests and responses
 
 import uuid
 from pydantic import BaseModel, Field, EmailStr, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 from app.models import UserStatus
@@ -111,6 +111,7 @@ class UserPublicResponse(BaseModel):
     last_seen: Optional[datetime] = None
 
     model_config = ConfigDict(
+        from_attributes=True,
         json_schema_extra={
             "example": {
                 "id": "550e8400-e29b-41d4-a716-446655440000",
@@ -120,10 +121,39 @@ class UserPublicResponse(BaseModel):
                 "status": "online",
                 "last_seen": "2025-10-20T12:00:00Z",
             }
-        }
+        },
     )
 
 
+class UserMention(BaseModel):
+    """Schema for autocomplete suggestions (just enough to render a mention)"""
+
+    id: uuid.UUID
+    username: str
+    display_name: str
+
+    model_config = ConfigDict(
+        from_attributes=True,
+        json_schema_extra={
+            "example": {
+                "id": "550e8400-e29b-41d4-a716-446655440000",
+                "username": "adityag",
+                "display_name": "Aditya Gurram",
+            }
+        },
+    )
+
+
+class UserListResponse(BaseModel):
+    """
+    A page of users in ascending id order.
+    Pass the last id as after_id to get the next page.
+    """
+
+    users: List[UserPublicResponse]
+    has_more: bool
+
+
 #  Authentication Schemas
 
 
@@ -0,0 +1,233 @@
+"""
+Cross-worker broadcast bus.
+
+Events published on a channel reach every process that currently has local
+subscribers for it. The Redis backend batches publishes through a single
+pipeline task (so per-channel order is preserved) and only holds a Redis
+subscription for a channel while this process has subscribers. The memory
+backend delivers within the process and is meant for single-worker and test
+runs.
+
+Messages travel as "<publish unix time>|<payload>" so the receiving side
+can measure publish-to-deliver latency.
+"""
+
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Called with (channel, payload) for every delivered message
+MessageHandler = Callable[[str, str], None]
+
+
+def _wrap(data: str) -> str:
+    return f"{time.time():.6f}|{data}"
+
+
+def _unwrap(envelope: str) -> tuple[float, str]:
+    published_at, _, data = envelope.partition("|")
+    return float(published_at), data
+
+
+class BroadcastBus(ABC):
+    """Base class for broadcast backends."""
+
+    def __init__(self):
+        self.handler: Optional[MessageHandler] = None
+        self.channel_handlers: dict[str, MessageHandler] = {}
+        self.channels: set[str] = set()
+
+        # Stats
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.latency_seconds_total = 0.0
+        self.latency_seconds_max = 0.0
+
+    def set_handler(self, handler: MessageHandler) -> None:
+        self.handler = handler
+
+    def set_channel_handler(self, channel: str, handler: MessageHandler) -> None:
+        """Route one channel to its own handler instead of the default one."""
+        self.channel_handlers[channel] = handler
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, data: str) -> None:
+        """Send data to every worker subscribed to channel."""
+
+    async def subscribe(self, channel: str) -> None:
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        self.channels.discard(channel)
+
+    def _deliver(self, channel: str, envelope: str) -> None:
+        published_at, data = _unwrap(envelope)
+        latency = max(time.time() - published_at, 0.0)
+        self.delivered += 1
+        self.latency_seconds_total += latency
+        self.latency_seconds_max = max(self.latency_seconds_max, latency)
+
+        handler = self.channel_handlers.get(channel, self.handler)
+        if handler is None or channel not in self.channels:
+            return
+        try:
+            handler(channel, data)
+        except Exception:
+            logger.exception("broadcast handler failed for channel %s", channel)
+
+    def stats(self) -> dict:
+        """Return a snapshot of the bus counters."""
+        return {
+            "backend": type(self).__name__,
+            "channels": len(self.channels),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "latency_seconds_total": self.latency_seconds_total,
+            "latency_seconds_max": self.latency_seconds_max,
+        }
+
+
+class MemoryBroadcastBus(BroadcastBus):
+    """In-process backend; delivery happens on the next loop iteration."""
+
+    async def publish(self, channel: str, data: str) -> None:
+        self.published += 1
+        asyncio.get_running_loop().call_soon(self._deliver, channel, _wrap(data))
+
+
+class RedisBroadcastBus(BroadcastBus):
+    """
+    Redis pub/sub backend.
+
+    Args:
+        redis: Async Redis client
+        prefix: Prefix added to channel names in Redis
+        batch_size: Maximum publishes sent in one pipeline
+        max_pending: Publishes buffered before new ones are dropped
+    """
+
+    def __init__(
+        self,
+        redis: Any,
+        prefix: str = "broadcast:",
+        batch_size: int = 100,
+        max_pending: int = 10000,
+    ):
+        super().__init__()
+        self.redis = redis
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._outbox: deque[tuple[str, str]] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pubsub = None
+        self._publisher: Optional[asyncio.Task] = None
+        self._reader: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._pubsub = self.redis.pubsub()
+        self._publisher = asyncio.create_task(self._publish_loop())
+
+    async def stop(self) -> None:
+        for task in (self._publisher, self._reader):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._publisher = self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    async def publish(self, channel: str, data: str) -> None:
+        if len(self._outbox) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._outbox.append((self.prefix + channel, _wrap(data)))
+        self._wakeup.set()
+
+    async def _publish_loop(self) -> None:
+        # Everything queued while the previous pipeline was in flight goes
+        # out in the next one, in order.
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._outbox:
+                count = min(self.batch_size, len(self._outbox))
+                batch = [self._outbox.popleft() for _ in range(count)]
+                try:
+                    async with self.redis.pipeline(transaction=False) as pipe:
+                        for channel, envelope in batch:
+                            pipe.publish(channel, envelope)
+                        await pipe.execute()
+                    self.published += len(batch)
+                except RedisError:
+                    self.dropped += len(batch)
+                    logger.warning("broadcast publish failed", exc_info=True)
+
+    async def subscribe(self, channel: str) -> None:
+        if channel in self.channels:
+            return
+        await super().subscribe(channel)
+        await self._pubsub.subscribe(self.prefix + channel)
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read_loop())
+
+    async def unsubscribe(self, channel: str) -> None:
+        if channel not in self.channels:
+            return
+        await super().unsubscribe(channel)
+        await self._pubsub.unsubscribe(self.prefix + channel)
+
+    async def _read_loop(self) -> None:
+        while True:
+            try:
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+            except RedisError:
+                logger.warning("broadcast subscription read failed", exc_info=True)
+                await asyncio.sleep(1.0)
+                continue
+
+            if message is None or message["type"] != "message":
+                continue
+            channel = message["channel"].decode()[len(self.prefix) :]
+            self._deliver(channel, message["data"].decode())
+
+
+def create_bus() -> BroadcastBus:
+    """Build the bus configured by settings.broadcast_backend."""
+    if settings.broadcast_backend == "redis":
+        return RedisBroadcastBus(
+            get_redis(),
+            batch_size=settings.broadcast_batch_size,
+            max_pending=settings.broadcast_max_pending,
+        )
+    if settings.broadcast_backend == "memory":
+        return MemoryBroadcastBus()
+    raise ValueError(f"Unknown broadcast backend: {settings.broadcast_backend!r}")
+
+
+bus = create_bus()
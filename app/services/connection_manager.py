@@ -0,0 +1,223 @@
+"""
+WebSocket connection manager with per-room fan-out.
+
+A broadcast serializes its payload once and hands the same string to every
+subscriber's bounded send queue; each connection has its own writer task,
+so sends to all subscribers proceed concurrently and a stalled socket only
+ever fills its own queue.
+
+Rooms map onto broadcast bus channels: publish() goes through the bus so
+other workers see the message, and this process subscribes to a room's
+channel only while it holds at least one connection in that room.
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+from fastapi import WebSocket, status
+
+from app.core.config import settings
+from app.services.broadcast import BroadcastBus, bus
+
+logger = logging.getLogger(__name__)
+
+
+def encode_message(message: Any) -> str:
+    """Serialize a message once for fan-out."""
+    if isinstance(message, str):
+        return message
+    return json.dumps(message, separators=(",", ":"), default=str)
+
+
+class Connection:
+    """
+    A single accepted WebSocket and its outgoing queue.
+
+    Args:
+        websocket: Accepted WebSocket
+        user_id: Authenticated user id
+        max_queue: Maximum number of messages waiting to be sent
+    """
+
+    def __init__(self, websocket: WebSocket, user_id: str, max_queue: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.rooms: set[str] = set()
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+        self._writer: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._write_loop())
+
+    def send_nowait(self, data: str) -> bool:
+        """
+        Queue an encoded message without waiting.
+
+        Returns:
+            False if the connection is closed or its queue is full
+        """
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _write_loop(self) -> None:
+        try:
+            while True:
+                data = await self.queue.get()
+                await self.websocket.send_text(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The peer went away; the receive loop will clean up
+            self.closed = True
+
+    async def close(self, code: int = status.WS_1000_NORMAL_CLOSURE) -> None:
+        """Stop the writer and close the socket if it is still open."""
+        self.closed = True
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
+class ConnectionManager:
+    """
+    Registry of live connections indexed by user and by room.
+
+    Args:
+        max_queue: Per-connection send queue size; a connection whose queue
+            overflows is treated as a slow consumer and disconnected
+        bus: Broadcast bus used by publish(); None keeps delivery local
+    """
+
+    def __init__(self, max_queue: int = 256, bus: Optional[BroadcastBus] = None):
+        self.max_queue = max_queue
+        self.bus = bus
+        if bus is not None:
+            bus.set_handler(self.broadcast)
+        self.by_user: dict[str, set[Connection]] = {}
+        self.rooms: dict[str, set[Connection]] = {}
+        # Disconnects of slow consumers, held so they are not collected mid-run
+        self._disconnect_tasks: set[asyncio.Task] = set()
+
+        # Stats
+        self.messages_broadcast = 0
+        self.deliveries = 0
+        self.slow_consumers = 0
+
+    def connect(self, websocket: WebSocket, user_id: str) -> Connection:
+        """Register an accepted WebSocket and start its writer."""
+        connection = Connection(websocket, user_id, self.max_queue)
+        connection.start()
+        self.by_user.setdefault(user_id, set()).add(connection)
+        return connection
+
+    async def disconnect(
+        self, connection: Connection, code: int = status.WS_1000_NORMAL_CLOSURE
+    ) -> None:
+        """Unregister a connection from its user and all its rooms."""
+        for room in list(connection.rooms):
+            await self.leave(connection, room)
+
+        connections = self.by_user.get(connection.user_id)
+        if connections is not None:
+            connections.discard(connection)
+            if not connections:
+                del self.by_user[connection.user_id]
+
+        await connection.close(code)
+
+    async def join(self, connection: Connection, room: str) -> None:
+        members = self.rooms.setdefault(room, set())
+        members.add(connection)
+        connection.rooms.add(room)
+        if self.bus is not None and len(members) == 1:
+            await self.bus.subscribe(room)
+
+    async def leave(self, connection: Connection, room: str) -> None:
+        connection.rooms.discard(room)
+        members = self.rooms.get(room)
+        if members is None:
+            return
+        members.discard(connection)
+        if not members:
+            del self.rooms[room]
+            if self.bus is not None:
+                await self.bus.unsubscribe(room)
+
+    async def publish(self, room: str, message: Any) -> None:
+        """
+        Send a message to a room across all workers.
+        Without a bus this is the same as a local broadcast.
+        """
+        data = encode_message(message)
+        if self.bus is None:
+            self.broadcast(room, data)
+        else:
+            await self.bus.publish(room, data)
+
+    def broadcast(self, room: str, message: Any) -> int:
+        """
+        Fan a message out to every local subscriber of a room.
+        This is also the bus handler for messages from other workers.
+
+        Returns:
+            Number of connections the message was queued for
+        """
+        members = self.rooms.get(room)
+        if not members:
+            return 0
+
+        self.messages_broadcast += 1
+        return self._deliver(list(members), encode_message(message))
+
+    def send_to_user(self, user_id: str, message: Any) -> int:
+        """Send a message to every connection of a user."""
+        connections = self.by_user.get(user_id)
+        if not connections:
+            return 0
+        return self._deliver(list(connections), encode_message(message))
+
+    def _deliver(self, connections: list[Connection], data: str) -> int:
+        delivered = 0
+        for connection in connections:
+            if connection.send_nowait(data):
+                delivered += 1
+            elif not connection.closed:
+                self._drop_slow_consumer(connection)
+        self.deliveries += delivered
+        return delivered
+
+    def _drop_slow_consumer(self, connection: Connection) -> None:
+        self.slow_consumers += 1
+        logger.warning("disconnecting slow consumer user_id=%s", connection.user_id)
+        connection.closed = True
+        task = asyncio.create_task(
+            self.disconnect(connection, code=status.WS_1013_TRY_AGAIN_LATER)
+        )
+        self._disconnect_tasks.add(task)
+        task.add_done_callback(self._disconnect_tasks.discard)
+
+    def stats(self) -> dict:
+        """Return a snapshot of the manager counters."""
+        return {
+            "connections": sum(len(c) for c in self.by_user.values()),
+            "users": len(self.by_user),
+            "rooms": len(self.rooms),
+            "messages_broadcast": self.messages_broadcast,
+            "deliveries": self.deliveries,
+            "slow_consumers": self.slow_consumers,
+        }
+
+
+manager = ConnectionManager(max_queue=settings.websocket_send_queue_size, bus=bus)
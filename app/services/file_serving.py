@@ -0,0 +1,314 @@
+"""
+Serving stored files: Range, ETag and zero-copy sends.
+
+Stored files never change (their name is their SHA-256), so the hash is a
+strong ETag, If-None-Match is answered with 304 without touching the file,
+and responses may be cached by clients for a year. Size and existence are
+kept in a small stat cache, so hot files cost one open() per request.
+
+The body goes out, in order of preference:
+
+- via X-Accel-Redirect, when nginx fronts the app and is configured with
+  the internal location (nginx then uses sendfile itself)
+- as one ASGI "http.response.zerocopysend" message, when the server
+  supports that extension and can sendfile() the descriptor to the socket
+- in chunks read with os.pread in a worker thread, so no more than one
+  chunk per response is ever held in memory
+"""
+
+import asyncio
+import os
+from typing import BinaryIO, NamedTuple, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.services.file_storage import CONTENT_TYPES, FileStore, file_store
+
+ZEROCOPY = "http.response.zerocopysend"
+
+
+class FileInfo(NamedTuple):
+    path: str
+    size: int
+    content_type: str
+    etag: str
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised for a Range header that selects no bytes of the file."""
+
+
+def parse_range(header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    The (start, end inclusive) of a single byte range, or None to send the
+    whole file (no usable range, or several ranges).
+
+    Raises:
+        RangeNotSatisfiable: If the range starts past the end of the file
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash:
+        return None
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(0, size - length), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    if start < 0 or end < start:
+        return None
+    return start, end
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for it)."""
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+class StoredFileResponse(Response):
+    """
+    Sends a byte range of an open file without reading it into memory.
+
+    The file is closed once the response has been sent.
+
+    Args:
+        file: Open binary file
+        offset: First byte
+        count: Number of bytes
+        status_code: 200 or 206
+        headers: Response headers, including Content-Length
+        send_body: False for HEAD
+        server: FileServer whose send counters to update
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        offset: int,
+        count: int,
+        status_code: int,
+        headers: dict[str, str],
+        send_body: bool = True,
+        server: Optional["FileServer"] = None,
+    ):
+        self.file = file
+        self.offset = offset
+        self.count = count
+        self.send_body = send_body
+        self.server = server
+        self.status_code = status_code
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if not self.send_body:
+                await send({"type": "http.response.body", "body": b""})
+            elif ZEROCOPY in scope.get("extensions", {}):
+                if self.server is not None:
+                    self.server.zerocopy_sends += 1
+                await send(
+                    {
+                        "type": ZEROCOPY,
+                        "file": self.file,
+                        "offset": self.offset,
+                        "count": self.count,
+                        "more_body": False,
+                    }
+                )
+            else:
+                if self.server is not None:
+                    self.server.chunked_sends += 1
+                await self._send_chunks(send)
+        finally:
+            self.file.close()
+
+    async def _send_chunks(self, send: Send) -> None:
+        fd = self.file.fileno()
+        position, remaining = self.offset, self.count
+        while remaining > 0:
+            chunk = await asyncio.to_thread(
+                os.pread, fd, min(self.chunk_size, remaining), position
+            )
+            if not chunk:
+                break
+            position += len(chunk)
+            remaining -= len(chunk)
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                }
+            )
+        if remaining > 0:
+            # File shrank underneath us; end the body rather than hang
+            await send({"type": "http.response.body", "body": b""})
+
+
+class FileServer:
+    """
+    Builds download responses for a FileStore.
+
+    Args:
+        store: Where the files live
+        stat_cache_entries: Files whose size is remembered
+        max_age: Seconds clients may cache a file
+        accel_redirect_prefix: nginx internal location for upload_dir, or
+            "" to send bodies from the app
+    """
+
+    def __init__(
+        self,
+        store: FileStore,
+        stat_cache_entries: int = 4096,
+        max_age: int = 31536000,
+        accel_redirect_prefix: str = "",
+    ):
+        self.store = store
+        # Entries expire so that deleted files are eventually noticed
+        self.stat_cache: LRUCache[FileInfo] = LRUCache(stat_cache_entries, 300)
+        self.cache_control = f"public, max-age={max_age}, immutable"
+        # For files only their uploader's peers may fetch: no shared caches
+        self.private_cache_control = f"private, max-age={max_age}, immutable"
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/")
+
+        # Stats
+        self.requests = 0
+        self.not_modified = 0
+        self.partial = 0
+        self.zerocopy_sends = 0
+        self.chunked_sends = 0
+
+    async def lookup(self, key: str) -> Optional[FileInfo]:
+        """FileInfo for a stored key, or None if there is no such file."""
+        info = self.stat_cache.get(key)
+        if info is not None:
+            return info
+        try:
+            path = self.store.path_for(key)
+            size = (await asyncio.to_thread(os.stat, path)).st_size
+        except (ValueError, FileNotFoundError):
+            return None
+        extension = key.rpartition(".")[2]
+        content_type = CONTENT_TYPES.get(extension, "application/octet-stream")
+        info = FileInfo(path, size, content_type, f'"{key.partition(".")[0]}"')
+        self.stat_cache.set(key, info)
+        return info
+
+    def forget(self, key: str) -> None:
+        self.stat_cache.pop(key)
+
+    async def response(
+        self, request: Request, key: str, cache_control: Optional[str] = None
+    ) -> Optional[Response]:
+        """
+        The response for GET or HEAD of a stored key, or None if missing.
+
+        Args:
+            request: The download request
+            key: Stored file to send
+            cache_control: Overrides the default (cache for max_age, immutable)
+        """
+        info = await self.lookup(key)
+        if info is None:
+            return None
+        self.requests += 1
+        headers = {
+            "ETag": info.etag,
+            "Cache-Control": cache_control or self.cache_control,
+            "Accept-Ranges": "bytes",
+            # Content-Type comes from the extension; browsers must not
+            # second-guess it (an upload sniffed as HTML would run script)
+            "X-Content-Type-Options": "nosniff",
+        }
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, info.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        if self.accel_redirect_prefix:
+            # nginx sends the file, and handles Range itself
+            headers["Content-Type"] = info.content_type
+            location = f"{self.accel_redirect_prefix}/{key[:2]}/{key}"
+            headers["X-Accel-Redirect"] = location
+            return Response(status_code=200, headers=headers)
+
+        start, end = 0, info.size - 1
+        status_code = 200
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        if range_header is not None and (if_range is None or if_range == info.etag):
+            try:
+                selected = parse_range(range_header, info.size)
+            except RangeNotSatisfiable:
+                return Response(
+                    status_code=416,
+                    headers={**headers, "Content-Range": f"bytes */{info.size}"},
+                )
+            if selected is not None:
+                start, end = selected
+                status_code = 206
+                self.partial += 1
+                headers["Content-Range"] = f"bytes {start}-{end}/{info.size}"
+
+        try:
+            file = await asyncio.to_thread(open, info.path, "rb")
+        except FileNotFoundError:
+            self.forget(key)
+            return None
+        headers["Content-Type"] = info.content_type
+        headers["Content-Length"] = str(end - start + 1)
+        return StoredFileResponse(
+            file,
+            start,
+            end - start + 1,
+            status_code,
+            headers,
+            send_body=request.method != "HEAD",
+            server=self,
+        )
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "partial": self.partial,
+            "zerocopy_sends": self.zerocopy_sends,
+            "chunked_sends": self.chunked_sends,
+            "stat_cache": self.stat_cache.stats(),
+        }
+
+
+file_server = FileServer(
+    file_store,
+    stat_cache_entries=settings.file_stat_cache_entries,
+    max_age=settings.file_cache_max_age_seconds,
+    accel_redirect_prefix=settings.file_accel_redirect_prefix,
+)
@@ -0,0 +1,295 @@
+"""
+Streaming, content-addressed file storage.
+
+An upload is consumed chunk by chunk: each chunk is counted against the
+size limit, fed to a SHA-256 and appended to a temporary file, so neither
+the whole body nor a second pass over it is ever needed. The declared
+extension is checked against the magic bytes at the start of the stream
+(text files are UTF-8 decoded incrementally instead). The finished file is
+renamed to <root>/<first two hex digits>/<sha256>.<extension>; if that
+file already exists the upload was a duplicate and the temporary copy is
+dropped.
+
+Blocking file operations run in worker threads, with writes coalesced into
+larger buffers to keep the number of thread hops low.
+"""
+
+import asyncio
+import codecs
+import hashlib
+import os
+import re
+import tempfile
+from typing import AsyncIterable, NamedTuple, Optional
+
+from app.core.config import settings
+
+# Longest prefix any signature check needs
+MAGIC_BYTES = 12
+
+# extension -> alternatives, each a list of (offset, bytes) that must match
+SIGNATURES: dict[str, list[list[tuple[int, bytes]]]] = {
+    "jpg": [[(0, b"\xff\xd8\xff")]],
+    "png": [[(0, b"\x89PNG\r\n\x1a\n")]],
+    "gif": [[(0, b"GIF87a")], [(0, b"GIF89a")]],
+    "webp": [[(0, b"RIFF"), (8, b"WEBP")]],
+    "pdf": [[(0, b"%PDF-")]],
+    "zip": [[(0, b"PK\x03\x04")], [(0, b"PK\x05\x06")]],
+    "docx": [[(0, b"PK\x03\x04")]],
+    "doc": [[(0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")]],
+}
+
+CONTENT_TYPES = {
+    "jpg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+    "pdf": "application/pdf",
+    "zip": "application/zip",
+    "docx": "application/vnd.openxmlformats-officedocument"
+    ".wordprocessingml.document",
+    "doc": "application/msword",
+    "txt": "text/plain; charset=utf-8",
+}
+
+# Spellings stored under one canonical extension, so they deduplicate
+ALIASES = {"jpeg": "jpg"}
+
+# <sha256>.<ext> for uploads, <sha256>-<size>.<ext> for their thumbnails
+KEY_PATTERN = re.compile(r"^[0-9a-f]{64}(?:-[0-9]+)?\.[a-z0-9]+$")
+
+
+class UploadError(Exception):
+    """Raised when an upload is rejected."""
+
+    status_code = 400
+
+
+class UploadTooLarge(UploadError):
+    status_code = 413
+
+
+class UnsupportedFileType(UploadError):
+    status_code = 415
+
+
+class StoredFile(NamedTuple):
+    key: str
+    size: int
+    content_type: str
+    deduplicated: bool
+
+    @property
+    def sha256(self) -> str:
+        return self.key.partition(".")[0]
+
+
+def _matches(extension: str, head: bytes) -> bool:
+    return any(
+        all(head[offset : offset + len(magic)] == magic for offset, magic in option)
+        for option in SIGNATURES[extension]
+    )
+
+
+class FileStore:
+    """
+    Content-addressed files under one directory.
+
+    Args:
+        root: Directory holding the files (created if missing)
+        max_size: Largest accepted upload in bytes
+        image_extensions: Extensions accepted as images
+        file_extensions: Other accepted extensions
+        write_buffer: Bytes collected before each write to disk
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_size: int,
+        image_extensions: list[str],
+        file_extensions: list[str],
+        write_buffer: int = 256 * 1024,
+    ):
+        self.root = os.path.abspath(root)
+        self.max_size = max_size
+        self.image_extensions = {ALIASES.get(e, e) for e in image_extensions}
+        self.file_extensions = {ALIASES.get(e, e) for e in file_extensions}
+        self.write_buffer = write_buffer
+
+        # Stats
+        self.stored = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.bytes_received = 0
+
+    def path_for(self, key: str) -> str:
+        """
+        Filesystem path of a stored key.
+
+        Raises:
+            ValueError: If key is not a well-formed content key
+        """
+        if not KEY_PATTERN.match(key):
+            raise ValueError(f"Invalid file key: {key!r}")
+        return os.path.join(self.root, key[:2], key)
+
+    def is_image(self, key: str) -> bool:
+        return key.rpartition(".")[2] in self.image_extensions
+
+    def extension_for(self, filename: str, images_only: bool = False) -> str:
+        """
+        Canonical extension of an accepted filename.
+
+        Raises:
+            UnsupportedFileType: If the extension is not allowed
+        """
+        extension = filename.rpartition(".")[2].lower() if "." in filename else ""
+        extension = ALIASES.get(extension, extension)
+        allowed = self.image_extensions
+        if not images_only:
+            allowed = allowed | self.file_extensions
+        if extension not in allowed or extension not in CONTENT_TYPES:
+            raise UnsupportedFileType(f"File type not allowed: {filename!r}")
+        return extension
+
+    async def save(
+        self,
+        chunks: AsyncIterable[bytes],
+        filename: str,
+        images_only: bool = False,
+        declared_size: Optional[int] = None,
+    ) -> StoredFile:
+        """
+        Store a streamed upload under its content hash.
+
+        Args:
+            chunks: The body, in chunks of any size
+            filename: Client-side name; only its extension is used
+            images_only: Accept image extensions only
+            declared_size: Content-Length, checked before reading anything
+
+        Raises:
+            UploadTooLarge: If the body is (or is declared) over max_size;
+                reading stops at the first chunk past the limit
+            UnsupportedFileType: If the extension is not allowed or the
+                content does not match it
+        """
+        try:
+            extension = self.extension_for(filename, images_only)
+            if declared_size is not None and declared_size > self.max_size:
+                raise UploadTooLarge("File too large")
+            stored = await self._save(chunks, extension)
+        except UploadError:
+            self.rejected += 1
+            raise
+        if stored.deduplicated:
+            self.deduplicated += 1
+        else:
+            self.stored += 1
+        self.bytes_received += stored.size
+        return stored
+
+    async def _save(self, chunks: AsyncIterable[bytes], extension: str) -> StoredFile:
+        hasher = hashlib.sha256()
+        size = 0
+        head = bytearray()
+        checked = extension not in SIGNATURES
+        text = codecs.getincrementaldecoder("utf-8")() if extension == "txt" else None
+        pending = bytearray()
+
+        temp = await asyncio.to_thread(self._open_temp)
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                size += len(chunk)
+                if size > self.max_size:
+                    raise UploadTooLarge("File too large")
+                if not checked:
+                    head += chunk[: MAGIC_BYTES - len(head)]
+                    if len(head) == MAGIC_BYTES:
+                        self._check_signature(extension, head)
+                        checked = True
+                if text is not None:
+                    self._check_text(text, chunk)
+                hasher.update(chunk)
+                pending += chunk
+                if len(pending) >= self.write_buffer:
+                    buffer, pending = pending, bytearray()
+                    await asyncio.to_thread(temp.write, buffer)
+
+            if size == 0:
+                raise UnsupportedFileType("Empty file")
+            if not checked:
+                self._check_signature(extension, head)
+            if text is not None:
+                self._check_text(text, b"", final=True)
+
+            key = f"{hasher.hexdigest()}.{extension}"
+            deduplicated = await asyncio.to_thread(
+                self._commit, temp, pending, self.path_for(key)
+            )
+        except BaseException:
+            await asyncio.to_thread(self._discard, temp)
+            raise
+        return StoredFile(key, size, CONTENT_TYPES[extension], deduplicated)
+
+    @staticmethod
+    def _check_signature(extension: str, head: bytes) -> None:
+        if not _matches(extension, head):
+            raise UnsupportedFileType(f"Content is not a valid .{extension} file")
+
+    @staticmethod
+    def _check_text(
+        decoder: codecs.IncrementalDecoder, chunk: bytes, final: bool = False
+    ) -> None:
+        try:
+            decoded = decoder.decode(chunk, final)
+        except UnicodeDecodeError:
+            raise UnsupportedFileType("Text files must be UTF-8") from None
+        if "\x00" in decoded:
+            raise UnsupportedFileType("Text files must not contain NUL bytes")
+
+    def _open_temp(self):
+        temp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        return tempfile.NamedTemporaryFile(dir=temp_dir, delete=False)
+
+    @staticmethod
+    def _commit(temp, pending: bytes, path: str) -> bool:
+        """Finish the temporary file and move it into place; True if a duplicate."""
+        if os.path.exists(path):
+            temp.close()
+            os.unlink(temp.name)
+            return True
+        temp.write(pending)
+        temp.close()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Atomic: a concurrent upload of the same content just replaces it
+        os.replace(temp.name, path)
+        return False
+
+    @staticmethod
+    def _discard(temp) -> None:
+        temp.close()
+        try:
+            os.unlink(temp.name)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "bytes_received": self.bytes_received,
+        }
+
+
+file_store = FileStore(
+    settings.upload_dir,
+    max_size=settings.max_upload_size,
+    image_extensions=settings.image_extensions_list,
+    file_extensions=settings.file_extensions_list,
+)
@@ -0,0 +1,223 @@
+"""
+Login admission control.
+
+A failed login costs a full bcrypt verify, so an attacker replaying leaked
+credentials could keep every hashing worker busy with cheap requests. Each
+attempt therefore takes a token from two buckets, one for the client IP
+and one for the username, before any password work is done. An attempt is
+only admitted if both buckets have a token, and a rejected attempt takes
+none, so a throttled IP cannot drain a victim's username bucket further.
+
+With Redis both buckets are checked and charged in one Lua script, shared
+by all workers. If Redis cannot be reached the check falls back to the
+per-process buckets rather than locking everyone out.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logger import RateLimitedLogger
+from app.core.metrics import registry
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+redis_failures = RateLimitedLogger(logger, per_second=1, burst=5)
+
+login_throttled = registry.counter(
+    "login_throttled_total", "Login attempts rejected before hashing", ("scope",)
+)
+
+# Refill and charge every bucket in KEYS, or none of them.
+# ARGV: capacity and refill rate per key. The clock is the Redis server's,
+# so workers whose clocks disagree still refill buckets consistently (a
+# write after TIME needs Redis 5+, which replicates a script's effects).
+# Returns {0} if admitted, else {index of the limiting key, seconds to wait}.
+_TAKE_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local levels = {}
+local limiting, wait = 0, 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    levels[i] = tokens
+    if tokens < 1 and (1 - tokens) / rate > wait then
+        limiting, wait = i, (1 - tokens) / rate
+    end
+end
+if limiting > 0 then return {limiting, tostring(wait)} end
+local stamp = string.format('%.6f', now)
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local tokens = levels[i] - 1
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', stamp)
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000))
+end
+return {0}
+"""
+
+
+class Bucket(NamedTuple):
+    """`capacity` attempts back to back, then `rate` per second."""
+
+    scope: str
+    capacity: float
+    rate: float
+
+
+class LoginThrottled(Exception):
+    """Raised when a login attempt is over its IP or username budget."""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"Too many login attempts ({scope})")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+class LoginLimiter:
+    """
+    Token buckets per client IP and per username.
+
+    Args:
+        redis: Async Redis client, or None for per-process buckets
+        ip: Bucket applied to each client IP
+        username: Bucket applied to each username
+        max_keys: Per-process buckets kept before the least recently used
+            are dropped
+        prefix: Redis key prefix
+        enabled: When False every attempt is admitted
+    """
+
+    def __init__(
+        self,
+        redis: Any = None,
+        ip: Bucket = Bucket("ip", 30, 0.5),
+        username: Bucket = Bucket("username", 10, 5 / 60),
+        max_keys: int = 100000,
+        prefix: str = "auth:login:",
+        enabled: bool = True,
+    ):
+        self.redis = redis
+        self.ip = ip
+        self.username = username
+        self.max_keys = max_keys
+        self.prefix = prefix
+        self.enabled = enabled
+        # key -> [tokens, last refill]
+        self._local: OrderedDict[str, list] = OrderedDict()
+        self._take = redis.register_script(_TAKE_SCRIPT) if redis else None
+
+        # Stats
+        self.admitted = 0
+        self.rejected = {ip.scope: 0, username.scope: 0}
+        self.redis_errors = 0
+
+    async def check(self, username: str, client_ip: Optional[str]) -> None:
+        """
+        Charge one attempt to the IP and username buckets.
+
+        Raises:
+            LoginThrottled: If either bucket is empty; nothing is charged
+        """
+        if not self.enabled:
+            return
+        checks = [(self.username, username)]
+        if client_ip:
+            checks.insert(0, (self.ip, client_ip))
+        keys = [f"{self.prefix}{bucket.scope}:{value}" for bucket, value in checks]
+        buckets = [bucket for bucket, _ in checks]
+
+        limiting, wait = None, 0.0
+        if self._take is not None:
+            try:
+                limiting, wait = await self._take_redis(keys, buckets)
+            except RedisError:
+                self.redis_errors += 1
+                redis_failures.warning(
+                    "login limiter falling back to local buckets",
+                    key="redis",
+                    exc_info=True,
+                )
+                limiting, wait = self._take_local(keys, buckets)
+        else:
+            limiting, wait = self._take_local(keys, buckets)
+
+        if limiting is None:
+            self.admitted += 1
+            return
+        self.rejected[limiting.scope] += 1
+        login_throttled.inc(1, limiting.scope)
+        raise LoginThrottled(limiting.scope, wait)
+
+    async def _take_redis(
+        self, keys: list[str], buckets: list[Bucket]
+    ) -> tuple[Optional[Bucket], float]:
+        args: list = []
+        for bucket in buckets:
+            args.extend((bucket.capacity, bucket.rate))
+        result = await self._take(keys=keys, args=args)
+        index = int(result[0])
+        if index == 0:
+            return None, 0.0
+        return buckets[index - 1], float(result[1])
+
+    def _take_local(
+        self, keys: list[str], buckets: list[Bucket]
+    ) -> tuple[Optional[Bucket], float]:
+        now = time.monotonic()
+        states = []
+        limiting, wait = None, 0.0
+        for key, bucket in zip(keys, buckets):
+            state = self._local.get(key)
+            if state is None:
+                state = [float(bucket.capacity), now]
+            else:
+                self._local.move_to_end(key)
+                state[0] = min(
+                    bucket.capacity, state[0] + (now - state[1]) * bucket.rate
+                )
+                state[1] = now
+            states.append((key, state))
+            if state[0] < 1 and (1 - state[0]) / bucket.rate > wait:
+                limiting, wait = bucket, (1 - state[0]) / bucket.rate
+        if limiting is not None:
+            return limiting, wait
+
+        for key, state in states:
+            state[0] -= 1
+            self._local[key] = state
+        while len(self._local) > self.max_keys:
+            self._local.popitem(last=False)
+        return None, 0.0
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis" if self.redis is not None else "memory",
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "redis_errors": self.redis_errors,
+            "local_buckets": len(self._local),
+        }
+
+
+login_limiter = LoginLimiter(
+    redis=get_redis() if settings.redis_url else None,
+    ip=Bucket("ip", settings.login_ip_burst, settings.login_ip_per_minute / 60),
+    username=Bucket(
+        "username",
+        settings.login_username_burst,
+        settings.login_username_per_minute / 60,
+    ),
+    max_keys=settings.login_limit_max_keys,
+    enabled=settings.login_limit_enabled,
+)
@@ -0,0 +1,200 @@
+"""
+Message service for conversations and chat history
+"""
+
+import uuid
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.models.conversation import Conversation, ConversationMember
+from app.models.message import Message
+from app.models.user import User
+from app.schemas.message import ConversationCreate
+
+# WebSocket rooms carrying a conversation's new messages. Only members may
+# join them and only the server publishes to them.
+CONVERSATION_ROOM_PREFIX = "conversation:"
+
+
+def conversation_room(conversation_id: uuid.UUID) -> str:
+    """WebSocket room that receives a conversation's new messages."""
+    return f"{CONVERSATION_ROOM_PREFIX}{conversation_id}"
+
+
+def room_conversation_id(room: str) -> Optional[uuid.UUID]:
+    """
+    The conversation a room belongs to, or None for other rooms.
+
+    Raises:
+        ValueError: If room is in the conversation namespace but malformed
+    """
+    if not room.startswith(CONVERSATION_ROOM_PREFIX):
+        return None
+    return uuid.UUID(room[len(CONVERSATION_ROOM_PREFIX) :])
+
+
+class MessageService:
+    """Service class for conversation and message operations."""
+
+    @staticmethod
+    async def create_conversation(
+        db: AsyncSession, creator_id: uuid.UUID, data: ConversationCreate
+    ) -> Conversation:
+        """
+        Create a conversation with the creator and the given members.
+
+        Args:
+            db: Database session
+            creator_id: Id of the user starting the conversation
+            data: Conversation data
+
+        Returns:
+            Created conversation
+
+        Raises:
+            ValueError: If a member id is not an existing user
+        """
+        member_ids = {creator_id, *data.member_ids}
+        others = member_ids - {creator_id}
+        if others:
+            result = await db.execute(select(User.id).where(User.id.in_(others)))
+            unknown = sorted(str(user_id) for user_id in others - set(result.scalars()))
+            if unknown:
+                raise ValueError(f"Unknown users: {', '.join(unknown)}")
+
+        conversation = Conversation(title=data.title, created_by=creator_id, last_seq=0)
+        db.add(conversation)
+        try:
+            await db.flush()
+            db.add_all(
+                ConversationMember(conversation_id=conversation.id, user_id=user_id)
+                for user_id in member_ids
+            )
+            await db.commit()
+        except IntegrityError:
+            # A member was deleted after the check above
+            await db.rollback()
+            raise ValueError("Unknown users")
+        return conversation
+
+    @staticmethod
+    async def is_member(
+        db: AsyncSession, conversation_id: uuid.UUID, user_id: uuid.UUID
+    ) -> bool:
+        result = await db.execute(
+            select(ConversationMember.user_id).where(
+                ConversationMember.conversation_id == conversation_id,
+                ConversationMember.user_id == user_id,
+            )
+        )
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def get_member_ids(
+        db: AsyncSession, conversation_id: uuid.UUID
+    ) -> list[uuid.UUID]:
+        result = await db.execute(
+            select(ConversationMember.user_id)
+            .where(ConversationMember.conversation_id == conversation_id)
+            .order_by(ConversationMember.joined_at)
+        )
+        return list(result.scalars())
+
+    @staticmethod
+    async def next_seq(
+        db: AsyncSession, conversation_id: uuid.UUID, count: int = 1
+    ) -> int:
+        """
+        Reserve `count` sequence numbers in a conversation.
+
+        The row lock taken by the UPDATE serializes concurrent senders, so
+        sequence numbers are gap-free and monotonic per conversation.
+
+        Returns:
+            The highest reserved seq; the reserved range is
+            (result - count, result]
+
+        Raises:
+            ValueError: If the conversation does not exist
+        """
+        result = await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(last_seq=Conversation.last_seq + count)
+            .returning(Conversation.last_seq)
+        )
+        last_seq = result.scalar_one_or_none()
+        if last_seq is None:
+            raise ValueError("Conversation not found.")
+        return last_seq
+
+    @staticmethod
+    async def send_message(
+        db: AsyncSession,
+        conversation_id: uuid.UUID,
+        sender_id: uuid.UUID,
+        content: str,
+    ) -> Message:
+        """
+        Store a message with the next sequence number of its conversation.
+
+        Raises:
+            ValueError: If the conversation does not exist
+        """
+        seq = await MessageService.next_seq(db, conversation_id)
+        message = Message(
+            conversation_id=conversation_id,
+            seq=seq,
+            sender_id=sender_id,
+            content=content,
+        )
+        db.add(message)
+        await db.commit()
+        return message
+
+    @staticmethod
+    async def get_history(
+        db: AsyncSession,
+        conversation_id: uuid.UUID,
+        before_seq: Optional[int] = None,
+        after_seq: Optional[int] = None,
+        limit: int = 50,
+    ) -> tuple[list[Message], bool]:
+        """
+        Fetch a page of history by keyset on (conversation_id, seq).
+
+        Without after_seq the page ends just before before_seq (or at the
+        newest message) and walks the index backwards; with after_seq it
+        starts just after it and walks forwards. Either way only limit + 1
+        index entries are read, however deep the page is.
+
+        Args:
+            db: Database session
+            conversation_id: Conversation to read
+            before_seq: Only messages with seq < before_seq
+            after_seq: Only messages with seq > after_seq
+            limit: Maximum number of messages
+
+        Returns:
+            (messages in ascending seq order, whether more exist in the
+            direction of travel)
+        """
+        query = select(Message).where(Message.conversation_id == conversation_id)
+        if before_seq is not None:
+            query = query.where(Message.seq < before_seq)
+        if after_seq is not None:
+            query = query.where(Message.seq > after_seq)
+
+        backwards = after_seq is None
+        order = Message.seq.desc() if backwards else Message.seq.asc()
+        result = await db.execute(query.order_by(order).limit(limit + 1))
+        messages = list(result.scalars())
+
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if backwards:
+            messages.reverse()
+        return messages, has_more
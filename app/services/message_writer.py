@@ -0,0 +1,276 @@
+"""
+Group-commit write queue for message inserts.
+
+Senders enqueue a message and await a future. A single writer task collects
+messages for up to `linger` seconds (or until `max_batch` are waiting) and
+writes the whole batch in one transaction:
+
+    SELECT ... FROM conversations WHERE id IN (...) ORDER BY id FOR UPDATE
+    UPDATE conversations SET last_seq = last_seq + n FROM (VALUES ...) RETURNING
+    INSERT INTO messages VALUES (...), (...), ...
+    COMMIT
+
+then resolves every sender's future with its stored Message (id and seq
+assigned). Locking conversations in id order keeps concurrent writers on
+other workers from deadlocking.
+
+stop() refuses new messages and lets the writer drain the queue, so every
+sender gets an answer; if the writer is cancelled instead, the messages it
+had not finished fail with MessageQueueFull rather than hang.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import NamedTuple, Optional
+
+from sqlalchemy import BigInteger, column, insert, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.conversation import Conversation
+from app.models.message import Message
+
+logger = logging.getLogger(__name__)
+
+
+class MessageQueueFull(Exception):
+    """Raised when too many messages are waiting to be written."""
+
+
+class _Pending(NamedTuple):
+    conversation_id: uuid.UUID
+    sender_id: uuid.UUID
+    content: str
+    future: asyncio.Future
+
+
+class MessageWriteQueue:
+    """
+    Batches message inserts into group commits.
+
+    Args:
+        session_factory: Factory used by the writer to open sessions
+        max_batch: Maximum messages written per transaction
+        linger: Seconds to wait for a batch to fill before writing
+        max_pending: Messages accepted before submit() sheds load
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        max_batch: int = 500,
+        linger: float = 0.005,
+        max_pending: int = 10000,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.linger = linger
+        self.max_pending = max_pending
+        self._pending: deque[_Pending] = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        # Stats
+        self.batches = 0
+        self.rows_written = 0
+        self.rejected = 0
+        self.failed = 0
+
+    async def submit(
+        self, conversation_id: uuid.UUID, sender_id: uuid.UUID, content: str
+    ) -> Message:
+        """
+        Queue a message and wait until its batch is committed.
+
+        Returns:
+            The stored message with id and seq assigned
+
+        Raises:
+            MessageQueueFull: If max_pending messages are already waiting,
+                or the queue is shutting down
+            ValueError: If the conversation does not exist
+        """
+        if self._task is None:
+            raise RuntimeError("Message write queue is not running.")
+        if self._stopping:
+            raise MessageQueueFull("Message write queue is shutting down.")
+        if len(self._pending) >= self.max_pending:
+            self.rejected += 1
+            raise MessageQueueFull("Message write queue is full.")
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(_Pending(conversation_id, sender_id, content, future))
+        self._wakeup.set()
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    def start(self) -> None:
+        """Start the writer task."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._task = asyncio.create_task(self._run(), name="message-writer")
+
+    async def stop(self) -> None:
+        """Refuse new messages and wait until everything queued is written."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._full.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
+            self._stopping = False
+
+    async def _run(self) -> None:
+        try:
+            while self._pending or not self._stopping:
+                await self._wakeup.wait()
+                # Linger so concurrent senders share the transaction
+                if len(self._pending) < self.max_batch and not self._stopping:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.linger)
+                    except asyncio.TimeoutError:
+                        pass
+                self._wakeup.clear()
+                self._full.clear()
+                while self._pending:
+                    await self._write(self._take_batch())
+        except asyncio.CancelledError:
+            self._fail(self._take_all(), self._stopped_error())
+            raise
+
+    def _take_batch(self) -> list[_Pending]:
+        count = min(self.max_batch, len(self._pending))
+        return [self._pending.popleft() for _ in range(count)]
+
+    def _take_all(self) -> list[_Pending]:
+        batch = list(self._pending)
+        self._pending.clear()
+        return batch
+
+    @staticmethod
+    def _stopped_error() -> MessageQueueFull:
+        return MessageQueueFull("Message writer stopped before the write finished.")
+
+    def _fail(self, batch: list[_Pending], exc: BaseException) -> None:
+        self.failed += len(batch)
+        for item in batch:
+            if not item.future.done():
+                item.future.set_exception(exc)
+
+    async def _write(self, batch: list[_Pending]) -> None:
+        counts: dict[uuid.UUID, int] = {}
+        for item in batch:
+            counts[item.conversation_id] = counts.get(item.conversation_id, 0) + 1
+
+        try:
+            async with self.session_factory() as session, session.begin():
+                await session.execute(
+                    select(Conversation.id)
+                    .where(Conversation.id.in_(counts))
+                    .order_by(Conversation.id)
+                    .with_for_update()
+                )
+                result = await session.execute(self._reserve_statement(counts))
+                next_seq = {
+                    conversation_id: last_seq - counts[conversation_id] + 1
+                    for conversation_id, last_seq in result
+                }
+
+                now = datetime.now(timezone.utc)
+                messages: list[Optional[Message]] = []
+                for item in batch:
+                    seq = next_seq.get(item.conversation_id)
+                    if seq is None:
+                        messages.append(None)
+                        continue
+                    next_seq[item.conversation_id] = seq + 1
+                    messages.append(
+                        Message(
+                            id=uuid.uuid4(),
+                            conversation_id=item.conversation_id,
+                            seq=seq,
+                            sender_id=item.sender_id,
+                            content=item.content,
+                            created_at=now,
+                        )
+                    )
+
+                rows = [
+                    {
+                        "id": message.id,
+                        "conversation_id": message.conversation_id,
+                        "seq": message.seq,
+                        "sender_id": message.sender_id,
+                        "content": message.content,
+                        "created_at": message.created_at,
+                    }
+                    for message in messages
+                    if message is not None
+                ]
+                if rows:
+                    await session.execute(insert(Message.__table__).values(rows))
+        except asyncio.CancelledError:
+            # The senders' futures are already off the queue; answer them
+            self._fail(batch, self._stopped_error())
+            raise
+        except Exception as exc:
+            logger.exception("message batch of %d failed", len(batch))
+            self._fail(batch, exc)
+            return
+
+        self.batches += 1
+        self.rows_written += len(rows)
+        for item, message in zip(batch, messages):
+            if item.future.done():
+                continue
+            if message is None:
+                item.future.set_exception(ValueError("Conversation not found."))
+            else:
+                item.future.set_result(message)
+
+    @staticmethod
+    def _reserve_statement(counts: dict[uuid.UUID, int]):
+        """UPDATE conversations ... FROM (VALUES (id, n), ...) RETURNING id, last_seq"""
+        data = values(
+            column("id", UUID(as_uuid=True)),
+            column("n", BigInteger),
+            name="reserve",
+        ).data(list(counts.items()))
+
+        return (
+            update(Conversation)
+            .where(Conversation.id == data.c.id)
+            .values(last_seq=Conversation.last_seq + data.c.n)
+            .returning(Conversation.id, Conversation.last_seq)
+            .execution_options(synchronize_session=False)
+        )
+
+    def stats(self) -> dict:
+        """Return a snapshot of the queue counters."""
+        return {
+            "pending": len(self._pending),
+            "batches": self.batches,
+            "rows_written": self.rows_written,
+            "rejected": self.rejected,
+            "failed": self.failed,
+        }
+
+
+message_writer = MessageWriteQueue(
+    AsyncSessionLocal,
+    max_batch=settings.message_write_batch_size,
+    linger=settings.message_write_linger_ms / 1000,
+    max_pending=settings.message_write_max_pending,
+)
@@ -0,0 +1,276 @@
+"""
+In-memory presence store with write-behind flushing.
+
+Status flips (online/away/offline) are frequent and only the latest value
+matters, so they are kept in memory and written to the users table in
+batches on an interval instead of one commit per flip.
+
+The store is per process. Changes made here are served from memory until
+they are flushed; everything else is read from the database, which every
+worker keeps up to date by flushing, and cached in a bounded LRU for a
+few seconds, so changes made by other workers show up within that TTL.
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import DateTime, cast, column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.user import User, UserStatus
+
+logger = logging.getLogger(__name__)
+
+
+class Presence(NamedTuple):
+    status: UserStatus
+    last_seen: Optional[datetime]
+
+
+def _as_uuid(user_id: uuid.UUID | str) -> uuid.UUID:
+    return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+
+
+class PresenceStore:
+    """
+    Current presence per user, flushed to Postgres in batches.
+
+    Args:
+        session_factory: Factory used by the flusher to open sessions
+        flush_interval: Seconds between flushes
+        batch_size: Maximum rows per UPDATE statement
+        max_entries: Users whose presence is cached
+        ttl: Seconds a cached presence is trusted before it is re-read
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        flush_interval: float = 2.0,
+        batch_size: int = 1000,
+        max_entries: int = 100000,
+        ttl: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._presence: LRUCache[Presence] = LRUCache(max_entries, ttl)
+        # Changes not yet flushed, and those being flushed; never evicted
+        self._dirty: dict[uuid.UUID, Presence] = {}
+        self._flushing: dict[uuid.UUID, Presence] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.updates = 0
+        self.flushes = 0
+        self.rows_flushed = 0
+        self.flush_errors = 0
+
+    def set(
+        self,
+        user_id: uuid.UUID | str,
+        status: UserStatus,
+        last_seen: Optional[datetime] = None,
+    ) -> None:
+        """Record a status change; it is persisted on the next flush."""
+        user_id = _as_uuid(user_id)
+        presence = Presence(status, last_seen)
+        self._presence.set(user_id, presence)
+        self._dirty[user_id] = presence
+        self.updates += 1
+
+    def get(self, user_id: uuid.UUID | str) -> Optional[Presence]:
+        """Return the presence known to this process, if any."""
+        user_id = _as_uuid(user_id)
+        # Unflushed changes are newer than anything in the database
+        return (
+            self._dirty.get(user_id)
+            or self._flushing.get(user_id)
+            or self._presence.get(user_id)
+        )
+
+    async def get_many(
+        self,
+        db: AsyncSession,
+        user_ids: Iterable[uuid.UUID | str],
+        loaded: Optional[dict[uuid.UUID, Presence]] = None,
+    ) -> dict[uuid.UUID, Presence]:
+        """
+        Bulk presence lookup.
+
+        Unflushed changes and recently read users are answered from memory;
+        the rest are taken from loaded or read with one query, and cached
+        for the TTL.
+
+        Args:
+            db: Database session used for users not in memory
+            user_ids: User ids to look up
+            loaded: Presence the caller has just read from the database,
+                used instead of querying for those users
+
+        Returns:
+            Mapping of user id to Presence for users that exist
+        """
+        loaded = loaded or {}
+        found: dict[uuid.UUID, Presence] = {}
+        missing: list[uuid.UUID] = []
+        for user_id in map(_as_uuid, user_ids):
+            presence = self.get(user_id)
+            if presence is None and user_id in loaded:
+                presence = loaded[user_id]
+                self._presence.set(user_id, presence)
+            if presence is not None:
+                found[user_id] = presence
+            else:
+                missing.append(user_id)
+
+        if missing:
+            result = await db.execute(
+                select(User.id, User.status, User.last_seen).where(
+                    User.id.in_(missing)
+                )
+            )
+            for user_id, status, last_seen in result:
+                # Anything cached during the query (a set()) is newer
+                presence = self.get(user_id)
+                if presence is None:
+                    presence = Presence(status, last_seen)
+                    self._presence.set(user_id, presence)
+                found[user_id] = presence
+
+        return found
+
+    async def overlay(self, db: AsyncSession, users: list[User]) -> None:
+        """
+        Replace loaded users' status and last_seen with their presence.
+
+        The rows' own values serve users not in memory, so no query is
+        made. The users are not marked dirty: presence reaches the table
+        only through flush().
+        """
+        loaded = {user.id: Presence(user.status, user.last_seen) for user in users}
+        found = await self.get_many(db, loaded, loaded=loaded)
+        for user in users:
+            presence = found[user.id]
+            set_committed_value(user, "status", presence.status)
+            set_committed_value(user, "last_seen", presence.last_seen)
+
+    async def flush(self) -> int:
+        """
+        Write all pending changes with one multi-row UPDATE per batch.
+
+        Returns:
+            Number of rows written
+        """
+        if not self._dirty:
+            return 0
+
+        pending, self._dirty = self._dirty, {}
+        self._flushing = pending
+        rows = [
+            (user_id, presence.status, presence.last_seen)
+            for user_id, presence in pending.items()
+        ]
+        try:
+            async with self.session_factory() as session:
+                for start in range(0, len(rows), self.batch_size):
+                    await session.execute(
+                        self._update_statement(rows[start : start + self.batch_size])
+                    )
+                await session.commit()
+        except Exception:
+            self.flush_errors += 1
+            # Keep changes for the next attempt unless newer ones arrived
+            for user_id, presence in pending.items():
+                self._dirty.setdefault(user_id, presence)
+            raise
+        finally:
+            self._flushing = {}
+
+        self.flushes += 1
+        self.rows_flushed += len(rows)
+        return len(rows)
+
+    @staticmethod
+    def _update_statement(rows: list[tuple]):
+        """
+        UPDATE users SET ... FROM (VALUES ...) AS presence WHERE id = ...
+
+        last_seen is cast explicitly because Postgres types an all-NULL
+        VALUES column as text. updated_at is pinned since presence is not a
+        profile change.
+        """
+        data = values(
+            column("id", UUID(as_uuid=True)),
+            column("status", User.__table__.c.status.type),
+            column("last_seen", DateTime(timezone=True)),
+            name="presence",
+        ).data(rows)
+
+        return (
+            update(User)
+            .where(User.id == data.c.id)
+            .values(
+                status=data.c.status,
+                last_seen=func.coalesce(
+                    cast(data.c.last_seen, DateTime(timezone=True)), User.last_seen
+                ),
+                updated_at=User.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("presence flush failed")
+
+    def start(self) -> None:
+        """Start the background flusher."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="presence-flusher")
+
+    async def stop(self) -> None:
+        """Stop the flusher and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("final presence flush failed")
+
+    def stats(self) -> dict:
+        """Return a snapshot of the store counters."""
+        return {
+            "pending": len(self._dirty),
+            "updates": self.updates,
+            "flushes": self.flushes,
+            "rows_flushed": self.rows_flushed,
+            "flush_errors": self.flush_errors,
+            "cache": self._presence.stats(),
+        }
+
+
+presence_store = PresenceStore(
+    AsyncSessionLocal,
+    flush_interval=settings.presence_flush_interval_seconds,
+    batch_size=settings.presence_flush_batch_size,
+    max_entries=settings.presence_cache_max_entries,
+    ttl=settings.presence_cache_ttl_seconds,
+)
@@ -0,0 +1,255 @@
+"""
+Revoked-token index.
+
+Every authenticated request has to ask "is this token revoked?", and almost
+always the answer is no. Revoked ids are therefore kept in a per-process
+Bloom filter: a negative answer is certain and costs a few bit tests with
+no I/O. Only a positive answer (a revoked token, or a rare false positive)
+is confirmed against the authoritative set.
+
+With Redis the authoritative set is a sorted set scored by each entry's
+expiry, shared by all workers. New revocations are pushed to other workers
+over the broadcast bus, and every worker periodically rebuilds its filter
+from Redis, which also drops entries whose tokens have expired; without
+the Redis bus that sync is the only way they spread. Without Redis the set
+lives in process memory.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.broadcast import BroadcastBus, bus
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Bit positions come from the string's cached hash() by double hashing,
+    so lookups allocate nothing and never hash the string twice. hash() is
+    salted per process, which is fine: filters are never shared, only
+    rebuilt from the authoritative set.
+
+    Args:
+        capacity: Expected number of entries
+        error_rate: Target false-positive rate at capacity
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(
+            64, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        # Repeated adds of one key are counted again
+        self.additions = 0
+
+    def add(self, key: str) -> None:
+        h = hash(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) & 0xFFFFFFFF | 1
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.additions += 1
+
+    def __contains__(self, key: str) -> bool:
+        h = hash(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) & 0xFFFFFFFF | 1
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class RevocationIndex:
+    """
+    Bloom-filtered set of revoked token ids that expire with their tokens.
+
+    Args:
+        redis: Async Redis client, or None to keep the set in memory
+        bus: Broadcast bus used to push revocations to other workers
+        capacity: Expected number of live revocations
+        error_rate: Bloom filter false-positive rate
+        sync_interval: Seconds between full rebuilds from Redis
+        key: Redis sorted set holding id -> expiry
+        channel: Bus channel for revocation events
+    """
+
+    def __init__(
+        self,
+        redis: Any = None,
+        bus: Optional[BroadcastBus] = None,
+        capacity: int = 100000,
+        error_rate: float = 0.001,
+        sync_interval: float = 60.0,
+        key: str = "auth:revoked",
+        channel: str = "auth:revocations",
+    ):
+        self.redis = redis
+        self.bus = bus
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.key = key
+        self.channel = channel
+        self.bloom = BloomFilter(capacity, error_rate)
+        # Authoritative set when running without Redis
+        self._local: dict[str, float] = {}
+        # Ids revoked while a rebuild is in flight, re-added to the new filter
+        self._during_sync: Optional[list[str]] = None
+        # Until the first sync succeeds every check goes to Redis
+        self._synced = False
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.checks = 0
+        self.confirmations = 0
+        self.false_positives = 0
+        self.revocations = 0
+
+    async def start(self) -> None:
+        """
+        Load the current set and start syncing with other workers.
+
+        If Redis cannot be reached the worker still starts; checks are
+        confirmed against Redis until a later sync succeeds.
+        """
+        try:
+            await self.sync()
+        except RedisError:
+            logger.warning("initial revocation index sync failed", exc_info=True)
+        if self.redis is not None and self.bus is None:
+            logger.warning(
+                "revocations reach other workers only on the next sync; "
+                "set BROADCAST_BACKEND=redis to push them"
+            )
+        if self.redis is not None and self.bus is not None:
+            self.bus.set_channel_handler(self.channel, self._on_remote_revoke)
+            await self.bus.subscribe(self.channel)
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.redis is not None and self.bus is not None:
+            await self.bus.unsubscribe(self.channel)
+
+    async def revoke(self, token_id: str, expires_at: float) -> None:
+        """
+        Revoke a token id until expires_at (unix time), on all workers.
+
+        Raises:
+            RedisError: If the revocation could not be stored
+        """
+        self.revocations += 1
+        self._add(token_id)
+        if self.redis is None:
+            self._local[token_id] = expires_at
+            return
+        await self.redis.zadd(self.key, {token_id: expires_at})
+        if self.bus is not None:
+            await self.bus.publish(self.channel, token_id)
+
+    async def is_revoked(self, token_id: Optional[str]) -> bool:
+        """
+        Whether a token id is revoked.
+
+        Misses are answered by the Bloom filter alone once it has been
+        loaded. A hit is confirmed against the authoritative set; if Redis
+        cannot be reached the token is treated as revoked.
+        """
+        self.checks += 1
+        if token_id is None:
+            return False
+        if self._synced and token_id not in self.bloom:
+            return False
+
+        self.confirmations += 1
+        now = time.time()
+        if self.redis is None:
+            revoked = self._local.get(token_id, 0) > now
+        else:
+            try:
+                score = await self.redis.zscore(self.key, token_id)
+            except RedisError:
+                logger.warning("revocation check failed, denying", exc_info=True)
+                return True
+            revoked = score is not None and score > now
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+
+    def _add(self, token_id: str) -> None:
+        self.bloom.add(token_id)
+        if self._during_sync is not None:
+            self._during_sync.append(token_id)
+
+    def _on_remote_revoke(self, channel: str, token_id: str) -> None:
+        self._add(token_id)
+
+    async def sync(self) -> None:
+        """Drop expired entries and rebuild the filter from the full set."""
+        now = time.time()
+        if self.redis is None:
+            self._local = {k: exp for k, exp in self._local.items() if exp > now}
+            live = list(self._local)
+        else:
+            self._during_sync = []
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.zremrangebyscore(self.key, "-inf", now)
+                    pipe.zrangebyscore(self.key, now, "+inf")
+                    _, members = await pipe.execute()
+                live = [member.decode() for member in members]
+                live.extend(self._during_sync)
+            finally:
+                self._during_sync = None
+
+        bloom = BloomFilter(max(self.capacity, len(live) * 2), self.error_rate)
+        for token_id in live:
+            bloom.add(token_id)
+        self.bloom = bloom
+        self._synced = True
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except RedisError:
+                logger.warning("revocation index sync failed", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "bloom_additions": self.bloom.additions,
+            "bloom_bytes": len(self.bloom.bits),
+            "checks": self.checks,
+            "confirmations": self.confirmations,
+            "false_positives": self.false_positives,
+            "revocations": self.revocations,
+        }
+
+
+revocation_index = RevocationIndex(
+    redis=get_redis() if settings.token_store_backend == "redis" else None,
+    bus=bus if settings.broadcast_backend == "redis" else None,
+    capacity=settings.revocation_capacity,
+    error_rate=settings.revocation_error_rate,
+    sync_interval=settings.revocation_sync_interval_seconds,
+)
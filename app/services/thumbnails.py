@@ -0,0 +1,219 @@
+"""
+Background thumbnailing of uploaded images.
+
+Decoding and resizing an image is milliseconds to seconds of pure CPU, so
+it never runs on the event loop: each new image is handed to a process
+pool (a bounded HashingPool, which also measures queue depth and run
+time) and the upload returns straight away.
+
+Thumbnails are WebP, fit inside a square of each configured size, and
+live next to the original as <sha256>-<size>.webp, so they share its
+directory, are as immutable as it is, and need no index to be found.
+Until a thumbnail exists, downloads asking for it get the original.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.hashing import HashingPool, HashingPoolFull
+from app.core.metrics import registry
+from app.services.file_storage import KEY_PATTERN, FileStore, file_store
+
+logger = logging.getLogger(__name__)
+
+thumbnail_seconds = registry.histogram(
+    "thumbnail_seconds", "Time a worker spent rendering one image's thumbnails"
+)
+thumbnail_jobs = registry.counter(
+    "thumbnail_jobs_total", "Thumbnail jobs by outcome", ("result",)
+)
+
+
+def render_thumbnails(
+    source: str, targets: list[tuple[int, str]], quality: int, max_pixels: int
+) -> float:
+    """
+    Write a WebP thumbnail of source for each (size, path). Runs in a worker
+    process, which is the only place Pillow is imported.
+
+    Returns:
+        Seconds spent, measured in the worker
+
+    Raises:
+        ValueError: If the image has more than max_pixels pixels
+    """
+    from PIL import Image, ImageOps
+
+    started = time.perf_counter()
+    largest = max(size for size, _ in targets)
+    with Image.open(source) as original:
+        # Only the header has been read so far
+        if original.width * original.height > max_pixels:
+            raise ValueError(f"Image too large: {original.width}x{original.height}")
+        # JPEGs decode directly at a reduced scale, much cheaper than in full
+        original.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(original)
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+    # Largest first: each smaller size is resized from the previous one
+    for size, path in sorted(targets, reverse=True):
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            image.save(temp, "WEBP", quality=quality)
+            os.replace(temp, path)
+        except BaseException:
+            if os.path.exists(temp):
+                os.unlink(temp)
+            raise
+    return time.perf_counter() - started
+
+
+class Thumbnailer:
+    """
+    Renders thumbnails of stored images in a process pool.
+
+    Args:
+        store: Where originals and thumbnails live
+        sizes: Thumbnail edge lengths in pixels
+        workers: Worker processes
+        max_pending: Images queued or rendering before new ones are dropped
+        quality: WebP quality (0-100)
+        max_pixels: Images with more pixels are not thumbnailed
+        enabled: False to never render (downloads then get originals)
+    """
+
+    def __init__(
+        self,
+        store: FileStore,
+        sizes: list[int],
+        workers: int = 2,
+        max_pending: int = 256,
+        quality: int = 80,
+        max_pixels: int = 50000000,
+        enabled: bool = True,
+    ):
+        self.store = store
+        self.sizes = sorted(sizes)
+        self.quality = quality
+        self.max_pixels = max_pixels
+        self.enabled = enabled
+        self.pool = HashingPool(workers, max_pending, kind="process")
+        self._tasks: dict[str, asyncio.Task] = {}
+        # Images that failed to render, so fallbacks do not retry them
+        self._failed: LRUCache[bool] = LRUCache(1024, 3600)
+
+        # Stats
+        self.submitted = 0
+        self.rendered = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def accepts(self, key: str) -> bool:
+        """Whether key is an uploaded image (not a thumbnail) to render."""
+        return (
+            KEY_PATTERN.match(key) is not None
+            and "-" not in key
+            and self.store.is_image(key)
+        )
+
+    def variant_for(self, key: str, size: int) -> Optional[str]:
+        """
+        Key of the thumbnail to serve for a requested size: the smallest
+        one at least that large, else the largest. None if key has none.
+        """
+        if not self.accepts(key):
+            return None
+        chosen = next((s for s in self.sizes if s >= size), self.sizes[-1])
+        return f"{key.partition('.')[0]}-{chosen}.webp"
+
+    def submit(self, key: str) -> bool:
+        """
+        Queue thumbnails of a stored image; returns at once.
+
+        Returns:
+            False if key is not thumbnailable, already queued, has failed
+            before, or the pool is full
+        """
+        if not self.enabled or not self.accepts(key):
+            return False
+        if key in self._tasks or key in self._failed:
+            return False
+        if self.pool.pending >= self.pool.max_pending:
+            self.dropped += 1
+            thumbnail_jobs.inc(1, "dropped")
+            return False
+        self.submitted += 1
+        task = asyncio.create_task(self._render(key))
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return True
+
+    async def _render(self, key: str) -> None:
+        sha256 = key.partition(".")[0]
+        targets = [
+            (size, self.store.path_for(f"{sha256}-{size}.webp")) for size in self.sizes
+        ]
+        try:
+            seconds = await self.pool.run(
+                render_thumbnails,
+                self.store.path_for(key),
+                targets,
+                self.quality,
+                self.max_pixels,
+            )
+        except HashingPoolFull:
+            self.dropped += 1
+            thumbnail_jobs.inc(1, "dropped")
+            return
+        except Exception:
+            self.failed += 1
+            thumbnail_jobs.inc(1, "failed")
+            self._failed.set(key, True)
+            logger.warning("thumbnailing %s failed", key, exc_info=True)
+            return
+        self.rendered += 1
+        thumbnail_jobs.inc(1, "rendered")
+        thumbnail_seconds.observe(seconds)
+
+    async def drain(self) -> None:
+        """Wait for every queued image to be rendered."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def stop(self) -> None:
+        await self.drain()
+        await asyncio.to_thread(self.pool.shutdown)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "submitted": self.submitted,
+            "rendered": self.rendered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "pool": self.pool.stats(),
+        }
+
+
+thumbnailer = Thumbnailer(
+    file_store,
+    sizes=settings.thumbnail_sizes_list,
+    workers=settings.thumbnail_workers,
+    max_pending=settings.thumbnail_max_pending,
+    quality=settings.thumbnail_quality,
+    max_pixels=settings.thumbnail_max_pixels,
+    enabled=settings.thumbnail_enabled,
+)
+
+registry.gauge(
+    "thumbnail_queue_depth",
+    "Images waiting for a thumbnail worker",
+    callback=lambda: thumbnailer.pool.queue_depth,
+)
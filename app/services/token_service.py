@@ -0,0 +1,181 @@
+"""
+Refresh-token families with rotation and reuse detection.
+
+Logging in starts a family. Every token issued from it, access and refresh,
+carries the family id as `fam`, and each refresh token also carries its own
+`jti`. The family store remembers only the jti of the family's newest
+refresh token. Refreshing swaps it for a new one (rotation). Presenting an
+older refresh token means it was copied, so the whole family is revoked:
+the next check in get_current_user rejects every access token minted from
+it, on every worker. A family lives as long as the refresh token issued at
+login; rotation does not extend it.
+"""
+
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.core.security import create_access_token, create_refresh_token, decode_token
+from app.schemas.user import Token
+from app.services.revocation import RevocationIndex, revocation_index
+
+logger = logging.getLogger(__name__)
+
+# Rotation outcomes
+ROTATED = 1
+MISSING = 0
+REUSED = -1
+
+# GET the current jti; rotate if it matches, delete the family if not
+_ROTATE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current then return 0 end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return -1
+end
+redis.call('SET', KEYS[1], ARGV[2], 'KEEPTTL')
+return 1
+"""
+
+
+class InvalidRefreshToken(Exception):
+    """Raised when a refresh token cannot be exchanged for new tokens."""
+
+
+class TokenFamilyStore:
+    """
+    Current refresh-token jti per family, in Redis or in process memory.
+
+    Args:
+        redis: Async Redis client, or None for a per-process store
+        prefix: Redis key prefix
+    """
+
+    def __init__(self, redis: Any = None, prefix: str = "auth:family:"):
+        self.redis = redis
+        self.prefix = prefix
+        self._local: dict[str, tuple[str, float]] = {}
+        self._rotate = redis.register_script(_ROTATE_SCRIPT) if redis else None
+
+    async def create(self, family: str, jti: str, expires_at: float) -> None:
+        if self.redis is None:
+            self._local[family] = (jti, expires_at)
+            return
+        ttl = max(1, int(expires_at - time.time()))
+        await self.redis.set(self.prefix + family, jti, ex=ttl)
+
+    async def rotate(self, family: str, old_jti: str, new_jti: str) -> int:
+        """Atomically replace old_jti; returns ROTATED, MISSING or REUSED."""
+        if self.redis is not None:
+            outcome = await self._rotate(
+                keys=[self.prefix + family], args=[old_jti, new_jti]
+            )
+            return int(outcome)
+
+        current = self._local.get(family)
+        if current is None or current[1] <= time.time():
+            self._local.pop(family, None)
+            return MISSING
+        if current[0] != old_jti:
+            del self._local[family]
+            return REUSED
+        self._local[family] = (new_jti, current[1])
+        return ROTATED
+
+    async def delete(self, family: str) -> None:
+        if self.redis is None:
+            self._local.pop(family, None)
+        else:
+            await self.redis.delete(self.prefix + family)
+
+
+class TokenService:
+    """Issues, rotates and revokes token families."""
+
+    families = TokenFamilyStore(
+        get_redis() if settings.token_store_backend == "redis" else None
+    )
+    revocations: RevocationIndex = revocation_index
+
+    @staticmethod
+    def _pair(user_id: str, family: str, jti: str, expires_at: float) -> Token:
+        claims = {"sub": user_id, "fam": family}
+        return Token(
+            access_token=create_access_token(claims),
+            refresh_token=create_refresh_token(
+                {**claims, "jti": jti},
+                expires_at=datetime.fromtimestamp(int(expires_at), timezone.utc),
+            ),
+        )
+
+    @staticmethod
+    async def issue(user_id: Any) -> Token:
+        """Start a new family for a login and return its first token pair."""
+        family, jti = uuid.uuid4().hex, uuid.uuid4().hex
+        expires_at = time.time() + settings.refresh_token_expire_days * 86400
+        await TokenService.families.create(family, jti, expires_at)
+        return TokenService._pair(str(user_id), family, jti, expires_at)
+
+    @staticmethod
+    async def _verify_refresh(refresh_token: str) -> dict:
+        payload = decode_token(refresh_token)
+        if (
+            payload is None
+            or payload.get("type") != "refresh"
+            or not all(payload.get(claim) for claim in ("sub", "fam", "jti", "exp"))
+        ):
+            raise InvalidRefreshToken("Invalid refresh token")
+        if await TokenService.revocations.is_revoked(payload["fam"]):
+            raise InvalidRefreshToken("Refresh token has been revoked")
+        return payload
+
+    @staticmethod
+    async def rotate(refresh_token: str) -> tuple[str, Token]:
+        """
+        Exchange a refresh token for a new pair from the same family.
+
+        Returns:
+            (user id, new token pair)
+
+        Raises:
+            InvalidRefreshToken: If the token is invalid, revoked, expired
+                or has already been used (which revokes its family)
+        """
+        payload = await TokenService._verify_refresh(refresh_token)
+        family, new_jti = payload["fam"], uuid.uuid4().hex
+        outcome = await TokenService.families.rotate(family, payload["jti"], new_jti)
+
+        if outcome == REUSED:
+            logger.warning(
+                "refresh token reuse detected, revoking family",
+                extra={"user_id": payload["sub"], "family": family},
+            )
+            await TokenService.revocations.revoke(family, payload["exp"])
+            raise InvalidRefreshToken("Refresh token has already been used")
+        if outcome == MISSING:
+            raise InvalidRefreshToken("Refresh token has expired")
+        return payload["sub"], TokenService._pair(
+            payload["sub"], family, new_jti, payload["exp"]
+        )
+
+    @staticmethod
+    async def revoke(refresh_token: str) -> None:
+        """
+        Log out: revoke the refresh token's whole family.
+
+        Raises:
+            InvalidRefreshToken: If the token is not a valid refresh token
+        """
+        payload = await TokenService._verify_refresh(refresh_token)
+        await TokenService.revocations.revoke(payload["fam"], payload["exp"])
+        await TokenService.families.delete(payload["fam"])
+
+    @staticmethod
+    async def is_revoked(claims: dict) -> bool:
+        """Whether the family a token belongs to has been revoked."""
+        return await TokenService.revocations.is_revoked(claims.get("fam"))
@@ -0,0 +1,243 @@
+"""
+Two-tier read-through cache for user lookups.
+
+L1 is a small per-process LRU with a short TTL, L2 is Redis shared by all
+workers. Misses are cached too (negative caching) and concurrent misses for
+the same key are coalesced into a single database query.
+
+Snapshots never contain the password hash (see User.to_snapshot), so
+neither tier holds credentials.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.user import UserStatus
+
+logger = logging.getLogger(__name__)
+
+# Fields a user can be looked up by
+LOOKUP_FIELDS = ("id", "username", "email")
+
+# Marker stored for lookups that found no user
+_NEGATIVE = object()
+_NEGATIVE_JSON = b"null"
+
+Loader = Callable[[], Awaitable[Optional[dict]]]
+
+
+def _encode(snapshot: dict) -> str:
+    def default(value: Any) -> Any:
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, uuid.UUID):
+            return str(value)
+        raise TypeError(f"Cannot encode {type(value).__name__}")
+
+    return json.dumps(snapshot, default=default)
+
+
+def _decode(raw: bytes) -> dict:
+    data = json.loads(raw)
+    data["id"] = uuid.UUID(data["id"])
+    data["status"] = UserStatus(data["status"])
+    for field in ("last_seen", "created_at", "updated_at"):
+        if data.get(field) is not None:
+            data[field] = datetime.fromisoformat(data[field])
+    return data
+
+
+class UserCache:
+    """
+    Read-through user snapshot cache.
+
+    Args:
+        redis: Async Redis client for L2, or None to run with L1 only
+        l1_max_entries: Maximum entries kept in the per-process tier
+        l1_ttl: Seconds an L1 entry lives
+        l2_ttl: Seconds an L2 entry lives
+        negative_ttl: Seconds a "no such user" result is cached
+        prefix: Redis key prefix
+    """
+
+    def __init__(
+        self,
+        redis: Any = None,
+        l1_max_entries: int = 10000,
+        l1_ttl: float = 5,
+        l2_ttl: int = 300,
+        negative_ttl: int = 30,
+        prefix: str = "user",
+    ):
+        self.redis = redis
+        self.l1: LRUCache[Any] = LRUCache(l1_max_entries, default_ttl=l1_ttl)
+        self.l1_ttl = l1_ttl
+        self.l2_ttl = l2_ttl
+        self.negative_ttl = negative_ttl
+        self.prefix = prefix
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        # Stats
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.redis_errors = 0
+
+    def _key(self, field: str, value: Any) -> str:
+        return f"{self.prefix}:{field}:{value}"
+
+    async def get(self, field: str, value: Any, loader: Loader) -> Optional[dict]:
+        """
+        Return the user snapshot for field == value.
+
+        Args:
+            field: One of LOOKUP_FIELDS
+            value: Value to look up
+            loader: Coroutine function returning a snapshot or None, called
+                only when neither tier has the key
+
+        Returns:
+            User snapshot dict or None if no such user
+        """
+        key = self._key(field, value)
+
+        cached = self.l1.get(key)
+        if cached is not None:
+            return None if cached is _NEGATIVE else cached
+
+        # Coalesce concurrent misses for the same key
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if asyncio.current_task().cancelling() or not inflight.cancelled():
+                    raise
+                # The caller doing the load was cancelled, not us: the load
+                # ran on its session, so retry with our own loader
+                return await self.get(field, value, loader)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            snapshot = await self._read_through(key, loader)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so an unawaited failure is not logged
+            future.exception()
+            raise
+        else:
+            future.set_result(snapshot)
+            return snapshot
+        finally:
+            del self._inflight[key]
+
+    async def _read_through(self, key: str, loader: Loader) -> Optional[dict]:
+        raw = await self._l2_get(key)
+        if raw is not None:
+            self.l2_hits += 1
+            if raw == _NEGATIVE_JSON:
+                self.l1.set(key, _NEGATIVE, expires_at=self._negative_expiry())
+                return None
+            snapshot = _decode(raw)
+            self.l1.set(key, snapshot)
+            return snapshot
+
+        self.l2_misses += 1
+        self.loads += 1
+        snapshot = await loader()
+        if snapshot is None:
+            self.l1.set(key, _NEGATIVE, expires_at=self._negative_expiry())
+            await self._l2_set({key: _NEGATIVE_JSON}, self.negative_ttl)
+        else:
+            await self.set_user(snapshot)
+        return snapshot
+
+    def _negative_expiry(self) -> float:
+        return time.time() + min(self.negative_ttl, self.l1_ttl)
+
+    async def set_user(self, snapshot: dict) -> None:
+        """
+        Write-through: store a fresh snapshot under every lookup key.
+        This also overwrites negative entries left by earlier misses.
+        """
+        keys = [self._key(field, snapshot[field]) for field in LOOKUP_FIELDS]
+        for key in keys:
+            self.l1.set(key, snapshot)
+        encoded = _encode(snapshot)
+        await self._l2_set({key: encoded for key in keys}, self.l2_ttl)
+
+    async def invalidate(self, snapshot: dict) -> None:
+        """Drop every lookup key of a user from both tiers."""
+        keys = [self._key(field, snapshot[field]) for field in LOOKUP_FIELDS]
+        for key in keys:
+            self.l1.pop(key)
+        if self.redis is None:
+            return
+        try:
+            await self.redis.delete(*keys)
+        except RedisError:
+            self.redis_errors += 1
+            logger.warning("user cache: redis delete failed", exc_info=True)
+
+    async def _l2_get(self, key: str) -> Optional[bytes]:
+        if self.redis is None:
+            return None
+        try:
+            return await self.redis.get(key)
+        except RedisError:
+            # Redis is an optimisation; fall back to the database
+            self.redis_errors += 1
+            logger.warning("user cache: redis get failed", exc_info=True)
+            return None
+
+    async def _l2_set(self, items: dict[str, Any], ttl: int) -> None:
+        if self.redis is None:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.set(key, value, ex=ttl)
+                await pipe.execute()
+        except RedisError:
+            self.redis_errors += 1
+            logger.warning("user cache: redis set failed", exc_info=True)
+
+    def clear_local(self) -> None:
+        """Drop the L1 tier (L2 is left untouched)."""
+        self.l1.clear()
+
+    def stats(self) -> dict:
+        """Return a snapshot of the cache counters."""
+        return {
+            "l1": self.l1.stats(),
+            "l2_hits": self.l2_hits,
+            "l2_misses": self.l2_misses,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "redis_errors": self.redis_errors,
+        }
+
+
+user_cache = UserCache(
+    redis=get_redis() if settings.user_cache_redis_enabled else None,
+    l1_max_entries=settings.user_cache_l1_max_entries,
+    l1_ttl=settings.user_cache_l1_ttl_seconds,
+    l2_ttl=settings.user_cache_l2_ttl_seconds,
+    negative_ttl=settings.user_cache_negative_ttl_seconds,
+)
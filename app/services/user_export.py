@@ -0,0 +1,89 @@
+"""
+Streaming user export as NDJSON or CSV.
+
+Users are read through a server-side cursor (stream_scalars with
+yield_per), serialized one at a time and handed to the response in chunks
+of about 64 KiB, so memory stays flat however large the table is. The
+export has its own session: a StreamingResponse body runs after the
+request's dependencies have been closed.
+
+Only public profile fields are exported. Status and last_seen come from
+the presence store, one batch at a time.
+"""
+
+import csv
+import enum
+import io
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.models.user import User, UserStatus
+from app.schemas.serialization import public_user_serializer
+from app.services.presence import presence_store
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def stream_users(
+    status: Optional[UserStatus] = None, batch_size: int = 1000
+) -> AsyncIterator[User]:
+    """Every user (with the given status), fetched batch_size rows at a time."""
+    query = select(User)
+    if status is not None:
+        query = query.where(User.status == status)
+    async with AsyncSessionLocal() as session:
+        users = await session.stream_scalars(
+            query.execution_options(yield_per=batch_size)
+        )
+        async for batch in users.partitions():
+            await presence_store.overlay(session, batch)
+            for user in batch:
+                yield user
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def encode_users(
+    users: AsyncIterable[Any], fmt: str, chunk_size: int = 65536
+) -> AsyncIterator[bytes]:
+    """
+    Serialize users to NDJSON or CSV, yielding chunks of about chunk_size.
+
+    Raises:
+        ValueError: If fmt is not "ndjson" or "csv"
+    """
+    serializer = public_user_serializer
+    if fmt == "ndjson":
+        buffer = bytearray()
+        async for user in users:
+            buffer += serializer.one.dump_json(serializer.to_row(user))
+            buffer += b"\n"
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+        return
+
+    if fmt != "csv":
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(serializer.fields)
+    async for user in users:
+        writer.writerow([_csv_value(value) for value in serializer.values(user)])
+        if text.tell() >= chunk_size:
+            yield text.getvalue().encode()
+            text.seek(0)
+            text.truncate()
+    if text.tell():
+        yield text.getvalue().encode()
@@ -0,0 +1,198 @@
+"""
+Bulk user import from CSV or NDJSON.
+
+Records are streamed from the file in chunks, validated with UserCreate,
+hashed in parallel on a process pool and loaded with asyncpg COPY into a
+temporary staging table. Each chunk is then moved into users with
+INSERT ... ON CONFLICT DO NOTHING, so duplicates are skipped and counted
+instead of failing the whole chunk. Hashing of the next chunk overlaps with
+the COPY of the previous one.
+
+Expected fields: username, email, password, display_name.
+"""
+
+import asyncio
+import csv
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+from pydantic import ValidationError
+
+from app.core import security
+from app.core.hashing import HashingPool
+from app.core.security import configure_password_hashing, get_password_hash
+from app.db.database import engine
+from app.models.user import UserStatus
+from app.schemas.user import UserCreate
+
+logger = logging.getLogger(__name__)
+
+COPY_COLUMNS = [
+    "id",
+    "username",
+    "email",
+    "password_hash",
+    "display_name",
+    "status",
+    "created_at",
+    "updated_at",
+]
+
+
+class ImportReport:
+    """Counters for one import run."""
+
+    def __init__(self):
+        self.read = 0
+        self.invalid = 0
+        self.inserted = 0
+        self.duplicates = 0
+
+    def __repr__(self) -> str:
+        return (
+            f"<ImportReport(read={self.read}, inserted={self.inserted}, "
+            f"duplicates={self.duplicates}, invalid={self.invalid})>"
+        )
+
+
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[dict]:
+    """
+    Stream raw records from a CSV (with header) or NDJSON file.
+
+    Args:
+        path: File to read
+        fmt: "csv" or "ndjson"; guessed from the extension when None
+    """
+    if fmt is None:
+        fmt = "csv" if path.lower().endswith(".csv") else "ndjson"
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        elif fmt == "ndjson":
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"Unknown import format: {fmt!r}")
+
+
+def _chunks(records: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    chunk: list[dict] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+async def _hash_chunk(
+    pool: HashingPool, records: list[dict], report: ImportReport, rounds: int
+) -> list[tuple]:
+    """Validate a chunk and hash its passwords in parallel at the given cost."""
+    valid: list[UserCreate] = []
+    for record in records:
+        report.read += 1
+        try:
+            valid.append(UserCreate.model_validate(record))
+        except ValidationError as exc:
+            report.invalid += 1
+            # Only field names: input values would include passwords
+            fields = sorted({str(error["loc"][0]) for error in exc.errors()})
+            logger.warning("skipping invalid record %d: %s", report.read, fields)
+
+    hashes = await asyncio.gather(
+        *[pool.run(get_password_hash, user.password, rounds) for user in valid]
+    )
+    now = datetime.now(timezone.utc)
+    return [
+        (
+            uuid.uuid4(),
+            user.username,
+            user.email,
+            password_hash,
+            user.display_name,
+            UserStatus.OFFLINE.name,
+            now,
+            now,
+        )
+        for user, password_hash in zip(valid, hashes)
+    ]
+
+
+async def _copy_chunk(connection, rows: list[tuple], report: ImportReport) -> None:
+    """COPY rows into the staging table and merge them into users."""
+    if not rows:
+        return
+    async with connection.transaction():
+        await connection.execute("TRUNCATE users_import")
+        await connection.copy_records_to_table(
+            "users_import", records=rows, columns=COPY_COLUMNS
+        )
+        columns = ", ".join(COPY_COLUMNS)
+        status = await connection.execute(
+            f"INSERT INTO users ({columns}) SELECT {columns} FROM users_import "
+            "ON CONFLICT DO NOTHING"
+        )
+    # status is "INSERT 0 <count>"
+    inserted = int(status.rsplit(" ", 1)[-1])
+    report.inserted += inserted
+    report.duplicates += len(rows) - inserted
+
+
+async def import_users(
+    path: str,
+    fmt: Optional[str] = None,
+    chunk_size: int = 5000,
+    workers: Optional[int] = None,
+) -> ImportReport:
+    """
+    Import users from a CSV or NDJSON file.
+
+    Args:
+        path: File to import
+        fmt: "csv" or "ndjson"; guessed from the extension when None
+        chunk_size: Records hashed and copied per chunk
+        workers: Hashing processes (defaults to the CPU count)
+
+    Returns:
+        ImportReport with read/inserted/duplicate/invalid counts
+    """
+    report = ImportReport()
+    # Worker processes do not see the cost set on this process's context
+    rounds = security.password_hash_rounds or await configure_password_hashing()
+    workers = workers or os.cpu_count() or 1
+    pool = HashingPool(max_workers=workers, max_pending=chunk_size, kind="process")
+
+    async with engine.connect() as sa_connection:
+        raw = await sa_connection.get_raw_connection()
+        connection = raw.driver_connection
+        await connection.execute(
+            "CREATE TEMP TABLE users_import (LIKE users INCLUDING DEFAULTS)"
+        )
+
+        copying: Optional[asyncio.Task] = None
+        try:
+            for records in _chunks(iter_records(path, fmt), chunk_size):
+                rows = await _hash_chunk(pool, records, report, rounds)
+                if copying is not None:
+                    await copying
+                copying = asyncio.create_task(_copy_chunk(connection, rows, report))
+                logger.info("import progress: %r", report)
+            if copying is not None:
+                await copying
+        finally:
+            if copying is not None and not copying.done():
+                copying.cancel()
+                await asyncio.gather(copying, return_exceptions=True)
+            pool.shutdown()
+            await connection.execute("DROP TABLE IF EXISTS users_import")
+
+    return report
@@ -0,0 +1,127 @@
+"""
+Request-scoped batched user loader.
+
+All load() calls made in the same event-loop tick are coalesced into one
+`SELECT ... WHERE id = ANY(:ids)` query; keys are deduplicated and results
+are cached for the rest of the request. Status and last_seen come from the
+presence store, which may hold changes not yet flushed to the table.
+"""
+
+import asyncio
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User
+from app.schemas.user import UserPublicResponse
+from app.services.presence import Presence, presence_store
+
+_ids_param = bindparam("ids", type_=ARRAY(UUID(as_uuid=True)))
+
+
+def _as_uuid(user_id: uuid.UUID | str) -> uuid.UUID:
+    return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+
+
+class UserLoader:
+    """
+    Batches user lookups for one request.
+
+    Args:
+        db: The request's database session
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._cache: dict[uuid.UUID, asyncio.Future] = {}
+        self._queue: list[uuid.UUID] = []
+        # Running dispatches, held so they are not collected mid-query
+        self._tasks: set[asyncio.Task] = set()
+        # A session runs one statement at a time; later batches wait here
+        self._lock = asyncio.Lock()
+
+        # Stats
+        self.queries = 0
+
+    async def load(self, user_id: uuid.UUID | str) -> Optional[UserPublicResponse]:
+        """Return the public profile of a user, or None if it does not exist."""
+        user_id = _as_uuid(user_id)
+        future = self._cache.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._cache[user_id] = future
+            if not self._queue:
+                loop.call_soon(self._schedule_dispatch)
+            self._queue.append(user_id)
+        return await future
+
+    async def load_many(
+        self, user_ids: Iterable[uuid.UUID | str]
+    ) -> list[Optional[UserPublicResponse]]:
+        """Load several users with (at most) one query."""
+        return list(await asyncio.gather(*map(self.load, user_ids)))
+
+    def prime(self, user: User) -> None:
+        """Seed the cache with a user that is already loaded."""
+        user_id = user.id
+        if user_id not in self._cache:
+            profile = UserPublicResponse.model_validate(user)
+            presence = presence_store.get(user_id)
+            if presence is not None:
+                profile = profile.model_copy(update=presence._asdict())
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(profile)
+            self._cache[user_id] = future
+
+    def _schedule_dispatch(self) -> None:
+        batch, self._queue = self._queue, []
+        task = asyncio.ensure_future(self._dispatch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list[uuid.UUID]) -> None:
+        try:
+            async with self._lock:
+                self.queries += 1
+                result = await self.db.execute(
+                    select(User).where(User.id == any_(_ids_param)), {"ids": batch}
+                )
+                users = list(result.scalars())
+                loaded = {
+                    user.id: Presence(user.status, user.last_seen) for user in users
+                }
+                presence = await presence_store.get_many(
+                    self.db, loaded, loaded=loaded
+                )
+            found = {
+                user.id: UserPublicResponse.model_validate(user).model_copy(
+                    update=presence[user.id]._asdict()
+                )
+                for user in users
+            }
+        except asyncio.CancelledError:
+            self._fail(batch, None)
+            raise
+        except Exception as exc:
+            self._fail(batch, exc)
+            return
+
+        for user_id in batch:
+            future = self._cache[user_id]
+            if not future.done():
+                future.set_result(found.get(user_id))
+
+    def _fail(self, batch: list[uuid.UUID], exc: Optional[Exception]) -> None:
+        """Fail a batch's waiters with exc, or cancel them if None."""
+        for user_id in batch:
+            future = self._cache.pop(user_id)
+            if future.done():
+                continue
+            if exc is None:
+                future.cancel()
+            else:
+                future.set_exception(exc)
@@ -0,0 +1,200 @@
+"""
+In-process username index for @mention autocomplete.
+
+Autocomplete fires on every keystroke, so it is answered from a sorted
+array of (lowercased username, id) pairs held by each worker: a bisect
+finds the first match and the matches follow it contiguously. Nothing
+touches Postgres on that path.
+
+The array is loaded at startup and rebuilt periodically. In between,
+UserService pushes each created or updated user into it, and with the
+Redis broadcast bus the change is also sent to the other workers. Full
+search (substrings of usernames and display names) goes to Postgres,
+where the trigram indexes serve it.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from bisect import bisect_left, insort
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.broadcast import BroadcastBus, bus
+
+logger = logging.getLogger(__name__)
+
+
+class Mention(NamedTuple):
+    """The fields autocomplete returns for a user."""
+
+    id: uuid.UUID
+    username: str
+    display_name: str
+
+    @classmethod
+    def of(cls, user: Any) -> "Mention":
+        user_id = user.id if isinstance(user.id, uuid.UUID) else uuid.UUID(user.id)
+        return cls(user_id, user.username, user.display_name)
+
+
+def rank(key: str, prefix: str) -> tuple:
+    """Exact match first, then the shortest completions, then alphabetical."""
+    return (key != prefix, len(key), key)
+
+
+class UsernameIndex:
+    """
+    Sorted array of usernames answering prefix queries.
+
+    Args:
+        session_factory: Creates the sessions used to load all users
+        bus: Broadcast bus used to share changes with other workers
+        sync_interval: Seconds between full rebuilds from the database
+        max_scan: Matches considered for ranking per query; the rest of a
+            very short prefix's matches are ignored
+        channel: Bus channel for index changes
+    """
+
+    def __init__(
+        self,
+        session_factory: Any = AsyncSessionLocal,
+        bus: Optional[BroadcastBus] = None,
+        sync_interval: float = 300.0,
+        max_scan: int = 200,
+        channel: str = "users:index",
+    ):
+        self.session_factory = session_factory
+        self.bus = bus
+        self.sync_interval = sync_interval
+        self.max_scan = max_scan
+        self.channel = channel
+        self.keys: list[tuple[str, uuid.UUID]] = []
+        self.by_id: dict[uuid.UUID, Mention] = {}
+        self.ready = False
+        # Changes made while a load is in flight, replayed onto its result
+        self._during_load: Optional[list[Mention]] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Stats
+        self.searches = 0
+        self.updates = 0
+        self.loads = 0
+        self.load_seconds = 0.0
+
+    async def start(self) -> None:
+        """Load every user and keep the index in sync."""
+        try:
+            await self.load()
+        except (SQLAlchemyError, OSError):
+            logger.warning("username index load failed, will retry", exc_info=True)
+        if self.bus is not None:
+            self.bus.set_channel_handler(self.channel, self._on_remote_update)
+            await self.bus.subscribe(self.channel)
+        self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.bus is not None:
+            await self.bus.unsubscribe(self.channel)
+
+    async def load(self) -> None:
+        """Rebuild the index from the users table."""
+        started = time.perf_counter()
+        by_id: dict[uuid.UUID, Mention] = {}
+        self._during_load = []
+        try:
+            async with self.session_factory() as session:
+                rows = await session.stream(
+                    select(User.id, User.username, User.display_name).execution_options(
+                        yield_per=5000
+                    )
+                )
+                async for row in rows:
+                    by_id[row.id] = Mention(*row)
+            for mention in self._during_load:
+                by_id[mention.id] = mention
+        finally:
+            self._during_load = None
+
+        self.keys = sorted((m.username.lower(), m.id) for m in by_id.values())
+        self.by_id = by_id
+        self.ready = True
+        self.loads += 1
+        self.load_seconds = time.perf_counter() - started
+
+    def upsert(self, mention: Mention) -> None:
+        """Add a user, or apply a changed username or display name."""
+        self.updates += 1
+        if self._during_load is not None:
+            self._during_load.append(mention)
+        old = self.by_id.get(mention.id)
+        if old is None or old.username != mention.username:
+            if old is not None:
+                key = (old.username.lower(), old.id)
+                index = bisect_left(self.keys, key)
+                if index < len(self.keys) and self.keys[index] == key:
+                    del self.keys[index]
+            insort(self.keys, (mention.username.lower(), mention.id))
+        self.by_id[mention.id] = mention
+
+    async def publish(self, user: Any) -> None:
+        """Apply a created or updated user here and on the other workers."""
+        mention = Mention.of(user)
+        self.upsert(mention)
+        if self.bus is not None:
+            await self.bus.publish(
+                self.channel,
+                json.dumps([str(mention.id), mention.username, mention.display_name]),
+            )
+
+    def _on_remote_update(self, channel: str, data: str) -> None:
+        user_id, username, display_name = json.loads(data)
+        self.upsert(Mention(uuid.UUID(user_id), username, display_name))
+
+    def search(self, prefix: str, limit: int) -> list[Mention]:
+        """Up to `limit` users whose username starts with prefix, ranked."""
+        self.searches += 1
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, (prefix,))
+        matches = []
+        for key in self.keys[start : start + self.max_scan]:
+            if not key[0].startswith(prefix):
+                break
+            matches.append(key)
+        matches.sort(key=lambda key: rank(key[0], prefix))
+        return [self.by_id[user_id] for _, user_id in matches[:limit]]
+
+    async def _sync_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.load()
+            except (SQLAlchemyError, OSError):
+                logger.warning("username index sync failed", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "entries": len(self.keys),
+            "searches": self.searches,
+            "updates": self.updates,
+            "loads": self.loads,
+            "load_seconds": self.load_seconds,
+        }
+
+
+user_search_index = UsernameIndex(
+    bus=bus if settings.broadcast_backend == "redis" else None,
+    sync_interval=settings.user_search_sync_interval_seconds,
+)
@@ -2,33 +2,92 @@
 User service for business logic and database operations
 """
 
+import asyncio
+import logging
+import uuid
 from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import func, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from app.schemas.user import UserCreate, UserUpdate
 from app.models.user import User
-from app.core.security import get_password_hash, verify_password
+from app.core.hashing import HashingPoolFull
+from app.core.security import (
+    get_password_hash_async,
+    needs_rehash,
+    verify_dummy_password_async,
+    verify_password_async,
+)
+from app.db.database import AsyncSessionLocal
+from app.core.token_cache import token_cache
 from app.models.user import UserStatus
+from app.services.login_limiter import login_limiter
+from app.services.presence import presence_store
+from app.services.user_cache import user_cache
+from app.services.user_search import Mention, user_search_index
+
+logger = logging.getLogger(__name__)
+
+# Rehash tasks in flight; holding them keeps them from being collected
+_rehash_tasks: set[asyncio.Task] = set()
+
+
+def _conflicting_field(exc: IntegrityError) -> Optional[str]:
+    """Map a unique violation on users to the field that caused it."""
+    # asyncpg's UniqueViolationError is chained behind the DBAPI error
+    cause = exc.orig.__cause__ if exc.orig is not None else None
+    constraint = getattr(cause, "constraint_name", None) or ""
+    for field in ("username", "email"):
+        if constraint == f"ix_users_{field}":
+            return field
+    return None
+
+
+def _escape_like(value: str) -> str:
+    """Make user input match literally inside a LIKE pattern."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
 class UserService:
     """Service class for user operatins."""
 
+    @staticmethod
+    async def _get_cached(db: AsyncSession, field: str, value: str) -> Optional[User]:
+        """
+        Read-through lookup of a single user by a unique column.
+        Cached snapshots are attached to the session without a query.
+        """
+        column = getattr(User, field)
+
+        async def load() -> Optional[dict]:
+            result = await db.execute(select(User).where(column == value))
+            user = result.scalar_one_or_none()
+            return user.to_snapshot() if user else None
+
+        snapshot = await user_cache.get(field, value, load)
+        if snapshot is None:
+            return None
+        return await db.merge(User.from_snapshot(snapshot), load=False)
+
     @staticmethod
     async def get_by_id(db: AsyncSession, user_id: str) -> Optional[User]:
-        result = await db.execute(select(User).where(User.id == user_id))
-        return result.scalar_one_or_none()
+        return await UserService._get_cached(db, "id", str(user_id))
 
     @staticmethod
     async def get_by_email(db: AsyncSession, email: str) -> Optional[User]:
-        result = await db.execute(select(User).where(User.email == email))
-        return result.scalar_one_or_none()
+        return await UserService._get_cached(db, "email", email)
 
     @staticmethod
     async def get_by_username(db: AsyncSession, username: str) -> Optional[User]:
+        return await UserService._get_cached(db, "username", username)
+
+    @staticmethod
+    async def get_for_login(db: AsyncSession, username: str) -> Optional[User]:
+        """
+        Uncached lookup with the password hash, which cached snapshots lack.
+        """
         result = await db.execute(select(User).where(User.username == username))
         return result.scalar_one_or_none()
 
@@ -44,56 +103,118 @@ class UserService:
         Raises:
             ValueError: if username or email address already exists
         """
-        existing_user = UserService.get_by_username(db, user_data.username)
-        if existing_user:
-            raise ValueError("Username already registered.")
-
-        # check if email exists
-        existing_email = UserService.get_by_email(db, user_data.email)
-        if existing_email:
-            raise ValueError("Email already registered.")
-        hashed_password = get_password_hash(user_data.password)
-
-        db_user = User(
-            username=user_data.username,
-            email=user_data.email,
-            password_hash=hashed_password,
-            display_name=user_data.display_name,
-            status=UserStatus.OFFLINE,
-        )
-        db.add(db_user)
+        hashed_password = await get_password_hash_async(user_data.password)
 
+        # One INSERT ... RETURNING instead of lookups + INSERT + refresh;
+        # the unique indexes report which field was taken.
+        stmt = (
+            insert(User)
+            .values(
+                username=user_data.username,
+                email=user_data.email,
+                password_hash=hashed_password,
+                display_name=user_data.display_name,
+                status=UserStatus.OFFLINE,
+            )
+            .returning(User)
+        )
         try:
+            db_user = (await db.scalars(stmt)).one()
             await db.commit()
-            await db.refresh(db_user)
-            return db_user
-        except IntegrityError:
+        except IntegrityError as exc:
             await db.rollback()
+            field = _conflicting_field(exc)
+            if field == "username":
+                raise ValueError("Username already registered.")
+            if field == "email":
+                raise ValueError("Email already registered.")
             raise ValueError("Username or email already registered.")
 
+        await user_cache.set_user(db_user.to_snapshot())
+        await user_search_index.publish(db_user)
+        return db_user
+
     @staticmethod
     async def authenticate_user(
-        db: AsyncSession, username: str, password: str
+        db: AsyncSession,
+        username: str,
+        password: str,
+        client_ip: Optional[str] = None,
     ) -> Optional[User]:
         """
         Authenticate user with username and password.
 
+        The attempt is throttled per client IP and per username before any
+        password work, and unknown usernames cost the same verify as known
+        ones.
+
         Args:
             db:Database session
             username: username
             password: Plain password
+            client_ip: Address the attempt came from, if known
         Returns:
             User object if authentication successful, None otherwise
+        Raises:
+            LoginThrottled: If the IP or username is over its attempt budget
         """
-        user = UserService.get_by_username(db, username)
+        await login_limiter.check(username, client_ip)
+
+        user = await UserService.get_for_login(db, username)
         if not user:
+            await verify_dummy_password_async(password)
             return None
 
-        if not verify_password(password, user.password_hash):
+        if not await verify_password_async(password, user.password_hash):
             return None
 
+        if needs_rehash(user.password_hash):
+            task = asyncio.create_task(
+                UserService._rehash_password(
+                    user.to_snapshot(), user.password_hash, password
+                )
+            )
+            _rehash_tasks.add(task)
+            task.add_done_callback(_rehash_tasks.discard)
         return user
 
+    @staticmethod
+    async def _rehash_password(snapshot: dict, old_hash: str, password: str) -> None:
+        """
+        Replace a hash made at an outdated cost, after a successful login.
+
+        Runs in the background so the login response does not wait for a
+        second bcrypt. The UPDATE only applies if the stored hash is still
+        the one that was verified, so a concurrent password change wins.
+        A busy hashing pool just skips the upgrade until the next login.
+        """
+        try:
+            new_hash = await get_password_hash_async(password)
+        except HashingPoolFull:
+            return
+
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    update(User)
+                    .where(
+                        User.id == snapshot["id"],
+                        User.password_hash == old_hash,
+                    )
+                    .values(password_hash=new_hash)
+                )
+                await session.commit()
+        except SQLAlchemyError:
+            logger.warning(
+                "password rehash failed",
+                extra={"user_id": str(snapshot["id"])},
+                exc_info=True,
+            )
+            return
+
+        if result.rowcount:
+            await user_cache.invalidate(snapshot)
+
     @staticmethod
     async def update_user(db: AsyncSession, user: User, user_data: UserUpdate) -> User:
         """
@@ -112,22 +233,139 @@ class UserService:
             field: value for field, value in update_data.items() if value is not None
         }
 
-        for field, value in update_data.items():
-            setattr(user, field, value)
-        await db.commit()
-        await db.refresh(user)
+        # Presence is owned by the presence store's write-behind flusher; a
+        # direct write here would race it and could be overwritten by it
+        status = update_data.pop("status", None)
+
+        if update_data:
+            for field, value in update_data.items():
+                setattr(user, field, value)
+            await db.commit()
+            await db.refresh(user)
+            # The refreshed row may predate an unflushed presence change
+            presence = presence_store.get(user.id)
+            if presence is not None:
+                user.status, user.last_seen = presence.status, presence.last_seen
+            if "display_name" in update_data:
+                await user_search_index.publish(user)
 
+        if status is not None:
+            return await UserService.update_status(db, user, status)
+        token_cache.refresh_user(user)
+        await user_cache.set_user(user.to_snapshot())
         return user
 
+    @staticmethod
+    async def list_users(
+        db: AsyncSession,
+        status: Optional[UserStatus] = None,
+        after_id: Optional[uuid.UUID] = None,
+        limit: int = 100,
+    ) -> tuple[list[User], bool]:
+        """
+        Fetch a page of users by keyset on id.
+
+        The page starts just after after_id, so reading page n costs the
+        same as page 1. With a status filter the ix_users_status index
+        narrows the rows first; it matches the flushed status, while the
+        users returned carry their current presence.
+
+        Args:
+            db: Database session
+            status: Only users with this status
+            after_id: Only users with id > after_id
+            limit: Maximum number of users
+
+        Returns:
+            (users in ascending id order, whether more exist)
+        """
+        query = select(User)
+        if status is not None:
+            query = query.where(User.status == status)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        result = await db.scalars(query.order_by(User.id).limit(limit + 1))
+        users = list(result)
+        page = users[:limit]
+        await presence_store.overlay(db, page)
+        return page, len(users) > limit
+
+    @staticmethod
+    async def search_users(db: AsyncSession, query: str, limit: int) -> list[User]:
+        """
+        Find users whose username or display name contains the query.
+
+        Matches are ranked exact username first, then username prefixes,
+        then by trigram similarity. The pg_trgm GIN indexes serve the
+        substring LIKEs for queries of three or more characters.
+
+        Args:
+            db: Database session
+            query: Text to look for, case-insensitively
+            limit: Maximum number of users returned
+        """
+        query = query.lower()
+        pattern = _escape_like(query)
+        username = func.lower(User.username)
+        display_name = func.lower(User.display_name)
+        stmt = (
+            select(User)
+            .where(
+                or_(
+                    username.like(f"%{pattern}%", escape="\\"),
+                    display_name.like(f"%{pattern}%", escape="\\"),
+                )
+            )
+            .order_by(
+                (username == query).desc(),
+                username.like(f"{pattern}%", escape="\\").desc(),
+                func.greatest(
+                    func.similarity(username, query),
+                    func.similarity(display_name, query),
+                ).desc(),
+                username,
+            )
+            .limit(limit)
+        )
+        return list((await db.scalars(stmt)).all())
+
+    @staticmethod
+    async def autocomplete(db: AsyncSession, prefix: str, limit: int) -> list[Mention]:
+        """
+        Users whose username starts with prefix, for @mention suggestions.
+
+        Served from the in-process username index; the database (and its
+        text_pattern_ops index) is only used until the index has loaded.
+        """
+        if user_search_index.ready:
+            return user_search_index.search(prefix, limit)
+
+        prefix = prefix.lower()
+        username = func.lower(User.username)
+        stmt = (
+            select(User.id, User.username, User.display_name)
+            .where(username.like(f"{_escape_like(prefix)}%", escape="\\"))
+            .order_by(username != prefix, func.length(username), username)
+            .limit(limit)
+        )
+        return [Mention(*row) for row in await db.execute(stmt)]
+
     @staticmethod
     async def update_status(db: AsyncSession, user: User, status: UserStatus) -> User:
+        """
+        Update user presence.
+
+        The change is recorded in the presence store and written to the
+        database by its background flusher, so no commit happens here.
+        """
         from datetime import datetime, timezone
 
         user.status = status
         if status == UserStatus.OFFLINE:
             user.last_seen = datetime.now(timezone.utc)
 
-        await db.commit()
-        await db.refresh(user)
+        presence_store.set(user.id, user.status, user.last_seen)
+        token_cache.refresh_user(user)
+        await user_cache.set_user(user.to_snapshot())
 
         return user
@@ -0,0 +1,107 @@
+"""
+Benchmark WebSocket room fan-out latency.
+
+Registers N in-process fake connections in one room and measures the time
+from ConnectionManager.broadcast() until every subscriber has been handed
+the message.
+
+Usage:
+    python -m benchmarks.fanout --connections 10000 --messages 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.services.connection_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    """Stands in for an accepted WebSocket; counts received frames."""
+
+    def __init__(self, tracker: "DeliveryTracker"):
+        self.tracker = tracker
+
+    async def send_text(self, data: str) -> None:
+        self.tracker.delivered()
+
+    async def close(self, code: int = 1000) -> None:
+        pass
+
+
+class DeliveryTracker:
+    def __init__(self):
+        self.expected = 0
+        self.count = 0
+        self.done = asyncio.Event()
+
+    def reset(self, expected: int) -> None:
+        self.expected = expected
+        self.count = 0
+        self.done.clear()
+
+    def delivered(self) -> None:
+        self.count += 1
+        if self.count >= self.expected:
+            self.done.set()
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(int(len(ordered) * pct / 100), len(ordered) - 1)
+    return ordered[index]
+
+
+async def run(connections: int, messages: int, payload_size: int) -> None:
+    manager = ConnectionManager(max_queue=1024)
+    tracker = DeliveryTracker()
+
+    for i in range(connections):
+        connection = manager.connect(FakeWebSocket(tracker), user_id=f"user-{i}")
+        await manager.join(connection, "bench")
+
+    message = {"type": "message", "room": "bench", "data": "x" * payload_size}
+    latencies: list[float] = []
+    enqueue_times: list[float] = []
+
+    for _ in range(messages):
+        tracker.reset(connections)
+        started = time.perf_counter()
+        manager.broadcast("bench", message)
+        enqueued = time.perf_counter()
+        await tracker.done.wait()
+        finished = time.perf_counter()
+        enqueue_times.append(enqueued - started)
+        latencies.append(finished - started)
+
+    for connection in [c for conns in manager.by_user.values() for c in conns]:
+        await manager.disconnect(connection)
+
+    print(f"connections: {connections}, messages: {messages}")
+    print(
+        "broadcast (enqueue) ms: "
+        f"mean={statistics.mean(enqueue_times) * 1000:.2f} "
+        f"p99={percentile(enqueue_times, 99) * 1000:.2f}"
+    )
+    print(
+        "fan-out to all subscribers ms: "
+        f"p50={percentile(latencies, 50) * 1000:.2f} "
+        f"p95={percentile(latencies, 95) * 1000:.2f} "
+        f"p99={percentile(latencies, 99) * 1000:.2f} "
+        f"max={max(latencies) * 1000:.2f}"
+    )
+    print(f"deliveries/s: {connections * messages / sum(latencies):,.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--payload-size", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(run(args.connections, args.messages, args.payload_size))
+
+
+if __name__ == "__main__":
+    main()
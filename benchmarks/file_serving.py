@@ -0,0 +1,163 @@
+"""
+Benchmark file download responses against reading the file into memory.
+
+Files are stored in a temporary directory and requests are driven straight
+through the ASGI response objects, with bodies written to /dev/null:
+
+    memory      read the whole file, send it as one body (the naive route)
+    chunked     StoredFileResponse without server support: pread chunks
+    zerocopy    StoredFileResponse with http.response.zerocopysend, which
+                the stand-in server completes with os.sendfile()
+    304         If-None-Match revalidation of a cached copy
+
+The peak column is the largest traced allocation total while --concurrency
+requests are in flight, i.e. what the body buffers cost.
+
+Usage:
+    python -m benchmarks.file_serving --sizes 65536,1048576,8388608 --requests 500
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.services.file_serving import ZEROCOPY, FileServer
+from app.services.file_storage import FileStore
+
+
+class NullServer:
+    """The send side of an ASGI server, writing bodies to /dev/null."""
+
+    def __init__(self, zerocopy: bool):
+        self.extensions = {ZEROCOPY: {}} if zerocopy else {}
+        self.devnull = os.open(os.devnull, os.O_WRONLY)
+        self.bytes_sent = 0
+
+    def scope(self, path: str, headers: dict[str, str]) -> dict:
+        return {
+            "type": "http",
+            "method": "GET",
+            "path": path,
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+            "extensions": self.extensions,
+        }
+
+    async def receive(self) -> dict:
+        return {"type": "http.disconnect"}
+
+    async def send(self, message: dict) -> None:
+        if message["type"] == "http.response.body":
+            self.bytes_sent += os.write(self.devnull, message["body"])
+        elif message["type"] == ZEROCOPY:
+            self.bytes_sent += os.sendfile(
+                self.devnull,
+                message["file"].fileno(),
+                message["offset"],
+                message["count"],
+            )
+
+
+async def memory_response(server: FileServer, request: Request, key: str):
+    info = await server.lookup(key)
+
+    def read() -> bytes:
+        with open(info.path, "rb") as f:
+            return f.read()
+
+    return Response(await asyncio.to_thread(read), media_type=info.content_type)
+
+
+async def stored_response(server: FileServer, request: Request, key: str):
+    return await server.response(request, key)
+
+
+async def serve(server, null, handler, key, headers) -> None:
+    scope = null.scope(f"/files/{key}", headers)
+    response = await handler(server, Request(scope), key)
+    await response(scope, null.receive, null.send)
+
+
+async def run_mode(server, handler, key, headers, zerocopy, requests, concurrency):
+    null = NullServer(zerocopy)
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await serve(server, null, handler, key, headers)
+
+    # Peak memory with one round of concurrent requests
+    tracemalloc.start()
+    await asyncio.gather(
+        *[serve(server, null, handler, key, headers) for _ in range(concurrency)]
+    )
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    null.bytes_sent = 0
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    os.close(null.devnull)
+    return requests / elapsed, null.bytes_sent / elapsed, peak
+
+
+async def run(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as root:
+        store = FileStore(
+            root, max_size=1 << 34, image_extensions=["png"], file_extensions=[]
+        )
+        server = FileServer(store)
+        print(f"{'size':>10} {'mode':<10} {'req/s':>10} {'MB/s':>10} {'peak KiB':>10}")
+        for size in args.sizes:
+
+            async def body():
+                yield b"\x89PNG\r\n\x1a\n" + os.urandom(size - 8)
+
+            key = (await store.save(body(), "bench.png")).key
+            etag = (await server.lookup(key)).etag
+            modes = [
+                ("memory", memory_response, {}, False),
+                ("chunked", stored_response, {}, False),
+                ("zerocopy", stored_response, {}, True),
+                ("304", stored_response, {"If-None-Match": etag}, False),
+            ]
+            for name, handler, headers, zerocopy in modes:
+                rate, throughput, peak = await run_mode(
+                    server,
+                    handler,
+                    key,
+                    headers,
+                    zerocopy,
+                    args.requests,
+                    args.concurrency,
+                )
+                print(
+                    f"{size:>10} {name:<10} {rate:>10,.0f} "
+                    f"{throughput / 1e6:>10,.0f} {peak / 1024:>10,.0f}"
+                )
+
+
+def parse_sizes(value: str) -> list[int]:
+    return [int(size) for size in value.split(",")]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes", type=parse_sizes, default=[65536, 1048576, 8388608]
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
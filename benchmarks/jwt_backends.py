@@ -0,0 +1,82 @@
+"""
+Benchmark JWT encode/decode throughput per backend and algorithm.
+
+Keys are generated for the run, so no configuration is needed. "settings"
+is the pre-refactor path for comparison: python-jose re-parsing the
+secret from settings on every call.
+
+Usage:
+    python -m benchmarks.jwt_backends --number 5000
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timedelta, timezone
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jose import jwt as jose_jwt
+
+from app.core.jwt import BACKENDS, SigningKey
+
+SECRET = "benchmark-secret"
+
+
+def make_key(algorithm: str) -> SigningKey:
+    if algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        return SigningKey(algorithm, secret=SECRET)
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    return SigningKey(algorithm, private_key_pem=pem)
+
+
+def claims() -> dict:
+    return {
+        "sub": "550e8400-e29b-41d4-a716-446655440000",
+        "type": "access",
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=30),
+    }
+
+
+def ops_per_sec(fn, number: int) -> float:
+    return number / min(timeit.repeat(fn, number=number, repeat=5))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<10} {'algorithm':<8} {'encode/s':>12} {'decode/s':>12}")
+
+    token = jose_jwt.encode(claims(), SECRET, algorithm="HS256")
+    encode = ops_per_sec(
+        lambda: jose_jwt.encode(claims(), SECRET, algorithm="HS256"), args.number
+    )
+    decode = ops_per_sec(
+        lambda: jose_jwt.decode(token, SECRET, algorithms="HS256"), args.number
+    )
+    print(f"{'settings':<10} {'HS256':<8} {encode:>12,.0f} {decode:>12,.0f}")
+
+    for algorithm in ("HS256", "ES256", "EdDSA"):
+        key = make_key(algorithm)
+        for name, backend_class in BACKENDS.items():
+            if algorithm not in backend_class.algorithms:
+                print(f"{name:<10} {algorithm:<8} {'unsupported':>12}")
+                continue
+            backend = backend_class(key)
+            token = backend.encode(claims())
+            encode = ops_per_sec(lambda: backend.encode(claims()), args.number)
+            decode = ops_per_sec(lambda: backend.decode(token), args.number)
+            print(f"{name:<10} {algorithm:<8} {encode:>12,.0f} {decode:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
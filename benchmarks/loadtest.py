@@ -0,0 +1,342 @@
+"""
+Load-test the REST API with scripted scenarios.
+
+By default the FastAPI app is driven in-process through httpx's ASGI
+transport (its lifespan is run too), so no server is needed; pass --url to
+hit a running uvicorn instead. Either way the app needs its database
+(apply migrations first, DEBUG=false so SQL echo does not dominate).
+
+Each of --concurrency virtual users runs the scenario in a loop for
+--duration seconds. Per endpoint the report shows throughput, latency
+percentiles and the error rate (unexpected status codes and transport
+errors). In-process runs disable login throttling unless
+LOGIN_LIMIT_ENABLED is set, since every virtual user shares one address.
+
+Scenarios:
+    signup   every iteration registers a new account
+    login    log in to one of the pre-registered accounts
+    profile  authenticated GET /users/me and GET /users/{id}
+    mix      mostly profile reads, plus profile updates, logins,
+             token refreshes and the odd signup
+
+Usage:
+    DEBUG=false python -m benchmarks.loadtest mix --concurrency 50 --duration 30
+    python -m benchmarks.loadtest login --url http://127.0.0.1:8000 --json out.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+API = "/api/v1"
+PASSWORD = "loadtest-password"
+
+
+class Recorder:
+    """Latencies, status codes and errors per endpoint label."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+        self.errors: Counter = Counter()
+        self.recording = False
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        label: str,
+        method: str,
+        url: str,
+        expected: tuple[int, ...] = (200,),
+        **kwargs,
+    ) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            if self.recording:
+                self.errors[label] += 1
+                self.statuses[label][type(exc).__name__] += 1
+            return None
+        if self.recording:
+            self.latencies[label].append(time.perf_counter() - started)
+            self.statuses[label][response.status_code] += 1
+            if response.status_code not in expected:
+                self.errors[label] += 1
+        return response if response.status_code in expected else None
+
+
+def percentile(ordered: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Account:
+    def __init__(self, username: str, user_id: str, access: str, refresh: str):
+        self.username = username
+        self.user_id = user_id
+        self.access = access
+        self.refresh = refresh
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.access}"}
+
+
+class LoadTest:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder):
+        self.client = client
+        self.recorder = recorder
+        self.run_id = uuid.uuid4().hex[:8]
+        self.accounts: list[Account] = []
+        self._serial = 0
+
+    def _new_identity(self) -> dict:
+        self._serial += 1
+        name = f"lt_{self.run_id}_{self._serial}"
+        return {
+            "username": name,
+            "email": f"{name}@loadtest.example.com",
+            "password": PASSWORD,
+            "display_name": name,
+        }
+
+    async def signup(self) -> Optional[dict]:
+        identity = self._new_identity()
+        response = await self.recorder.request(
+            self.client,
+            "POST /auth/register",
+            "POST",
+            f"{API}/auth/register",
+            expected=(201,),
+            json=identity,
+        )
+        return identity if response is not None else None
+
+    async def login(self, username: str) -> Optional[dict]:
+        response = await self.recorder.request(
+            self.client,
+            "POST /auth/login",
+            "POST",
+            f"{API}/auth/login",
+            json={"username": username, "password": PASSWORD},
+        )
+        return response.json() if response is not None else None
+
+    async def create_accounts(self, count: int) -> None:
+        """Register and log in `count` accounts, outside the measurement."""
+
+        async def create() -> None:
+            identity = await self.signup()
+            tokens = identity and await self.login(identity["username"])
+            if not tokens:
+                return
+            response = await self.client.get(
+                f"{API}/users/me",
+                headers={"Authorization": f"Bearer {tokens['access_token']}"},
+            )
+            self.accounts.append(
+                Account(
+                    identity["username"],
+                    response.json()["id"],
+                    tokens["access_token"],
+                    tokens["refresh_token"],
+                )
+            )
+
+        await asyncio.gather(*[create() for _ in range(count)])
+        if not self.accounts:
+            raise SystemExit("could not create any accounts; is the app healthy?")
+
+    # Scenario steps, one iteration each
+
+    async def step_signup(self) -> None:
+        await self.signup()
+
+    async def step_login(self) -> None:
+        await self.login(random.choice(self.accounts).username)
+
+    async def step_profile(self) -> None:
+        account = random.choice(self.accounts)
+        await self.recorder.request(
+            self.client,
+            "GET /users/me",
+            "GET",
+            f"{API}/users/me",
+            headers=account.headers,
+        )
+        other = random.choice(self.accounts)
+        await self.recorder.request(
+            self.client,
+            "GET /users/{user_id}",
+            "GET",
+            f"{API}/users/{other.user_id}",
+            headers=account.headers,
+        )
+
+    async def step_update(self) -> None:
+        account = random.choice(self.accounts)
+        await self.recorder.request(
+            self.client,
+            "PATCH /users/me",
+            "PATCH",
+            f"{API}/users/me",
+            headers=account.headers,
+            json={"display_name": f"{account.username} {random.randint(0, 999)}"},
+        )
+
+    async def step_refresh(self) -> None:
+        account = random.choice(self.accounts)
+        response = await self.recorder.request(
+            self.client,
+            "POST /auth/refresh",
+            "POST",
+            f"{API}/auth/refresh",
+            json={"refresh_token": account.refresh},
+        )
+        if response is not None:
+            tokens = response.json()
+            account.access = tokens["access_token"]
+            account.refresh = tokens["refresh_token"]
+
+    async def step_mix(self) -> None:
+        roll = random.random()
+        if roll < 0.70:
+            await self.step_profile()
+        elif roll < 0.85:
+            await self.step_update()
+        elif roll < 0.93:
+            await self.step_refresh()
+        elif roll < 0.98:
+            await self.step_login()
+        else:
+            await self.step_signup()
+
+
+SCENARIOS: dict[str, tuple[bool, Callable[[LoadTest], Callable[[], Awaitable]]]] = {
+    # name -> (needs accounts, step)
+    "signup": (False, lambda test: test.step_signup),
+    "login": (True, lambda test: test.step_login),
+    "profile": (True, lambda test: test.step_profile),
+    "mix": (True, lambda test: test.step_mix),
+}
+
+
+async def drive(step: Callable[[], Awaitable], concurrency: int, duration: float):
+    deadline = time.monotonic() + duration
+
+    async def virtual_user() -> None:
+        while time.monotonic() < deadline:
+            await step()
+
+    await asyncio.gather(*[virtual_user() for _ in range(concurrency)])
+
+
+def report(recorder: Recorder, elapsed: float) -> dict:
+    summary = {}
+    print(
+        f"{'endpoint':<24} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'max ms':>8} {'errors':>8}"
+    )
+    for label in sorted(recorder.statuses):
+        ordered = sorted(recorder.latencies[label])
+        total = sum(recorder.statuses[label].values())
+        errors = recorder.errors[label]
+        stats = {
+            "requests": total,
+            "throughput": total / elapsed,
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+            "error_rate": errors / total if total else 0.0,
+            "statuses": {str(k): v for k, v in recorder.statuses[label].items()},
+        }
+        summary[label] = stats
+        print(
+            f"{label:<24} {stats['throughput']:>9,.1f} {stats['p50_ms']:>8.1f} "
+            f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+            f"{stats['max_ms']:>8.1f} {stats['error_rate']:>7.1%}"
+        )
+    return summary
+
+
+async def run(args: argparse.Namespace) -> None:
+    # httpx logs every request at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        else:
+            # Every virtual user logs in from the same address
+            os.environ.setdefault("LOGIN_LIMIT_ENABLED", "false")
+            os.environ.setdefault("TOKEN_STORE_BACKEND", "memory")
+            from app.main import app
+
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app, raise_app_exceptions=False),
+                base_url="http://loadtest",
+                timeout=args.timeout,
+            )
+        await stack.enter_async_context(client)
+
+        recorder = Recorder()
+        test = LoadTest(client, recorder)
+        needs_accounts, make_step = SCENARIOS[args.scenario]
+        if needs_accounts:
+            await test.create_accounts(args.accounts or args.concurrency)
+
+        recorder.recording = True
+        started = time.monotonic()
+        await drive(make_step(test), args.concurrency, args.duration)
+        elapsed = time.monotonic() - started
+
+    print(
+        f"scenario {args.scenario}: {args.concurrency} users for {elapsed:.1f}s "
+        f"({'in-process' if not args.url else args.url})\n"
+    )
+    summary = report(recorder, elapsed)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "scenario": args.scenario,
+                    "concurrency": args.concurrency,
+                    "duration": elapsed,
+                    "endpoints": summary,
+                },
+                f,
+                indent=2,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument(
+        "--accounts", type=int, help="pre-registered accounts (default: concurrency)"
+    )
+    parser.add_argument("--url", help="target a running server instead of in-process")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark the latency cost of logging one INFO line per request.
+
+A minimal FastAPI app with the request id middleware logs on every request
+while concurrent clients hit it through httpx's in-process ASGI transport.
+Three setups are compared: logging disabled, a JSON StreamHandler writing
+to a file directly on the event loop, and the queued writer from
+app.core.logger writing to the same kind of file. --sink-latency-ms makes
+every write() sleep, to mimic stdout piped into a slow log collector.
+
+Usage:
+    python -m benchmarks.log_overhead --requests 20000 --concurrency 100
+    python -m benchmarks.log_overhead --sink-latency-ms 0.2
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import tempfile
+import time
+from typing import TextIO
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.logger import JSONFormatter, setup_logging, shutdown_logging
+from app.core.middleware import RequestIdMiddleware
+
+logger = logging.getLogger("benchmarks.log_overhead")
+
+
+class SlowSink:
+    """File wrapper whose writes block for a fixed time."""
+
+    def __init__(self, file: TextIO, latency: float):
+        self.file = file
+        self.latency = latency
+
+    def write(self, text: str) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.file.write(text)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+
+    @app.get("/ping")
+    async def ping():
+        logger.info("ping served", extra={"route": "/ping"})
+        return {"ok": True}
+
+    return app
+
+
+async def load(app: FastAPI, requests: int, concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+
+        async def client(count: int) -> None:
+            for _ in range(count):
+                started = time.perf_counter()
+                await c.get("/ping")
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(
+            *[client(requests // concurrency) for _ in range(concurrency)]
+        )
+    return latencies
+
+
+def report(label: str, latencies: list[float], elapsed: float) -> None:
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(
+        f"{label:<10} {len(latencies) / elapsed:>9,.0f} req/s  "
+        f"p50 {statistics.median(latencies) * 1e6:>7.0f}us  p99 {p99 * 1e6:>7.0f}us"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    app = build_app()
+    root = logging.getLogger()
+
+    with tempfile.TemporaryFile("w") as file:
+        out = SlowSink(file, args.sink_latency_ms / 1000)
+        for label in ("off", "direct", "queued"):
+            if label == "queued":
+                setup_logging("INFO", stream=out)
+            else:
+                root.handlers.clear()
+                if label == "direct":
+                    handler = logging.StreamHandler(out)
+                    handler.setFormatter(JSONFormatter())
+                    root.addHandler(handler)
+                    root.setLevel(logging.INFO)
+                else:
+                    root.setLevel(logging.WARNING)
+
+            await load(app, args.concurrency * 10, args.concurrency)  # warm up
+            started = time.perf_counter()
+            latencies = await load(app, args.requests, args.concurrency)
+            report(label, latencies, time.perf_counter() - started)
+
+            if label == "queued":
+                shutdown_logging()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--sink-latency-ms", type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark message insert throughput: per-message commits vs group commit.
+
+Runs against the database in settings.database_url (apply migrations
+first). A throwaway user and conversation are created and removed again.
+Set DEBUG=false so SQL echo does not dominate the timings.
+
+Usage:
+    DEBUG=false python -m benchmarks.message_writes --messages 5000 --senders 100
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import delete
+
+from app.db.database import AsyncSessionLocal, engine
+from app.models.conversation import Conversation
+from app.models.user import User, UserStatus
+from app.services.message_service import MessageService
+from app.services.message_writer import MessageWriteQueue
+
+
+async def setup() -> tuple[uuid.UUID, uuid.UUID]:
+    async with AsyncSessionLocal() as session:
+        name = f"bench_{uuid.uuid4().hex[:12]}"
+        user = User(
+            username=name,
+            email=f"{name}@example.com",
+            password_hash="x",
+            display_name=name,
+            status=UserStatus.OFFLINE,
+        )
+        session.add(user)
+        await session.flush()
+        conversation = Conversation(title="bench", created_by=user.id, last_seq=0)
+        session.add(conversation)
+        await session.commit()
+        return user.id, conversation.id
+
+
+async def teardown(user_id: uuid.UUID, conversation_id: uuid.UUID) -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            delete(Conversation).where(Conversation.id == conversation_id)
+        )
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+async def per_message(user_id, conversation_id, messages: int, senders: int) -> float:
+    async def sender(count: int) -> None:
+        for i in range(count):
+            async with AsyncSessionLocal() as session:
+                await MessageService.send_message(
+                    session, conversation_id, user_id, f"message {i}"
+                )
+
+    started = time.perf_counter()
+    await asyncio.gather(*[sender(messages // senders) for _ in range(senders)])
+    return time.perf_counter() - started
+
+
+async def group_commit(
+    user_id, conversation_id, messages: int, senders: int, batch: int, linger: float
+) -> tuple[float, dict]:
+    queue = MessageWriteQueue(AsyncSessionLocal, max_batch=batch, linger=linger)
+    queue.start()
+
+    async def sender(count: int) -> None:
+        for i in range(count):
+            await queue.submit(conversation_id, user_id, f"message {i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*[sender(messages // senders) for _ in range(senders)])
+    elapsed = time.perf_counter() - started
+    await queue.stop()
+    return elapsed, queue.stats()
+
+
+async def run(args: argparse.Namespace) -> None:
+    user_id, conversation_id = await setup()
+    total = (args.messages // args.senders) * args.senders
+    try:
+        elapsed = await per_message(user_id, conversation_id, total, args.senders)
+        print(f"per-message commit: {total / elapsed:,.0f} msg/s ({elapsed:.2f}s)")
+
+        elapsed, stats = await group_commit(
+            user_id,
+            conversation_id,
+            total,
+            args.senders,
+            args.batch_size,
+            args.linger_ms / 1000,
+        )
+        print(
+            f"group commit:       {total / elapsed:,.0f} msg/s ({elapsed:.2f}s, "
+            f"{stats['batches']} batches, "
+            f"{stats['rows_written'] / max(stats['batches'], 1):.1f} rows/batch)"
+        )
+    finally:
+        await teardown(user_id, conversation_id)
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--senders", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--linger-ms", type=float, default=5.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
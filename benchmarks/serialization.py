@@ -0,0 +1,78 @@
+"""
+Benchmark user response serialization.
+
+Compares the default FastAPI path (response-model validation from ORM
+attributes, jsonable_encoder, stdlib json) with the precompiled
+TypeAdapter path in app.schemas.serialization, for 1, 100 and 10k users.
+
+Usage:
+    python -m benchmarks.serialization
+"""
+
+import argparse
+import json
+import timeit
+import uuid
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.user import User, UserStatus
+from app.schemas.serialization import user_serializer
+from app.schemas.user import UserResponse
+
+
+def make_users(count: int) -> list[User]:
+    now = datetime.now(timezone.utc)
+    return [
+        User(
+            id=uuid.uuid4(),
+            username=f"user_{i}",
+            email=f"user_{i}@example.com",
+            password_hash="x",
+            display_name=f"User {i}",
+            avatar_url=None,
+            status=UserStatus.ONLINE,
+            last_seen=now,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def default_path(users: list[User]) -> bytes:
+    models = [UserResponse.model_validate(user) for user in users]
+    return json.dumps(
+        jsonable_encoder(models),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def fast_path(users: list[User]) -> bytes:
+    return user_serializer.dump_many(users)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark user serialization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    print(f"{'users':>7} {'default (ms)':>14} {'fast (ms)':>11} {'speedup':>8}")
+    for size in args.sizes:
+        users = make_users(size)
+        assert json.loads(default_path(users)) == json.loads(fast_path(users))
+
+        number = max(1, 20000 // size)
+        default = min(timeit.repeat(lambda: default_path(users), number=number, repeat=5))
+        fast = min(timeit.repeat(lambda: fast_path(users), number=number, repeat=5))
+        default_ms = default / number * 1000
+        fast_ms = fast / number * 1000
+        print(f"{size:>7} {default_ms:>14.3f} {fast_ms:>11.3f} {default_ms / fast_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""
+Benchmark suite for the auth, schema and user-service hot paths.
+
+`run` times every case and writes the results as JSON; `compare` diffs two
+result files and exits non-zero when a case got slower than the threshold.
+Save a run on main as the baseline and compare branches against it:
+
+    python -m benchmarks.suite run --output benchmarks/baselines/main.json
+    python -m benchmarks.suite run --compare benchmarks/baselines/main.json
+    python -m benchmarks.suite compare old.json new.json --threshold 0.1
+
+UserService cases run against StandInSession, an in-memory database
+stand-in that answers the statements UserService issues, so SQLAlchemy
+statement building, ORM object handling and the user cache are measured
+without a server. Redis is disabled for the run. Hashing cases are slow by
+design; they use PASSWORD_HASH_ROUNDS, or PASSWORD_HASH_MIN_ROUNDS when
+that is 0, since a calibrated cost depends on the host and would make
+results from different machines incomparable.
+"""
+
+import os
+
+# Before app imports: the suite measures in-process code only
+os.environ.setdefault("LOGIN_LIMIT_ENABLED", "false")
+os.environ.setdefault("USER_CACHE_REDIS_ENABLED", "false")
+os.environ.setdefault("TOKEN_STORE_BACKEND", "memory")
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import fnmatch  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import statistics  # noqa: E402
+import subprocess  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+import uuid  # noqa: E402
+from datetime import datetime, timezone  # noqa: E402
+from typing import Any, Callable, NamedTuple, Optional  # noqa: E402
+
+from sqlalchemy.sql.dml import Insert  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import (  # noqa: E402
+    create_access_token,
+    decode_token,
+    get_password_hash,
+    hashing_pool,
+    verify_password,
+)
+from app.models.user import User, UserStatus  # noqa: E402
+from app.schemas.user import UserCreate, UserResponse, UserUpdate  # noqa: E402
+from app.services.user_cache import user_cache  # noqa: E402
+from app.services.user_service import UserService  # noqa: E402
+
+DEFAULT_OUTPUT = "benchmarks/results/latest.json"
+
+
+class Case(NamedTuple):
+    name: str
+    fn: Callable[[], Any]
+    number: int
+    repeat: int
+
+
+CASES: list[Case] = []
+
+
+def case(name: str, number: int = 1000, repeat: int = 7):
+    """Register a sync or async zero-argument function as a benchmark case."""
+
+    def register(fn):
+        CASES.append(Case(name, fn, number, repeat))
+        return fn
+
+    return register
+
+
+class _Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def scalar_one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+    def one(self):
+        (row,) = self.rows
+        return row
+
+
+class StandInSession:
+    """
+    In-memory stand-in for the AsyncSession calls UserService makes.
+
+    SELECTs of User by one equality condition and INSERT ... RETURNING User
+    are answered from a dict of rows; commit/refresh/merge are no-ops.
+    """
+
+    def __init__(self):
+        self.rows: dict[uuid.UUID, User] = {}
+
+    async def execute(self, stmt, params=None) -> _Result:
+        criterion = stmt.whereclause
+        field, value = criterion.left.key, criterion.right.value
+        if field == "id":
+            value = uuid.UUID(str(value))
+        rows = [user for user in self.rows.values() if getattr(user, field) == value]
+        return _Result(rows[:1])
+
+    async def scalars(self, stmt) -> _Result:
+        assert isinstance(stmt, Insert)
+        # Columns with Python-side defaults compile to None here
+        values = {k: v for k, v in stmt.compile().params.items() if v is not None}
+        now = datetime.now(timezone.utc)
+        values.setdefault("id", uuid.uuid4())
+        values.setdefault("created_at", now)
+        values.setdefault("updated_at", now)
+        user = User(**values)
+        self.rows[user.id] = user
+        return _Result([user])
+
+    async def merge(self, instance, load=True):
+        return instance
+
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+    async def refresh(self, instance) -> None:
+        pass
+
+
+# Fixtures shared by the cases
+
+NOW = datetime.now(timezone.utc)
+PASSWORD = "correct horse battery staple"
+HASH_ROUNDS = settings.password_hash_rounds or settings.password_hash_min_rounds
+PASSWORD_HASH = get_password_hash(PASSWORD, HASH_ROUNDS)
+TOKEN = create_access_token({"sub": str(uuid.uuid4())})
+USER_CREATE_DATA = {
+    "username": "benchmark_user",
+    "email": "benchmark@example.com",
+    "password": PASSWORD,
+    "display_name": "Benchmark User",
+}
+USER = User(
+    id=uuid.uuid4(),
+    username="existing_user",
+    email="existing@example.com",
+    password_hash=PASSWORD_HASH,
+    display_name="Existing User",
+    avatar_url=None,
+    status=UserStatus.ONLINE,
+    last_seen=NOW,
+    created_at=NOW,
+    updated_at=NOW,
+)
+DB = StandInSession()
+DB.rows[USER.id] = USER
+_counter = iter(range(10**9))
+
+
+# Tokens
+
+
+@case("tokens.create_access_token", number=2000)
+def _create_access_token():
+    create_access_token({"sub": "550e8400-e29b-41d4-a716-446655440000"})
+
+
+@case("tokens.decode_token", number=2000)
+def _decode_token():
+    decode_token(TOKEN)
+
+
+# Password hashing (HASH_ROUNDS)
+
+
+@case("hashing.get_password_hash", number=1, repeat=5)
+def _hash():
+    get_password_hash(PASSWORD, HASH_ROUNDS)
+
+
+@case("hashing.verify_password", number=1, repeat=5)
+def _verify():
+    verify_password(PASSWORD, PASSWORD_HASH)
+
+
+# Schemas
+
+
+@case("schemas.UserCreate.validate", number=5000)
+def _user_create():
+    UserCreate.model_validate(USER_CREATE_DATA)
+
+
+@case("schemas.UserResponse.from_orm", number=5000)
+def _user_response():
+    UserResponse.model_validate(USER)
+
+
+@case("schemas.UserResponse.dump_json", number=5000)
+def _user_response_json():
+    UserResponse.model_validate(USER).model_dump_json()
+
+
+# UserService against the stand-in session
+
+
+@case("service.get_by_id.cached", number=2000)
+async def _get_by_id():
+    await UserService.get_by_id(DB, USER.id)
+
+
+@case("service.get_by_username.uncached", number=2000)
+async def _get_by_username():
+    user_cache.l1.clear()
+    await UserService.get_by_username(DB, USER.username)
+
+
+@case("service.get_by_email.uncached", number=2000)
+async def _get_by_email():
+    user_cache.l1.clear()
+    await UserService.get_by_email(DB, USER.email)
+
+
+@case("service.create_user", number=5, repeat=5)
+async def _create_user():
+    n = next(_counter)
+    data = UserCreate(
+        username=f"bench_user_{n}",
+        email=f"bench_{n}@example.com",
+        password=PASSWORD,
+        display_name="Bench",
+    )
+    await UserService.create_user(DB, data)
+
+
+@case("service.authenticate_user", number=5, repeat=5)
+async def _authenticate_user():
+    await UserService.authenticate_user(DB, USER.username, PASSWORD)
+
+
+@case("service.update_user", number=2000)
+async def _update_user():
+    await UserService.update_user(DB, USER, UserUpdate(display_name="Renamed"))
+
+
+@case("service.update_status", number=2000)
+async def _update_status():
+    await UserService.update_status(DB, USER, UserStatus.AWAY)
+
+
+async def _measure(bench: Case) -> dict:
+    is_async = asyncio.iscoroutinefunction(bench.fn)
+
+    async def sample() -> float:
+        started = time.perf_counter()
+        if is_async:
+            for _ in range(bench.number):
+                await bench.fn()
+        else:
+            for _ in range(bench.number):
+                bench.fn()
+        return (time.perf_counter() - started) / bench.number
+
+    await sample()  # warm up caches and lazy initialisation
+    samples = sorted([await sample() for _ in range(bench.repeat)])
+    median = statistics.median(samples)
+    return {
+        "number": bench.number,
+        "repeat": bench.repeat,
+        "min_us": samples[0] * 1e6,
+        "median_us": median * 1e6,
+        "max_us": samples[-1] * 1e6,
+        "stdev_us": statistics.stdev(samples) * 1e6 if len(samples) > 1 else 0.0,
+        "ops_per_sec": 1 / median if median else float("inf"),
+    }
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_cases(pattern: str) -> dict:
+    results = {}
+    for bench in CASES:
+        if not fnmatch.fnmatch(bench.name, pattern):
+            continue
+        results[bench.name] = await _measure(bench)
+        stats = results[bench.name]
+        print(
+            f"{bench.name:<36} {stats['median_us']:>12.2f}us "
+            f"{stats['ops_per_sec']:>12,.0f} ops/s"
+        )
+    await asyncio.to_thread(hashing_pool.shutdown)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "bcrypt_rounds": HASH_ROUNDS,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Print a comparison table and return the names of regressed cases.
+
+    A case regresses when its median is more than `threshold` (a fraction)
+    slower than in the baseline.
+    """
+    regressions = []
+    old, new = baseline["results"], current["results"]
+    for name in sorted(old.keys() & new.keys()):
+        ratio = new[name]["median_us"] / old[name]["median_us"]
+        if ratio > 1 + threshold:
+            verdict = "REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            verdict = "improved"
+        else:
+            verdict = ""
+        print(
+            f"{name:<36} {old[name]['median_us']:>12.2f}us "
+            f"{new[name]['median_us']:>12.2f}us {ratio:>7.2f}x  {verdict}"
+        )
+    for name in sorted(old.keys() - new.keys()):
+        print(f"{name:<36} missing from current run")
+    return regressions
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save(path: str, data: dict) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+        f.write("\n")
+
+
+def _report_regressions(regressions: list[str], threshold: float) -> int:
+    if regressions:
+        print(
+            f"\n{len(regressions)} case(s) slower than the baseline by more "
+            f"than {threshold:.0%}: {', '.join(regressions)}"
+        )
+        return 1
+    print("\nno regressions")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and save the results")
+    run.add_argument("--filter", default="*", help="glob on case names")
+    run.add_argument("--output", default=DEFAULT_OUTPUT)
+    run.add_argument("--compare", metavar="BASELINE", help="compare after running")
+    run.add_argument("--threshold", type=float, default=0.10)
+
+    diff = commands.add_parser("compare", help="compare two result files")
+    diff.add_argument("baseline")
+    diff.add_argument("current", nargs="?", default=DEFAULT_OUTPUT)
+    diff.add_argument("--threshold", type=float, default=0.10)
+
+    args = parser.parse_args()
+    if args.command == "run":
+        current = asyncio.run(run_cases(args.filter))
+        _save(args.output, current)
+        print(f"\nresults written to {args.output}")
+        if args.compare:
+            print()
+            regressions = compare(_load(args.compare), current, args.threshold)
+            sys.exit(_report_regressions(regressions, args.threshold))
+    else:
+        regressions = compare(_load(args.baseline), _load(args.current), args.threshold)
+        sys.exit(_report_regressions(regressions, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+Bulk import users from a CSV or NDJSON file.
+
+Usage:
+    DEBUG=false python -m scripts.import_users users.ndjson --chunk-size 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from app.db.database import engine
+from app.services.user_import import import_users
+
+
+async def main(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    try:
+        report = await import_users(
+            args.path, fmt=args.format, chunk_size=args.chunk_size, workers=args.workers
+        )
+    finally:
+        await engine.dispose()
+
+    elapsed = time.perf_counter() - started
+    print(f"{report} in {elapsed:.1f}s ({report.read / elapsed:,.0f} records/s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import users")
+    parser.add_argument("path", help="CSV (with header) or NDJSON file")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=None)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(parser.parse_args()))
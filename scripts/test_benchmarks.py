@@ -0,0 +1,46 @@
+"""
+Test the benchmark suite's comparison and that every case still runs
+"""
+
+import asyncio
+import os
+
+import pytest
+
+# Settings are built from the real environment before the suite adds its
+# defaults, and those defaults are not left behind for other tests
+from app.core.config import settings  # noqa: F401
+
+_environ = dict(os.environ)
+from benchmarks import suite  # noqa: E402
+
+os.environ.clear()
+os.environ.update(_environ)
+
+
+def results(**medians):
+    return {"results": {name: {"median_us": us} for name, us in medians.items()}}
+
+
+def test_compare_flags_only_cases_past_the_threshold(capsys):
+    baseline = results(same=100.0, slower=100.0, faster=100.0, dropped=5.0)
+    current = results(same=105.0, slower=125.0, faster=50.0, added=1.0)
+
+    assert suite.compare(baseline, current, threshold=0.1) == ["slower"]
+    table = capsys.readouterr().out
+    assert "REGRESSION" in table and "improved" in table
+    assert "dropped" in table and "missing from current run" in table
+    assert suite.compare(baseline, current, threshold=0.3) == []
+
+    assert suite._report_regressions(["slower"], 0.1) == 1
+    assert suite._report_regressions([], 0.1) == 0
+
+
+@pytest.mark.parametrize(
+    "bench",
+    [bench for bench in suite.CASES if not bench.name.startswith("hashing.")],
+    ids=lambda bench: bench.name,
+)
+def test_case_runs(bench):
+    stats = asyncio.run(suite._measure(bench._replace(number=2, repeat=2)))
+    assert 0 < stats["min_us"] <= stats["median_us"] <= stats["max_us"]
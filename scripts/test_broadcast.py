@@ -0,0 +1,148 @@
+"""
+Test cross-worker broadcast over a stand-in for Redis pub/sub
+"""
+
+import asyncio
+
+from redis.exceptions import ConnectionError
+
+from app.services.broadcast import MemoryBroadcastBus, RedisBroadcastBus
+
+
+class FakeRedis:
+    """Pub/sub shared by every bus built on it, like one Redis server."""
+
+    def __init__(self):
+        self.subscribers: list["FakePubSub"] = []
+        self.pipelines: list[int] = []
+        self.fail = False
+
+    def pubsub(self):
+        pubsub = FakePubSub()
+        self.subscribers.append(pubsub)
+        return pubsub
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis: FakeRedis):
+        self.redis = redis
+        self.commands: list[tuple[str, str]] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def publish(self, channel, data):
+        self.commands.append((channel, data))
+
+    async def execute(self):
+        if self.redis.fail:
+            raise ConnectionError("Redis went away")
+        self.redis.pipelines.append(len(self.commands))
+        for channel, data in self.commands:
+            for pubsub in self.redis.subscribers:
+                if channel in pubsub.channels:
+                    pubsub.queue.put_nowait(
+                        {
+                            "type": "message",
+                            "channel": channel.encode(),
+                            "data": data.encode(),
+                        }
+                    )
+
+
+class FakePubSub:
+    def __init__(self):
+        self.channels: set[str] = set()
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def subscribe(self, channel):
+        self.channels.add(channel)
+
+    async def unsubscribe(self, channel):
+        self.channels.discard(channel)
+
+    async def aclose(self):
+        pass
+
+    async def get_message(self, ignore_subscribe_messages=True, timeout=None):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+async def settle(done=lambda: False):
+    """Let the bus tasks run until done() or they go quiet."""
+    for _ in range(1000):
+        if done():
+            return
+        await asyncio.sleep(0)
+
+
+def test_publishes_reach_other_workers_in_order_and_batched():
+    async def run():
+        redis = FakeRedis()
+        sender = RedisBroadcastBus(redis, batch_size=100)
+        receiver = RedisBroadcastBus(redis, batch_size=100)
+        received, echoed = [], []
+        receiver.set_handler(lambda channel, data: received.append((channel, data)))
+        sender.set_handler(lambda channel, data: echoed.append(data))
+        for bus in (sender, receiver):
+            await bus.start()
+        await receiver.subscribe("lobby")
+
+        for n in range(250):
+            await sender.publish("lobby", str(n))
+        await sender.publish("elsewhere", "ignored")
+        await settle(lambda: len(received) == 250)
+        for bus in (sender, receiver):
+            await bus.stop()
+        return redis, sender, receiver, received, echoed
+
+    redis, sender, receiver, received, echoed = asyncio.run(run())
+    assert received == [("lobby", str(n)) for n in range(250)]
+    assert echoed == []
+    # Queued while nothing was in flight, so split only by batch_size
+    assert redis.pipelines == [100, 100, 51]
+    assert sender.stats()["published"] == 251
+    assert receiver.stats()["delivered"] == 250
+
+
+def test_full_outbox_and_failed_pipelines_drop():
+    async def run():
+        redis = FakeRedis()
+        bus = RedisBroadcastBus(redis, max_pending=3)
+        await bus.start()
+        for n in range(5):
+            await bus.publish("lobby", str(n))
+        assert bus.stats()["dropped"] == 2
+
+        redis.fail = True
+        await settle()
+        await bus.stop()
+        return bus
+
+    stats = asyncio.run(run()).stats()
+    assert stats["dropped"] == 5 and stats["published"] == 0
+
+
+def test_memory_bus_routes_by_channel():
+    async def run():
+        bus = MemoryBroadcastBus()
+        default, users = [], []
+        bus.set_handler(lambda channel, data: default.append(data))
+        bus.set_channel_handler("users", lambda channel, data: users.append(data))
+        await bus.subscribe("lobby")
+        await bus.subscribe("users")
+        for channel in ("lobby", "users", "unsubscribed"):
+            await bus.publish(channel, channel)
+        await asyncio.sleep(0)
+        return default, users
+
+    assert asyncio.run(run()) == (["lobby"], ["users"])
@@ -0,0 +1,88 @@
+"""
+Test WebSocket fan-out and the disconnection of slow consumers
+"""
+
+import asyncio
+
+import json
+
+from starlette import status
+
+from app.services import connection_manager
+from app.services.broadcast import MemoryBroadcastBus
+from app.services.connection_manager import ConnectionManager
+
+
+class StuckWebSocket:
+    """A peer that never reads: every send blocks."""
+
+    def __init__(self):
+        self.close_code = None
+
+    async def send_text(self, data):
+        await asyncio.Event().wait()
+
+    async def close(self, code):
+        self.close_code = code
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, data):
+        self.sent.append(data)
+
+    async def close(self, code):
+        pass
+
+
+def test_fan_out_encodes_each_message_once(monkeypatch):
+    encoded = []
+
+    def counting_encode(message):
+        # Already-encoded strings pass through, as in encode_message
+        if isinstance(message, str):
+            return message
+        encoded.append(message)
+        return json.dumps(message)
+
+    monkeypatch.setattr(connection_manager, "encode_message", counting_encode)
+
+    async def run():
+        bus = MemoryBroadcastBus()
+        manager = ConnectionManager(bus=bus)
+        sockets = [RecordingWebSocket() for _ in range(5)]
+        for n, websocket in enumerate(sockets):
+            connection = manager.connect(websocket, f"u{n}")
+            await manager.join(connection, "lobby" if n < 4 else "other")
+        await manager.publish("lobby", {"text": "hi"})
+        for _ in range(5):
+            await asyncio.sleep(0)
+        return manager, sockets
+
+    manager, sockets = asyncio.run(run())
+    assert encoded == [{"text": "hi"}]
+    assert [ws.sent for ws in sockets] == [['{"text": "hi"}']] * 4 + [[]]
+    assert manager.stats()["deliveries"] == 4
+
+
+def test_slow_consumers_are_disconnected():
+    async def run():
+        manager = ConnectionManager(max_queue=2)
+        websocket = StuckWebSocket()
+        connection = manager.connect(websocket, "u1")
+        await manager.join(connection, "lobby")
+
+        # Two fill the queue, the third overflows it, the fourth finds it closed
+        delivered = [manager.broadcast("lobby", {"n": n}) for n in range(4)]
+        assert delivered == [1, 1, 0, 0]
+        assert len(manager._disconnect_tasks) == 1
+        await asyncio.gather(*manager._disconnect_tasks)
+        return manager, websocket
+
+    manager, websocket = asyncio.run(run())
+    assert websocket.close_code == status.WS_1013_TRY_AGAIN_LATER
+    assert manager._disconnect_tasks == set()
+    assert manager.stats()["slow_consumers"] == 1
+    assert manager.stats()["connections"] == 0 and manager.stats()["rooms"] == 0
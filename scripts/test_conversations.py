@@ -0,0 +1,143 @@
+"""
+Test starting conversations and paging through their history
+"""
+
+import asyncio
+import re
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.api.deps import get_current_active_user
+from app.api.routes import conversations
+from app.db.database import get_db
+from app.models.message import Message
+from app.schemas.message import ConversationCreate
+from app.services.message_service import MessageService
+
+CREATOR_ID = uuid.uuid4()
+FRIEND_ID = uuid.uuid4()
+
+
+class FakeSession:
+    """Knows a fixed set of users; fails the commit like a foreign key would."""
+
+    def __init__(self, user_ids, fail_commit=False):
+        self.user_ids = set(user_ids)
+        self.fail_commit = fail_commit
+        self.added = []
+        self.committed = False
+        self.rolled_back = False
+
+    async def execute(self, statement):
+        ids = statement.whereclause.right.value
+        return SimpleNamespace(scalars=lambda: [i for i in ids if i in self.user_ids])
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def add_all(self, objs):
+        self.added.extend(objs)
+
+    async def flush(self):
+        self.added[0].id = uuid.uuid4()
+
+    async def commit(self):
+        if self.fail_commit:
+            raise IntegrityError("INSERT", {}, Exception("foreign key"))
+        self.committed = True
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+def create(db, member_ids):
+    data = ConversationCreate(member_ids=member_ids)
+    return asyncio.run(MessageService.create_conversation(db, CREATOR_ID, data))
+
+
+def test_members_must_exist():
+    db = FakeSession([CREATOR_ID, FRIEND_ID])
+    create(db, [FRIEND_ID])
+    assert db.committed and len(db.added) == 3
+
+    stranger = uuid.uuid4()
+    db = FakeSession([CREATOR_ID, FRIEND_ID])
+    with pytest.raises(ValueError, match=str(stranger)):
+        create(db, [FRIEND_ID, stranger])
+    assert db.added == []
+
+
+def test_member_deleted_after_the_check():
+    db = FakeSession([CREATOR_ID, FRIEND_ID], fail_commit=True)
+    with pytest.raises(ValueError):
+        create(db, [FRIEND_ID])
+    assert db.rolled_back
+
+
+def test_unknown_members_are_a_bad_request():
+    async def session():
+        yield FakeSession([CREATOR_ID])
+
+    app = FastAPI()
+    app.include_router(conversations.router)
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(
+        id=CREATOR_ID
+    )
+    response = TestClient(app).post(
+        "/conversations", json={"member_ids": [str(uuid.uuid4())]}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Unknown users")
+
+
+class HistorySession:
+    """Runs the keyset query's bounds, order and limit over a list of seqs."""
+
+    def __init__(self, count):
+        self.seqs = list(range(1, count + 1))
+        self.statements = []
+
+    async def execute(self, statement):
+        sql = str(
+            statement.compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        )
+        self.statements.append(sql)
+        seqs = self.seqs
+        for op, bound in re.findall(r"messages\.seq ([<>]) (\d+)", sql):
+            bound = int(bound)
+            seqs = [s for s in seqs if (s < bound if op == "<" else s > bound)]
+        if "ORDER BY messages.seq DESC" in sql:
+            seqs = seqs[::-1]
+        seqs = seqs[: int(re.search(r"LIMIT (\d+)", sql).group(1))]
+        messages = [Message(seq=seq, content=str(seq)) for seq in seqs]
+        return SimpleNamespace(scalars=lambda: messages)
+
+
+def test_history_pages_by_keyset():
+    db = HistorySession(12)
+
+    def page(**kwargs):
+        messages, has_more = asyncio.run(
+            MessageService.get_history(db, uuid.uuid4(), limit=5, **kwargs)
+        )
+        return [message.seq for message in messages], has_more
+
+    # Backwards from the newest, each page in ascending order
+    assert page() == ([8, 9, 10, 11, 12], True)
+    assert page(before_seq=8) == ([3, 4, 5, 6, 7], True)
+    assert page(before_seq=3) == ([1, 2], False)
+    # Forwards from a known seq, e.g. to catch up after reconnecting
+    assert page(after_seq=9) == ([10, 11, 12], False)
+    assert page(after_seq=0) == ([1, 2, 3, 4, 5], True)
+
+    # One more row than the page is read, never an OFFSET
+    assert all("LIMIT 6" in sql and "OFFSET" not in sql for sql in db.statements)
@@ -0,0 +1,128 @@
+"""
+Test download responses: ranges, revalidation and the send paths
+"""
+
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from app.api.routes import files
+from app.db.database import get_db
+from app.services.file_serving import (
+    ZEROCOPY,
+    FileServer,
+    RangeNotSatisfiable,
+    parse_range,
+)
+from app.services.file_storage import FileStore
+
+DATA = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    # Unusable headers fall back to the whole file
+    assert parse_range("bytes=5-1", 100) is None
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("lines=0-1", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def get(server, key, headers=(), zerocopy=False):
+    """Run one GET through the response; return (status, headers, body)."""
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": f"/files/{key}",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in dict(headers).items()],
+        "extensions": {ZEROCOPY: {}} if zerocopy else {},
+    }
+    sent = {"body": b""}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+            sent["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == ZEROCOPY:
+            file = message["file"]
+            file.seek(message["offset"])
+            sent["body"] += file.read(message["count"])
+        else:
+            sent["body"] += message["body"]
+
+    async def run():
+        response = await server.response(Request(scope), key)
+        await response(scope, None, send)
+
+    asyncio.run(run())
+    return sent["status"], sent["headers"], sent["body"]
+
+
+def test_download_paths(tmp_path):
+    store = FileStore(str(tmp_path), 1 << 20, ["png"], [])
+
+    async def body():
+        yield DATA
+
+    key = asyncio.run(store.save(body(), "a.png")).key
+    server = FileServer(store)
+
+    status, headers, content = get(server, key)
+    assert status == 200 and content == DATA
+    assert headers["etag"] == f'"{key[:64]}"'
+    assert "immutable" in headers["cache-control"]
+    assert headers["x-content-type-options"] == "nosniff"
+
+    assert get(server, key, {"If-None-Match": headers["etag"]})[0] == 304
+
+    status, headers, content = get(server, key, {"Range": "bytes=8-15"}, True)
+    assert status == 206 and content == DATA[8:16]
+    assert headers["content-range"] == f"bytes 8-15/{len(DATA)}"
+
+    # A stale If-Range gets the whole file
+    assert get(server, key, {"Range": "bytes=8-15", "If-Range": '"old"'})[0] == 200
+    assert get(server, key, {"Range": "bytes=99999-"})[0] == 416
+
+    stats = server.stats()
+    assert stats["zerocopy_sends"] == 1 and stats["chunked_sends"] == 2
+    assert stats["stat_cache"]["misses"] == 1
+
+
+def test_only_images_download_without_a_token(tmp_path, monkeypatch):
+    store = FileStore(str(tmp_path), 1 << 20, ["png"], ["txt"])
+
+    async def body(data):
+        yield data
+
+    image = asyncio.run(store.save(body(DATA), "a.png")).key
+    text = asyncio.run(store.save(body(b"private notes"), "notes.txt")).key
+
+    async def get_current_user(token, db):
+        if token != "valid":
+            raise HTTPException(status_code=401)
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(files, "file_store", store)
+    monkeypatch.setattr(files, "file_server", FileServer(store))
+    monkeypatch.setattr(files, "get_current_user", get_current_user)
+    app = FastAPI()
+    app.include_router(files.router)
+    app.dependency_overrides[get_db] = no_db
+    client = TestClient(app)
+
+    assert client.get(f"/files/{image}").status_code == 200
+    assert client.get(f"/files/{text}").status_code == 401
+    bad = {"Authorization": "Bearer stolen"}
+    assert client.get(f"/files/{text}", headers=bad).status_code == 401
+
+    response = client.get(f"/files/{text}", headers={"Authorization": "Bearer valid"})
+    assert response.status_code == 200 and response.content == b"private notes"
+    assert response.headers["cache-control"].startswith("private")
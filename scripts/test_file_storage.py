@@ -0,0 +1,82 @@
+"""
+Test streaming, content-addressed uploads
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from app.services.file_storage import FileStore, UnsupportedFileType, UploadTooLarge
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileStore(
+        str(tmp_path),
+        max_size=1024,
+        image_extensions=["jpg", "jpeg", "png"],
+        file_extensions=["txt", "pdf"],
+        write_buffer=64,
+    )
+
+
+async def body(data: bytes, chunk_size: int = 7):
+    for i in range(0, len(data), chunk_size):
+        yield data[i : i + chunk_size]
+
+
+def save(store, data, filename, **kwargs):
+    return asyncio.run(store.save(body(data), filename, **kwargs))
+
+
+def leftovers(store):
+    return os.listdir(os.path.join(store.root, "tmp"))
+
+
+def test_duplicates_share_one_file(store):
+    first = save(store, PNG, "a.png")
+    second = save(store, PNG, "b.PNG")
+
+    assert first.key == second.key and first.key.endswith(".png")
+    assert not first.deduplicated and second.deduplicated
+    with open(store.path_for(first.key), "rb") as f:
+        assert f.read() == PNG
+    assert leftovers(store) == []
+    assert store.stats()["deduplicated"] == 1
+
+
+def test_size_limit_stops_reading_mid_stream(store):
+    consumed = 0
+
+    async def endless():
+        nonlocal consumed
+        yield PNG
+        while True:
+            consumed += 1
+            yield b"\x00" * 100
+
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(store.save(endless(), "big.png"))
+    assert consumed == 10
+    assert leftovers(store) == []
+
+    with pytest.raises(UploadTooLarge):
+        save(store, PNG, "a.png", declared_size=4096)
+
+
+def test_content_must_match_extension(store):
+    with pytest.raises(UnsupportedFileType):
+        save(store, b"%PDF-1.7 not really a png", "a.png")
+    with pytest.raises(UnsupportedFileType):
+        save(store, PNG, "a.exe")
+    with pytest.raises(UnsupportedFileType):
+        save(store, b"%PDF-1.7", "a.pdf", images_only=True)
+    with pytest.raises(UnsupportedFileType):
+        save(store, "café".encode("latin-1"), "notes.txt")
+
+    # Multi-byte characters split across chunks are fine
+    assert save(store, "café ☃".encode(), "notes.txt").size == 9
+    assert store.stats()["rejected"] == 4
@@ -0,0 +1,67 @@
+"""
+Test that password hashing runs off the event loop and sheds load when full
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import security
+from app.core.config import settings
+from app.core.hashing import HashingPool, HashingPoolFull
+from app.db.database import get_db
+from app.main import app
+
+
+def test_jobs_run_off_the_loop_and_overflow_is_rejected():
+    release = threading.Event()
+
+    async def run():
+        pool = HashingPool(max_workers=1, max_pending=2)
+        jobs = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+
+        # The loop keeps ticking while a worker is blocked
+        ticks = 0
+        started = time.monotonic()
+        while time.monotonic() - started < 0.05:
+            await asyncio.sleep(0)
+            ticks += 1
+        assert pool.stats()["in_flight"] == 2 and pool.queue_depth == 1
+
+        with pytest.raises(HashingPoolFull):
+            await pool.run(release.wait)
+        release.set()
+        await asyncio.gather(*jobs)
+        pool.shutdown()
+        return pool, ticks
+
+    pool, ticks = asyncio.run(run())
+    assert ticks > 100
+    stats = pool.stats()
+    assert stats["completed"] == 2 and stats["rejected"] == 1
+    assert stats["in_flight"] == 0 and stats["wait_seconds_max"] > 0
+
+
+def test_saturated_pool_answers_503(monkeypatch):
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(security, "hashing_pool", HashingPool(1, max_pending=0))
+    app.dependency_overrides[get_db] = no_db
+    try:
+        response = TestClient(app).post(
+            f"{settings.api_v1_prefix}/auth/register",
+            json={
+                "username": "alice",
+                "email": "alice@example.com",
+                "password": "correct horse battery",
+                "display_name": "Alice",
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
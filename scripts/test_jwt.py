@@ -0,0 +1,92 @@
+"""
+Test the JWT backends against each other and against tampered tokens
+"""
+
+import time
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+
+from app.core.jwt import (
+    FastBackend,
+    JoseBackend,
+    SigningKey,
+    TokenError,
+    b64decode,
+    b64encode,
+)
+
+
+def pem(private_key) -> str:
+    return private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+def make_key(algorithm: str) -> SigningKey:
+    if algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    elif algorithm == "EdDSA":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        return SigningKey(algorithm, secret="testsecret")
+    return SigningKey(algorithm, private_key_pem=pem(private_key))
+
+
+CLAIMS = {"sub": "550e8400-e29b-41d4-a716-446655440000", "type": "access"}
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "ES256", "EdDSA"])
+def test_fast_backend_round_trip(algorithm):
+    backend = FastBackend(make_key(algorithm))
+    claims = backend.decode(backend.encode({**CLAIMS, "exp": int(time.time()) + 60}))
+    assert claims["sub"] == CLAIMS["sub"]
+
+
+@pytest.mark.parametrize("algorithm", ["HS256", "ES256"])
+def test_backends_accept_each_others_tokens(algorithm):
+    key = make_key(algorithm)
+    fast, jose = FastBackend(key), JoseBackend(key)
+    exp = int(time.time()) + 60
+    assert jose.decode(fast.encode({**CLAIMS, "exp": exp}))["exp"] == exp
+    assert fast.decode(jose.encode({**CLAIMS, "exp": exp}))["exp"] == exp
+
+
+def test_rejects_tampered_expired_and_unsigned_tokens():
+    backend = FastBackend(make_key("HS256"))
+    token = backend.encode({**CLAIMS, "exp": int(time.time()) + 60})
+    header, payload, signature = token.split(".")
+
+    forged = b64encode(b64decode(payload.encode()).replace(b"access", b"refresh"))
+    with pytest.raises(TokenError):
+        backend.decode(f"{header}.{forged.decode()}.{signature}")
+
+    none_header = b64encode(b'{"alg":"none","typ":"JWT"}').decode()
+    with pytest.raises(TokenError):
+        backend.decode(f"{none_header}.{payload}.")
+
+    with pytest.raises(TokenError):
+        backend.decode(backend.encode({**CLAIMS, "exp": int(time.time()) - 1}))
+
+    with pytest.raises(TokenError):
+        backend.decode("not-a-token")
+
+
+@pytest.mark.parametrize("backend_class", [FastBackend, JoseBackend])
+@pytest.mark.parametrize("header", [b"[]", b'"HS256"', b"null", b"{"])
+def test_rejects_headers_that_are_not_objects(backend_class, header):
+    backend = backend_class(make_key("HS256"))
+    token = f"{b64encode(header).decode()}.eyJ9.abc"
+    with pytest.raises(TokenError):
+        backend.decode(token)
+
+
+def test_jwks_publishes_only_public_keys():
+    assert FastBackend(make_key("HS256")).jwks() == {"keys": []}
+
+    key = make_key("EdDSA")
+    (jwk,) = FastBackend(key).jwks()["keys"]
+    assert jwk["kty"] == "OKP" and jwk["kid"] == key.kid and "d" not in jwk
@@ -0,0 +1,94 @@
+"""
+Test the load-test harness against a tiny in-process app
+"""
+
+import asyncio
+import uuid
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException
+
+from benchmarks.loadtest import API, LoadTest, Recorder, drive, percentile, report
+
+
+def make_app():
+    app = FastAPI()
+    users = {}
+
+    @app.post(f"{API}/auth/register", status_code=201)
+    async def register(body: dict):
+        users[body["username"]] = str(uuid.uuid4())
+        return {}
+
+    @app.post(f"{API}/auth/login")
+    async def login(body: dict):
+        token = users[body["username"]]
+        return {"access_token": token, "refresh_token": token}
+
+    @app.get(f"{API}/users/me")
+    async def me(authorization: str = Header()):
+        return {"id": authorization.removeprefix("Bearer ")}
+
+    @app.get(f"{API}/users/{{user_id}}")
+    async def read_user(user_id: str):
+        # Every other lookup fails, to exercise the error accounting
+        if int(user_id[-1], 16) % 2:
+            raise HTTPException(status_code=404)
+        return {"id": user_id}
+
+    return app
+
+
+def client_for(transport):
+    return httpx.AsyncClient(transport=transport, base_url="http://loadtest")
+
+
+def test_percentile_is_nearest_rank():
+    ordered = [float(n) for n in range(1, 101)]
+    assert percentile(ordered, 0.50) == 50.0
+    assert percentile(ordered, 0.99) == 99.0
+    assert percentile(ordered, 1.0) == 100.0
+    assert percentile([7.0], 0.5) == 7.0 and percentile([], 0.5) == 0.0
+
+
+def test_profile_scenario_records_latencies_and_errors(capsys):
+    async def run():
+        transport = httpx.ASGITransport(app=make_app())
+        async with client_for(transport) as client:
+            recorder = Recorder()
+            test = LoadTest(client, recorder)
+            await test.create_accounts(8)
+            # Account setup is not measured
+            assert recorder.statuses == {}
+
+            recorder.recording = True
+            await drive(test.step_profile, concurrency=4, duration=0.2)
+            return test, recorder
+
+    test, recorder = asyncio.run(run())
+    summary = report(recorder, elapsed=0.2)
+
+    assert len(test.accounts) == 8
+    me, other = summary["GET /users/me"], summary["GET /users/{user_id}"]
+    assert me["requests"] == other["requests"] > 0
+    assert me["error_rate"] == 0 and me["statuses"] == {"200": me["requests"]}
+    assert other["statuses"].get("404", 0) == recorder.errors["GET /users/{user_id}"]
+    assert 0 < me["p50_ms"] <= me["p99_ms"] <= me["max_ms"]
+    assert "GET /users/me" in capsys.readouterr().out
+
+
+def test_transport_errors_are_counted():
+    async def run():
+        def refuse(request):
+            raise httpx.ConnectError("refused", request=request)
+
+        async with client_for(httpx.MockTransport(refuse)) as client:
+            recorder = Recorder()
+            recorder.recording = True
+            response = await recorder.request(client, "GET /x", "GET", "/x")
+            return response, recorder
+
+    response, recorder = asyncio.run(run())
+    assert response is None
+    assert recorder.errors["GET /x"] == 1
+    assert recorder.statuses["GET /x"] == {"ConnectError": 1}
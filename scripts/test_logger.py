@@ -0,0 +1,96 @@
+"""
+Test the non-blocking JSON log handler and the rate-limited logger
+"""
+
+import io
+import json
+import logging
+
+import pytest
+
+from app.core.logger import (
+    BackgroundWriter,
+    JSONFormatter,
+    NonBlockingQueueHandler,
+    RateLimitedLogger,
+    request_id_var,
+)
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger("test.logger")
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    yield logger
+    logger.handlers.clear()
+
+
+def attach(logger, max_pending=100):
+    handler = NonBlockingQueueHandler(max_pending)
+    logger.addHandler(handler)
+    stream = io.StringIO()
+    return handler, stream, BackgroundWriter(handler, stream, JSONFormatter())
+
+
+def lines(stream):
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_records_are_captured_at_call_time_and_written_later(logger):
+    handler, stream, writer = attach(logger)
+    items = ["a"]
+    token = request_id_var.set("req-1")
+    try:
+        logger.info("items %s", items, extra={"conversation_id": "c1"})
+    finally:
+        request_id_var.reset(token)
+    items.append("b")
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("failed")
+
+    # Nothing is written on the calling thread
+    assert stream.getvalue() == "" and len(handler.pending) == 2
+    writer.drain()
+
+    first, second = lines(stream)
+    assert first["message"] == "items ['a']"
+    assert first["request_id"] == "req-1" and first["conversation_id"] == "c1"
+    assert first["level"] == "INFO" and first["logger"] == "test.logger"
+    assert "request_id" not in second
+    assert "RuntimeError: boom" in second["exc_info"]
+
+
+def test_full_queue_drops_and_stop_flushes(logger):
+    handler, stream, writer = attach(logger, max_pending=3)
+    for n in range(5):
+        logger.info("n=%d", n)
+    assert handler.dropped == 2
+
+    writer.start()
+    writer.stop()
+    assert [line["message"] for line in lines(stream)] == ["n=0", "n=1", "n=2"]
+    assert not writer.is_alive()
+
+
+def test_rate_limited_logger_reports_what_it_suppressed(logger):
+    handler, stream, writer = attach(logger)
+    limited = RateLimitedLogger(logger, per_second=1e-9, burst=2)
+
+    emitted = [limited.warning("slow %d", n, key="slow") for n in range(5)]
+    assert emitted == [True, True, False, False, False]
+    assert limited.warning("other", key="other")  # a separate bucket
+
+    limited._buckets["slow"][0] = 1  # as if a token had been refilled
+    assert limited.warning("slow again", key="slow")
+    writer.drain()
+
+    records = lines(stream)
+    messages = [record["message"] for record in records]
+    assert messages == ["slow 0", "slow 1", "other", "slow again"]
+    assert records[-1]["suppressed"] == 3 and "suppressed" not in records[2]
+
+    logger.setLevel(logging.ERROR)
+    assert not limited.warning("disabled", key="slow")
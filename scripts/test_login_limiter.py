@@ -0,0 +1,105 @@
+"""
+Test that login throttling bounds password work under credential stuffing
+"""
+
+import asyncio
+import time
+
+import pytest
+from starlette.requests import Request
+
+from app.api.deps import get_client_ip
+from app.core import security
+from app.core.config import settings
+from app.models.user import User
+from app.services import user_service
+from app.services.login_limiter import Bucket, LoginLimiter, LoginThrottled
+from app.services.user_service import UserService
+
+PASSWORD_HASH = security.get_password_hash("correct horse", rounds=8)
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = LoginLimiter(
+        ip=Bucket("ip", 20, 1e-6), username=Bucket("username", 5, 1e-6)
+    )
+    monkeypatch.setattr(user_service, "login_limiter", limiter)
+    monkeypatch.setattr(security, "_dummy_hash", PASSWORD_HASH)
+
+    async def get_for_login(db, username):
+        if username != "alice":
+            return None
+        return User(id=1, username="alice", password_hash=PASSWORD_HASH)
+
+    monkeypatch.setattr(UserService, "get_for_login", get_for_login)
+    return limiter
+
+
+def stuff(attempts):
+    """Run (username, ip) login attempts; return (throttled, hashes, cpu seconds)."""
+
+    async def run():
+        throttled = 0
+        for username, ip in attempts:
+            try:
+                await UserService.authenticate_user(None, username, "guess", ip)
+            except LoginThrottled:
+                throttled += 1
+        return throttled
+
+    completed = security.hashing_pool.completed
+    started = time.process_time()
+    throttled = asyncio.run(run())
+    return (
+        throttled,
+        security.hashing_pool.completed - completed,
+        time.process_time() - started,
+    )
+
+
+def test_single_source_is_cut_off_by_ip(limiter):
+    attempts = [(f"user{i}", "203.0.113.7") for i in range(1000)]
+    throttled, hashes, _ = stuff(attempts)
+
+    # Unknown usernames still cost a verify, but only within the IP budget
+    assert hashes == 20
+    assert throttled == 980
+    assert limiter.stats()["rejected"] == {"ip": 980, "username": 0}
+
+
+def test_distributed_attack_is_cut_off_by_username(limiter):
+    attempts = [("alice", f"198.51.100.{i % 250}") for i in range(1000)]
+    throttled, hashes, cpu = stuff(attempts)
+
+    assert hashes == 5
+    assert throttled == 995
+    assert limiter.stats()["rejected"]["username"] == 995
+
+    # Rejected attempts never reach bcrypt: the run costs a small fraction
+    # of verifying every guess
+    started = time.process_time()
+    security.verify_password("guess", PASSWORD_HASH)
+    per_hash = time.process_time() - started
+    assert cpu < len(attempts) * per_hash / 10
+
+
+def request_from(peer, forwarded=()):
+    return Request(
+        {
+            "type": "http",
+            "client": (peer, 1234),
+            "headers": [(b"x-forwarded-for", value.encode()) for value in forwarded],
+        }
+    )
+
+
+def test_client_ip_trusts_only_listed_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "trusted_proxies", "10.0.0.1, 10.0.0.2")
+
+    # A client talking to us directly cannot pick its own bucket
+    assert get_client_ip(request_from("203.0.113.9", ["1.2.3.4"])) == "203.0.113.9"
+    # Through both proxies: the address the outer one saw, not the forged one
+    request = request_from("10.0.0.1", ["1.2.3.4, 198.51.100.7", "10.0.0.2"])
+    assert get_client_ip(request) == "198.51.100.7"
+    assert get_client_ip(request_from("10.0.0.1")) == "10.0.0.1"
@@ -0,0 +1,64 @@
+"""
+Test the event-loop monitor's blocking detection and route attribution
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.core.loop_monitor import assert_no_blocking
+from app.core.middleware import TimingMiddleware
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def blocking_handler(item_id: int):
+        time.sleep(0.2)  # the kind of call the monitor is meant to catch
+        return {"id": item_id}
+
+    @app.get("/fine")
+    async def fine_handler():
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    return app
+
+
+async def get(path: str) -> httpx.Response:
+    transport = httpx.ASGITransport(app=build_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+        return await client.get(path)
+
+
+def test_blocking_handler_is_attributed():
+    async def run():
+        with pytest.raises(AssertionError) as info:
+            async with assert_no_blocking(0.05) as monitor:
+                await get("/items/1")
+        return monitor, str(info.value)
+
+    monitor, message = asyncio.run(run())
+    sample = monitor.samples[0]
+    assert sample.duration >= 0.15
+    assert sample.route == "/items/{item_id}"
+    assert sample.handler.endswith("blocking_handler")
+    assert "time.sleep" in sample.stack
+    assert "blocking_handler" in message
+
+
+def test_awaiting_handler_passes():
+    async def run():
+        async with assert_no_blocking(0.05) as monitor:
+            response = await get("/fine")
+        return monitor, response
+
+    monitor, response = asyncio.run(run())
+    assert response.status_code == 200
+    assert not monitor.samples
+    assert monitor.max_lag < 0.05
@@ -0,0 +1,146 @@
+"""
+Test message group commits and shutdown of the write queue
+"""
+
+import asyncio
+import uuid
+
+import pytest
+
+from app.services.message_writer import MessageQueueFull, MessageWriteQueue
+
+CONVERSATION_ID = uuid.uuid4()
+SENDER_ID = uuid.uuid4()
+
+
+class FakeDatabase:
+    """
+    Stands in for the session factory: answers the seq reservation for
+    known conversations and records each transaction's statements.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.last_seq = {CONVERSATION_ID: 0}
+        self.transactions: list[list] = []
+        self.delay = delay
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.statements: list = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def begin(self):
+        return self
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        if len(self.statements) == 1:
+            self.database.transactions.append(self.statements)
+            await asyncio.sleep(self.database.delay)
+        if getattr(statement, "is_update", False):
+            # VALUES (id, n), ... binds as id, n, id, n, ...
+            params = list(statement.compile().params.values())
+            result = []
+            for conversation_id, n in zip(params[::2], params[1::2]):
+                if conversation_id in self.database.last_seq:
+                    self.database.last_seq[conversation_id] += n
+                    result.append(
+                        (conversation_id, self.database.last_seq[conversation_id])
+                    )
+            return result
+        return []
+
+
+def test_concurrent_senders_share_one_transaction():
+    async def run():
+        database = FakeDatabase()
+        queue = MessageWriteQueue(database, max_batch=100, linger=0.05)
+        queue.start()
+        messages = await asyncio.gather(
+            *[queue.submit(CONVERSATION_ID, SENDER_ID, f"m{i}") for i in range(20)],
+            queue.submit(uuid.uuid4(), SENDER_ID, "nowhere"),
+            return_exceptions=True,
+        )
+        await queue.stop()
+        return database, queue, messages
+
+    database, queue, messages = asyncio.run(run())
+
+    assert len(database.transactions) == 1
+    assert [m.seq for m in messages[:20]] == list(range(1, 21))
+    assert isinstance(messages[20], ValueError)
+    assert queue.stats()["rows_written"] == 20
+
+
+def test_batches_are_capped_and_overflow_is_shed():
+    async def run():
+        database = FakeDatabase()
+        queue = MessageWriteQueue(database, max_batch=4, linger=1.0, max_pending=10)
+        queue.start()
+        senders = [
+            asyncio.create_task(queue.submit(CONVERSATION_ID, SENDER_ID, "m"))
+            for _ in range(11)
+        ]
+        results = await asyncio.gather(*senders[:10], return_exceptions=True)
+        overflow = await asyncio.gather(senders[10], return_exceptions=True)
+        await queue.stop()
+        return database, queue, results, overflow[0]
+
+    database, queue, results, overflow = asyncio.run(run())
+    # Full batches are written without waiting out the linger
+    reserved = [
+        list(statement.compile().params.values())[1]
+        for transaction in database.transactions
+        for statement in transaction
+        if getattr(statement, "is_update", False)
+    ]
+    assert reserved == [4, 4, 2] and queue.stats()["batches"] == 3
+    assert sorted(m.seq for m in results) == list(range(1, 11))
+    assert isinstance(overflow, MessageQueueFull)
+    assert queue.stats()["rejected"] == 1
+
+
+def test_stop_writes_everything_already_queued():
+    async def run():
+        queue = MessageWriteQueue(FakeDatabase(delay=0.01), max_batch=3, linger=1.0)
+        queue.start()
+        senders = [
+            asyncio.create_task(queue.submit(CONVERSATION_ID, SENDER_ID, "m"))
+            for _ in range(10)
+        ]
+        await asyncio.sleep(0)
+        await queue.stop()
+        with pytest.raises(RuntimeError):
+            await queue.submit(CONVERSATION_ID, SENDER_ID, "late")
+        return await asyncio.gather(*senders)
+
+    assert sorted(m.seq for m in asyncio.run(run())) == list(range(1, 11))
+
+
+def test_cancelling_the_writer_fails_the_batch_in_flight():
+    async def run():
+        queue = MessageWriteQueue(FakeDatabase(delay=10), max_batch=2, linger=0)
+        queue.start()
+        senders = [
+            asyncio.create_task(queue.submit(CONVERSATION_ID, SENDER_ID, "m"))
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0.01)
+        queue._task.cancel()
+        results = await asyncio.wait_for(
+            asyncio.gather(*senders, return_exceptions=True), 1
+        )
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, MessageQueueFull) for result in results)
@@ -0,0 +1,90 @@
+"""
+Test the metrics registry, its text format and the request middleware
+"""
+
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.metrics import (
+    Registry,
+    http_request_duration,
+    http_requests,
+    request_stats,
+)
+from app.core.middleware import RequestIdMiddleware, TimingMiddleware
+
+
+def test_exposition_format():
+    registry = Registry(namespace="t")
+    requests = registry.counter("requests_total", "Requests", ("path",))
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.gauge("depth", "Queue depth", callback=lambda: 7)
+    registry.register_stats(
+        "pool", lambda: {"size": 4, "open": True, "kind": "thread", "io": {"reads": 2}}
+    )
+
+    requests.inc(1, 'a"b')
+    requests.inc(2, 'a"b')
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+
+    assert "# TYPE t_requests_total counter" in lines
+    assert 't_requests_total{path="a\\"b"} 3' in lines
+    assert [line for line in lines if line.startswith("t_latency_seconds")] == [
+        't_latency_seconds_bucket{le="0.1"} 1',
+        't_latency_seconds_bucket{le="1.0"} 3',
+        't_latency_seconds_bucket{le="+Inf"} 4',
+        "t_latency_seconds_sum 4.05",
+        "t_latency_seconds_count 4",
+    ]
+    assert "t_depth 7" in lines
+    assert {"t_pool_size 4", "t_pool_open 1", "t_pool_io_reads 2"} <= set(lines)
+    assert not any(line.startswith("t_pool_kind") for line in lines)
+
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Again")
+
+
+def make_app():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        stats = request_stats.get()
+        stats.db_queries += 2
+        stats.db_time += 0.003
+        return {"id": item_id}
+
+    app.add_middleware(TimingMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    return TestClient(app)
+
+
+def test_requests_are_timed_per_route_template():
+    client = make_app()
+    before = http_request_duration.count("GET", "/items/{item_id}")
+    ok = http_requests.value("GET", "/items/{item_id}", 200)
+
+    for item_id in (1, 2, 3):
+        response = client.get(f"/items/{item_id}")
+    client.get("/items/nope")  # a 422, still under the route's template
+
+    assert http_request_duration.count("GET", "/items/{item_id}") == before + 4
+    assert http_requests.value("GET", "/items/{item_id}", 200) == ok + 3
+    timing = response.headers["server-timing"]
+    assert re.fullmatch(
+        r'app;dur=[\d.]+, db;dur=3\.00;desc="2 queries", pool;dur=0\.00', timing
+    )
+    assert request_stats.get() is None
+
+
+def test_request_ids_are_reused_only_when_well_formed():
+    client = make_app()
+    reused = client.get("/items/1", headers={"X-Request-ID": "abc"})
+    assert reused.headers["x-request-id"] == "abc"
+    generated = client.get("/items/1", headers={"X-Request-ID": "x" * 65})
+    assert re.fullmatch(r"[0-9a-f]{32}", generated.headers["x-request-id"])
@@ -0,0 +1,42 @@
+"""
+Test bcrypt cost calibration and rehash detection
+"""
+
+import asyncio
+
+from passlib.context import CryptContext
+
+from app.core import security
+from app.core.config import settings
+from app.core.hashing import calibrate_bcrypt_rounds
+
+
+def test_calibration_respects_limits():
+    # Nothing fits a zero budget, so the floor is returned
+    rounds, elapsed = calibrate_bcrypt_rounds(0.0, min_rounds=4, max_rounds=6)
+    assert rounds == 4 and elapsed > 0
+
+    rounds, _ = calibrate_bcrypt_rounds(60.0, min_rounds=4, max_rounds=6, samples=1)
+    assert rounds == 6
+
+
+def test_configured_cost_flags_weaker_hashes_only(monkeypatch):
+    monkeypatch.setattr(
+        security, "pwd_context", CryptContext(schemes=["bcrypt"], deprecated="auto")
+    )
+    monkeypatch.setattr(security, "password_hash_rounds", None)
+    monkeypatch.setattr(settings, "password_hash_rounds", 0)
+    monkeypatch.setattr(settings, "password_hash_budget_ms", 0.0)
+    monkeypatch.setattr(settings, "password_hash_min_rounds", 5)
+    monkeypatch.setattr(settings, "password_hash_max_rounds", 8)
+
+    old_hash = security.get_password_hash("hunter22", rounds=4)
+    stronger_hash = security.get_password_hash("hunter22", rounds=6)
+    assert asyncio.run(security.configure_password_hashing()) == 5
+
+    new_hash = asyncio.run(security.get_password_hash_async("hunter22"))
+    assert new_hash.startswith("$2b$05$")
+    assert security.needs_rehash(old_hash)
+    assert not security.needs_rehash(new_hash)
+    assert not security.needs_rehash(stronger_hash)
+    assert security.verify_password("hunter22", old_hash)
@@ -0,0 +1,149 @@
+"""
+Test the presence store's cache and its batched flush statement
+"""
+
+import asyncio
+import uuid
+
+from sqlalchemy import inspect
+from sqlalchemy.dialects import postgresql
+
+from app.models.user import User, UserStatus
+from app.schemas.user import UserUpdate
+from app.services import user_service
+from app.services.presence import Presence, PresenceStore
+from app.services.user_service import UserService
+
+
+class FakeSession:
+    """Answers presence queries from a dict and counts them."""
+
+    def __init__(self, rows: dict):
+        self.rows = rows
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return [(user_id, *row) for user_id, row in self.rows.items()]
+
+
+def test_flush_statement_updates_from_values():
+    rows = [
+        (uuid.uuid4(), UserStatus.ONLINE, None),
+        (uuid.uuid4(), UserStatus.AWAY, None),
+    ]
+    statement = PresenceStore._update_statement(rows)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+
+    assert sql.startswith("UPDATE users SET status=presence.status")
+    assert "FROM (VALUES" in sql and ") AS presence (id, status, last_seen)" in sql
+    assert "WHERE users.id = presence.id" in sql
+    assert "coalesce(CAST(presence.last_seen AS TIMESTAMP WITH TIME ZONE)" in sql
+    assert "updated_at=users.updated_at" in sql
+
+
+def test_database_reads_expire_but_local_changes_do_not():
+    user_id = uuid.uuid4()
+    db = FakeSession({user_id: (UserStatus.OFFLINE, None)})
+    store = PresenceStore(None, ttl=60)
+
+    found = asyncio.run(store.get_many(db, [user_id]))
+    assert found == {user_id: Presence(UserStatus.OFFLINE, None)}
+    asyncio.run(store.get_many(db, [user_id]))
+    assert db.queries == 1
+
+    # Another worker changed it; the change shows once the entry expires
+    db.rows[user_id] = (UserStatus.ONLINE, None)
+    store._presence.pop(user_id)  # as if the TTL had passed
+    assert asyncio.run(store.get_many(db, [user_id]))[user_id].status == (
+        UserStatus.ONLINE
+    )
+
+    # Unflushed local changes win even over a fresh read
+    store = PresenceStore(None, ttl=0)
+    store.set(user_id, UserStatus.AWAY)
+    assert asyncio.run(store.get_many(db, [user_id]))[user_id].status == (
+        UserStatus.AWAY
+    )
+
+
+def test_cache_is_bounded():
+    store = PresenceStore(None, max_entries=10)
+    db = FakeSession({uuid.uuid4(): (UserStatus.ONLINE, None) for _ in range(50)})
+    asyncio.run(store.get_many(db, list(db.rows)))
+    assert store.stats()["cache"]["size"] == 10
+
+
+class ProfileSession:
+    """Counts commits; refresh reloads the status the database has."""
+
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+    async def refresh(self, user):
+        user.status = UserStatus.OFFLINE
+
+
+class SnapshotCache:
+    async def set_user(self, snapshot):
+        self.snapshot = snapshot
+
+
+def test_profile_status_changes_go_through_the_store(monkeypatch):
+    store = PresenceStore(None)
+    cache = SnapshotCache()
+    monkeypatch.setattr(user_service, "presence_store", store)
+    monkeypatch.setattr(user_service, "user_cache", cache)
+    user = User(id=uuid.uuid4(), username="alice", status=UserStatus.ONLINE)
+    db = ProfileSession()
+
+    asyncio.run(UserService.update_user(db, user, UserUpdate(status=UserStatus.AWAY)))
+    assert db.commits == 0
+    assert store._dirty[user.id].status == UserStatus.AWAY
+
+    # Other fields are committed; the unflushed status survives the refresh
+    update = UserUpdate(display_name="Alice", status=UserStatus.BUSY)
+    asyncio.run(UserService.update_user(db, user, update))
+    assert db.commits == 1
+    assert user.display_name == "Alice" and user.status == UserStatus.BUSY
+    assert store._dirty[user.id].status == UserStatus.BUSY
+    assert cache.snapshot["status"] == UserStatus.BUSY
+
+    asyncio.run(UserService.update_user(db, user, UserUpdate(display_name="Al")))
+    assert user.status == UserStatus.BUSY
+
+
+class PageSession:
+    """Returns the same rows for any query and counts queries."""
+
+    def __init__(self, users):
+        self.users = users
+        self.queries = 0
+
+    async def scalars(self, query):
+        self.queries += 1
+        return iter(self.users)
+
+    async def execute(self, statement):
+        self.queries += 1
+        return []
+
+
+def test_listed_users_carry_unflushed_presence(monkeypatch):
+    store = PresenceStore(None)
+    monkeypatch.setattr(user_service, "presence_store", store)
+    users = [
+        User(id=uuid.uuid4(), username=f"u{i}", status=UserStatus.ONLINE)
+        for i in range(3)
+    ]
+    store.set(users[1].id, UserStatus.AWAY)
+    db = PageSession(users)
+
+    page, has_more = asyncio.run(UserService.list_users(db, limit=2))
+    assert [user.status for user in page] == [UserStatus.ONLINE, UserStatus.AWAY]
+    assert has_more and db.queries == 1
+    # The overlay is not a change the session would write back
+    assert not inspect(page[1]).attrs.status.history.has_changes()
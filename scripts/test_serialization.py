@@ -0,0 +1,72 @@
+"""
+Test that the fast serializers produce what the response models would
+"""
+
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.user import User, UserStatus
+from app.schemas.serialization import (
+    RawJSONResponse,
+    dump_user_page,
+    mention_serializer,
+    public_user_serializer,
+    user_serializer,
+)
+from app.schemas.user import UserMention, UserPublicResponse, UserResponse
+
+NOW = datetime(2025, 10, 20, 12, 0, tzinfo=timezone.utc)
+
+
+def make_user(n: int = 0, **overrides) -> User:
+    fields = dict(
+        id=uuid.uuid4(),
+        username=f"user{n}",
+        email=f"user{n}@example.com",
+        password_hash="$2b$12$secret",
+        display_name=f"User {n}",
+        avatar_url=None,
+        status=UserStatus.AWAY,
+        last_seen=NOW - timedelta(minutes=n),
+        created_at=NOW,
+        updated_at=NOW,
+    )
+    return User(**{**fields, **overrides})
+
+
+@pytest.mark.parametrize(
+    "serializer, model",
+    [
+        (user_serializer, UserResponse),
+        (public_user_serializer, UserPublicResponse),
+        (mention_serializer, UserMention),
+    ],
+)
+def test_matches_the_response_model(serializer, model):
+    users = [make_user(0), make_user(1, avatar_url="/a.png", last_seen=None)]
+    expected = [json.loads(model.model_validate(u).model_dump_json()) for u in users]
+
+    assert json.loads(serializer.dump(users[0])) == expected[0]
+    assert json.loads(serializer.dump_many(users)) == expected
+
+
+def test_public_output_leaves_out_private_fields():
+    body = json.loads(public_user_serializer.dump(make_user()))
+    assert "email" not in body and "password_hash" not in body
+    assert "password_hash" not in json.loads(user_serializer.dump(make_user()))
+
+
+def test_user_page_and_raw_response():
+    users = [make_user(n) for n in range(3)]
+    page = json.loads(dump_user_page(users, has_more=False))
+    assert page == {
+        "users": json.loads(public_user_serializer.dump_many(users)),
+        "has_more": False,
+    }
+
+    response = RawJSONResponse(b'{"a":1}', status_code=201)
+    assert response.body == b'{"a":1}'
+    assert response.headers["content-type"] == "application/json"
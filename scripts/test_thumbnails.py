@@ -0,0 +1,80 @@
+"""
+Test background thumbnailing of uploaded images
+"""
+
+import asyncio
+import io
+import os
+
+import pytest
+
+from app.services.file_storage import FileStore
+from app.services.thumbnails import Thumbnailer
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileStore(
+        str(tmp_path),
+        max_size=1 << 20,
+        image_extensions=["png"],
+        file_extensions=["txt"],
+    )
+
+
+def png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def body(data: bytes):
+    yield data
+
+
+def test_variants_pick_the_next_size_up(store):
+    thumbnailer = Thumbnailer(store, sizes=[128, 32, 64])
+    key = "ab" * 32 + ".png"
+
+    assert thumbnailer.variant_for(key, 50) == "ab" * 32 + "-64.webp"
+    assert thumbnailer.variant_for(key, 1) == "ab" * 32 + "-32.webp"
+    assert thumbnailer.variant_for(key, 1000) == "ab" * 32 + "-128.webp"
+    assert thumbnailer.variant_for("ab" * 32 + ".txt", 64) is None
+    assert thumbnailer.variant_for("ab" * 32 + "-64.webp", 64) is None
+
+
+def test_thumbnails_render_next_to_the_original(store):
+    async def run(thumbnailer):
+        stored = await store.save(body(png(300, 150)), "wide.png")
+        assert thumbnailer.submit(stored.key)
+        assert not thumbnailer.submit(stored.key)
+        await thumbnailer.stop()
+        return stored
+
+    thumbnailer = Thumbnailer(store, sizes=[32, 64], workers=1)
+    stored = asyncio.run(run(thumbnailer))
+
+    for size in (32, 64):
+        path = store.path_for(thumbnailer.variant_for(stored.key, size))
+        assert os.path.dirname(path) == os.path.dirname(store.path_for(stored.key))
+        with Image.open(path) as thumbnail:
+            assert thumbnail.format == "WEBP"
+            assert thumbnail.size == (size, size // 2)
+    assert thumbnailer.stats()["rendered"] == 1
+    assert thumbnailer.stats()["pool"]["completed"] == 1
+
+
+def test_oversized_images_fail_once(store):
+    async def run(thumbnailer):
+        stored = await store.save(body(png(100, 100)), "big.png")
+        thumbnailer.submit(stored.key)
+        await thumbnailer.drain()
+        resubmitted = thumbnailer.submit(stored.key)
+        await thumbnailer.stop()
+        return resubmitted
+
+    thumbnailer = Thumbnailer(store, sizes=[32], workers=1, max_pixels=5000)
+    assert asyncio.run(run(thumbnailer)) is False
+    assert thumbnailer.stats()["failed"] == 1
@@ -0,0 +1,109 @@
+"""
+Test the verified-token cache behind get_current_user
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import deps
+from app.core.security import create_access_token, decode_token
+from app.core.token_cache import TokenCache
+from app.models.user import User, UserStatus
+from app.services.token_service import TokenService
+
+
+class CountingSession:
+    """Serves one user row and counts the queries that reach it."""
+
+    def __init__(self, user):
+        self.user = user
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        user = self.user
+        return type("Result", (), {"scalar_one_or_none": lambda self: user})()
+
+    async def merge(self, user, load=True):
+        return user
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = TokenCache(max_entries=100, user_ttl=60)
+    decoded = []
+
+    def counting_decode(token):
+        decoded.append(token)
+        return decode_token(token)
+
+    async def is_revoked(claims):
+        return claims.get("fam") == "revoked"
+
+    monkeypatch.setattr(deps, "token_cache", cache)
+    monkeypatch.setattr(deps, "decode_token", counting_decode)
+    monkeypatch.setattr(TokenService, "is_revoked", is_revoked)
+    cache.decoded = decoded
+    return cache
+
+
+def make_user():
+    return User(
+        id=uuid.uuid4(),
+        username="alice",
+        display_name="Alice",
+        email="alice@example.com",
+        status=UserStatus.ONLINE,
+    )
+
+
+def test_repeat_requests_skip_decode_and_lookup(cache):
+    user = make_user()
+    db = CountingSession(user)
+    token = create_access_token({"sub": str(user.id)})
+
+    for _ in range(3):
+        found = asyncio.run(deps.get_current_user(token, db))
+        assert found.id == user.id
+    assert len(cache.decoded) == 1 and db.queries == 1
+
+    # A profile change replaces the snapshot in place
+    user.display_name = "Alice B"
+    cache.refresh_user(user)
+    assert asyncio.run(deps.get_current_user(token, db)).display_name == "Alice B"
+    assert db.queries == 1
+
+    # Dropping the snapshot reloads the user but keeps the verified claims
+    cache.invalidate_user(user.id)
+    asyncio.run(deps.get_current_user(token, db))
+    assert len(cache.decoded) == 1 and db.queries == 2
+
+
+def test_revocation_is_checked_on_the_fast_path(cache):
+    user = make_user()
+    db = CountingSession(user)
+    token = create_access_token({"sub": str(user.id), "fam": "revoked"})
+    cache.set_claims(token, decode_token(token))
+    cache.set_user(user.to_snapshot())
+
+    with pytest.raises(HTTPException) as info:
+        asyncio.run(deps.get_current_user(token, db))
+    assert info.value.status_code == 401 and db.queries == 0
+
+
+def test_claims_expire_with_the_token():
+    cache = TokenCache(max_entries=100, user_ttl=60)
+    token = create_access_token({"sub": "x"}, expires_delta=timedelta(seconds=1))
+    claims = decode_token(token)
+    cache.set_claims(token, claims)
+    assert cache.get_claims(token) == claims
+
+    cache.set_claims("expired", {"sub": "x", "exp": time.time() - 1})
+    assert cache.get_claims("expired") is None
+    cache.set_claims("no-exp", {"sub": "x"})
+    assert cache.get_claims("no-exp") is None
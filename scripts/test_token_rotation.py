@@ -0,0 +1,98 @@
+"""
+Test refresh-token rotation, reuse detection and the revocation index
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from redis.exceptions import RedisError
+
+from app.core.config import Settings
+from app.core.security import decode_token
+from app.services.revocation import BloomFilter, RevocationIndex
+from app.services.token_service import (
+    InvalidRefreshToken,
+    TokenFamilyStore,
+    TokenService,
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_stores(monkeypatch):
+    monkeypatch.setattr(TokenService, "families", TokenFamilyStore())
+    monkeypatch.setattr(TokenService, "revocations", RevocationIndex())
+
+
+def test_rotation_and_reuse_revokes_family():
+    async def run():
+        user_id = str(uuid.uuid4())
+        first = await TokenService.issue(user_id)
+        _, second = await TokenService.rotate(first.refresh_token)
+
+        access = decode_token(second.access_token)
+        assert access["fam"] == decode_token(first.refresh_token)["fam"]
+        assert not await TokenService.is_revoked(access)
+
+        # The first refresh token was already used: replaying it is theft
+        with pytest.raises(InvalidRefreshToken):
+            await TokenService.rotate(first.refresh_token)
+
+        assert await TokenService.is_revoked(access)
+        with pytest.raises(InvalidRefreshToken):
+            await TokenService.rotate(second.refresh_token)
+
+    asyncio.run(run())
+
+
+def test_logout_revokes_only_that_family():
+    async def run():
+        user_id = str(uuid.uuid4())
+        laptop = await TokenService.issue(user_id)
+        phone = await TokenService.issue(user_id)
+
+        await TokenService.revoke(laptop.refresh_token)
+
+        assert await TokenService.is_revoked(decode_token(laptop.access_token))
+        assert not await TokenService.is_revoked(decode_token(phone.access_token))
+        await TokenService.rotate(phone.refresh_token)
+
+    asyncio.run(run())
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    members = [uuid.uuid4().hex for _ in range(10000)]
+    for member in members:
+        bloom.add(member)
+
+    assert all(member in bloom for member in members)
+    false_positives = sum(uuid.uuid4().hex in bloom for _ in range(10000))
+    assert false_positives < 300
+
+
+def test_token_store_defaults_to_memory():
+    assert Settings(redis_url="redis://cache:6379/0").token_store_backend == "memory"
+    assert Settings(token_store_backend="redis").token_store_backend == "redis"
+
+
+class UnreachableRedis:
+    def pipeline(self, transaction=True):
+        raise RedisError("connection refused")
+
+    async def zscore(self, key, member):
+        raise RedisError("connection refused")
+
+
+def test_start_survives_unreachable_redis_and_fails_closed():
+    async def run():
+        index = RevocationIndex(redis=UnreachableRedis())
+        await index.start()
+        try:
+            # Nothing was loaded, so the empty filter must not clear tokens
+            assert await index.is_revoked(uuid.uuid4().hex)
+            assert not await index.is_revoked(None)
+        finally:
+            await index.stop()
+
+    asyncio.run(run())
@@ -0,0 +1,184 @@
+"""
+Test the two-tier user cache against an in-memory fake Redis
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.models.user import User, UserStatus
+from app.services.user_cache import UserCache
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio.Redis for UserCache."""
+
+    def __init__(self):
+        self.data = {}
+        self.fail = False
+
+    async def get(self, key):
+        if self.fail:
+            raise RedisConnectionError("down")
+        return self.data.get(key)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.ops.append((key, value))
+
+    async def execute(self):
+        if self.redis.fail:
+            raise RedisConnectionError("down")
+        for key, value in self.ops:
+            self.redis.data[key] = value if isinstance(value, bytes) else value.encode()
+
+
+def make_snapshot(username="adityag"):
+    now = datetime.now(timezone.utc)
+    return {
+        "id": uuid.uuid4(),
+        "username": username,
+        "email": f"{username}@example.com",
+        "display_name": "Aditya",
+        "avatar_url": None,
+        "status": UserStatus.ONLINE,
+        "last_seen": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def test_read_through_and_l2_hit():
+    async def run():
+        redis = FakeRedis()
+        cache = UserCache(redis=redis)
+        snapshot = make_snapshot()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return snapshot
+
+        assert await cache.get("username", "adityag", loader) == snapshot
+        assert await cache.get("username", "adityag", loader) == snapshot
+        assert calls == 1
+
+        # A fresh process only has L2
+        other = UserCache(redis=redis)
+        assert await other.get("id", snapshot["id"], loader) == snapshot
+        assert calls == 1 and other.l2_hits == 1
+
+    asyncio.run(run())
+
+
+def test_negative_caching_and_write_through():
+    async def run():
+        cache = UserCache(redis=FakeRedis())
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            return None
+
+        assert await cache.get("username", "ghost", loader) is None
+        assert await cache.get("username", "ghost", loader) is None
+        assert calls == 1
+
+        # create_user writes through and replaces the negative entry
+        snapshot = make_snapshot("ghost")
+        await cache.set_user(snapshot)
+        assert await cache.get("username", "ghost", loader) == snapshot
+        assert calls == 1
+
+    asyncio.run(run())
+
+
+def test_concurrent_misses_coalesce():
+    async def run():
+        cache = UserCache(redis=FakeRedis())
+        snapshot = make_snapshot()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return snapshot
+
+        results = await asyncio.gather(
+            *[cache.get("email", snapshot["email"], loader) for _ in range(50)]
+        )
+        assert all(result == snapshot for result in results)
+        assert calls == 1
+        assert cache.coalesced == 49
+
+    asyncio.run(run())
+
+
+def test_redis_failure_falls_back_to_loader():
+    async def run():
+        redis = FakeRedis()
+        redis.fail = True
+        cache = UserCache(redis=redis)
+        snapshot = make_snapshot()
+
+        async def loader():
+            return snapshot
+
+        assert await cache.get("username", "adityag", loader) == snapshot
+        assert cache.redis_errors == 2
+
+    asyncio.run(run())
+
+
+def test_waiters_survive_a_cancelled_loader():
+    async def run():
+        cache = UserCache(redis=FakeRedis())
+        snapshot = make_snapshot()
+
+        async def slow_loader():
+            await asyncio.sleep(10)
+
+        async def loader():
+            return snapshot
+
+        leader = asyncio.create_task(cache.get("id", snapshot["id"], slow_loader))
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(cache.get("id", snapshot["id"], loader))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await asyncio.gather(*waiters)
+
+    assert all(result is not None for result in asyncio.run(run()))
+
+
+def test_snapshots_leave_out_the_password_hash():
+    snapshot = make_snapshot()
+    user = User(**snapshot, password_hash="$2b$12$secret")
+    assert "password_hash" not in user.to_snapshot()
+    assert User.from_snapshot(user.to_snapshot()).username == snapshot["username"]
@@ -0,0 +1,74 @@
+"""
+Test who may list the user directory, and the page it returns
+"""
+
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_current_active_user
+from app.api.routes import users
+from app.core.config import settings
+from app.db.database import get_db
+from app.models.user import UserStatus
+from app.services.user_service import UserService
+
+ROWS = [
+    SimpleNamespace(
+        id=uuid.uuid4(),
+        username=f"user{i}",
+        display_name=f"User {i}",
+        avatar_url=None,
+        status=UserStatus.ONLINE,
+        last_seen=None,
+    )
+    for i in range(3)
+]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    async def list_users(db, status, after_id, limit):
+        return ROWS, True
+
+    async def no_db():
+        yield None
+
+    monkeypatch.setattr(UserService, "list_users", list_users)
+    monkeypatch.setattr(settings, "user_directory_admins", "root, ops")
+    app = FastAPI()
+    app.include_router(users.router)
+    app.dependency_overrides[get_db] = no_db
+    return app
+
+
+def as_user(app, username):
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(
+        username=username
+    )
+    return TestClient(app)
+
+
+def test_only_directory_admins_list_or_export(app):
+    member = as_user(app, "alice")
+    assert member.get("/users").status_code == 403
+    assert member.get("/users/export").status_code == 403
+
+
+def test_list_page_matches_the_schema(app):
+    response = as_user(app, "ops").get("/users")
+    assert response.status_code == 200
+    page = response.json()
+    assert page["has_more"] is True
+    assert [user["username"] for user in page["users"]] == ["user0", "user1", "user2"]
+    assert page["users"][0] == {
+        "id": str(ROWS[0].id),
+        "username": "user0",
+        "display_name": "User 0",
+        "avatar_url": None,
+        "status": "online",
+        "last_seen": None,
+    }
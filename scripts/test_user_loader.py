@@ -0,0 +1,142 @@
+"""
+Test that the user loader batches lookups and never strands its waiters
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models.user import User, UserStatus
+from app.services import user_loader
+from app.services.presence import PresenceStore
+from app.services.user_loader import UserLoader
+
+
+def make_user(user_id: uuid.UUID) -> User:
+    return User(
+        id=user_id,
+        username=f"u{user_id.hex[:8]}",
+        display_name="User",
+        status=UserStatus.ONLINE,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+class FakeResult:
+    def __init__(self, users):
+        self.users = users
+
+    def scalars(self):
+        return self.users
+
+
+class FakeSession:
+    def __init__(self, user_ids, error=None, delay=0.0):
+        self.users = {user_id: make_user(user_id) for user_id in user_ids}
+        self.error = error
+        self.delay = delay
+        self.batches = []
+        self.running = 0
+
+    async def execute(self, statement, params):
+        # Like an AsyncSession, refuse a second statement while one runs
+        assert self.running == 0, "concurrent execute on one session"
+        self.running += 1
+        try:
+            self.batches.append(list(params["ids"]))
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            return FakeResult(
+                [self.users[i] for i in params["ids"] if i in self.users]
+            )
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_presence(monkeypatch):
+    monkeypatch.setattr(user_loader, "presence_store", PresenceStore(None))
+
+
+def test_loads_in_one_tick_share_one_query():
+    known = [uuid.uuid4() for _ in range(3)]
+    missing = uuid.uuid4()
+    db = FakeSession(known)
+
+    async def run():
+        loader = UserLoader(db)
+        first = await asyncio.gather(
+            loader.load_many(known), loader.load(known[0]), loader.load(str(missing))
+        )
+        again = await loader.load(known[1])
+        return loader, first, again
+
+    loader, (users, duplicate, absent), again = asyncio.run(run())
+    assert len(db.batches) == 1 and len(db.batches[0]) == 4
+    assert [user.id for user in users] == known
+    assert duplicate.id == known[0] and absent is None
+    assert again.id == known[1] and loader.queries == 1
+
+
+def test_a_failed_query_fails_every_waiter_and_is_retried():
+    db = FakeSession([], error=RuntimeError("connection lost"))
+
+    async def run():
+        loader = UserLoader(db)
+        results = await asyncio.gather(
+            loader.load(uuid.uuid4()), loader.load(uuid.uuid4()), return_exceptions=True
+        )
+        db.error = None
+        user_id = uuid.uuid4()
+        db.users[user_id] = make_user(user_id)
+        return results, await loader.load(user_id)
+
+    results, user = asyncio.run(run())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert user is not None
+
+
+def test_a_cancelled_query_cancels_its_waiters():
+    db = FakeSession([], delay=10)
+
+    async def run():
+        loader = UserLoader(db)
+        waiter = asyncio.ensure_future(loader.load(uuid.uuid4()))
+        await asyncio.sleep(0.01)
+        assert len(loader._tasks) == 1
+        for task in loader._tasks:
+            task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(waiter, 1)
+        await asyncio.sleep(0)
+        return loader
+
+    assert asyncio.run(run())._tasks == set()
+
+
+def test_a_batch_waits_for_the_running_query():
+    first, second = uuid.uuid4(), uuid.uuid4()
+    db = FakeSession([first, second], delay=0.01)
+
+    async def run():
+        loader = UserLoader(db)
+        waiter = asyncio.ensure_future(loader.load(first))
+        await asyncio.sleep(0.001)
+        return await asyncio.gather(waiter, loader.load(second))
+
+    users = asyncio.run(run())
+    assert [user.id for user in users] == [first, second]
+    assert db.batches == [[first], [second]]
+
+
+def test_unflushed_presence_overrides_the_row():
+    user_id = uuid.uuid4()
+    db = FakeSession([user_id])
+    user_loader.presence_store.set(user_id, UserStatus.AWAY)
+
+    user = asyncio.run(UserLoader(db).load(user_id))
+    assert user.status == UserStatus.AWAY
+    assert len(db.batches) == 1
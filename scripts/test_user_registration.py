@@ -0,0 +1,185 @@
+"""
+Test single-statement registration and the bulk import pipeline
+"""
+
+import asyncio
+import json
+import uuid
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.core.hashing import HashingPool
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services import user_import, user_service
+from app.services.user_service import UserService, _conflicting_field
+
+ALICE = UserCreate(
+    username="alice",
+    email="alice@example.com",
+    password="correct horse",
+    display_name="Alice",
+)
+
+
+class UniqueViolation(Exception):
+    """Stands in for asyncpg's error, which names the violated index."""
+
+    def __init__(self, constraint_name):
+        self.constraint_name = constraint_name
+
+
+def unique_violation(constraint_name):
+    orig = Exception("duplicate key value violates unique constraint")
+    orig.__cause__ = UniqueViolation(constraint_name)
+    return IntegrityError("INSERT INTO users ...", {}, orig)
+
+
+class RegistrationSession:
+    """Answers the INSERT ... RETURNING, or fails it like a unique index."""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    async def scalars(self, statement):
+        self.statements.append(statement)
+        if self.error is not None:
+            raise self.error
+        user = User(**{**statement.compile().params, "id": uuid.uuid4()})
+        return type("Result", (), {"one": lambda self: user})()
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        self.rollbacks += 1
+
+
+class Sink:
+    """Accepts the cache and search-index updates that follow an insert."""
+
+    async def set_user(self, snapshot):
+        pass
+
+    async def publish(self, user):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fast_hashing(monkeypatch):
+    async def get_password_hash_async(password):
+        return f"hashed:{password}"
+
+    monkeypatch.setattr(
+        user_service, "get_password_hash_async", get_password_hash_async
+    )
+    monkeypatch.setattr(user_service, "user_cache", Sink())
+    monkeypatch.setattr(user_service, "user_search_index", Sink())
+    monkeypatch.setattr(
+        user_import, "get_password_hash", lambda p, rounds: f"hashed{rounds}:{p}"
+    )
+
+
+@pytest.mark.parametrize(
+    "constraint, field",
+    [("ix_users_username", "username"), ("ix_users_email", "email"), ("x", None)],
+)
+def test_conflicting_field_names_the_violated_index(constraint, field):
+    assert _conflicting_field(unique_violation(constraint)) == field
+    assert _conflicting_field(IntegrityError("INSERT", {}, None)) is None
+
+
+def test_registration_is_one_insert_returning():
+    db = RegistrationSession()
+    user = asyncio.run(UserService.create_user(db, ALICE))
+
+    assert len(db.statements) == 1 and db.commits == 1
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO users") and "RETURNING" in sql
+    assert user.username == "alice" and user.password_hash == "hashed:correct horse"
+
+
+@pytest.mark.parametrize(
+    "constraint, message",
+    [
+        ("ix_users_username", "Username already registered."),
+        ("ix_users_email", "Email already registered."),
+        ("users_pkey", "Username or email already registered."),
+    ],
+)
+def test_taken_fields_are_reported(constraint, message):
+    db = RegistrationSession(error=unique_violation(constraint))
+    with pytest.raises(ValueError) as info:
+        asyncio.run(UserService.create_user(db, ALICE))
+    assert str(info.value) == message
+    assert db.rollbacks == 1 and db.commits == 0
+
+
+class CopyConnection:
+    """Records COPYs; the merge reports one row per chunk as a duplicate."""
+
+    def __init__(self):
+        self.copied = []
+
+    def transaction(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, sql):
+        if sql.startswith("INSERT"):
+            return f"INSERT 0 {len(self.copied[-1]) - 1}"
+        return "OK"
+
+    async def copy_records_to_table(self, table, records, columns):
+        assert columns == user_import.COPY_COLUMNS
+        self.copied.append(records)
+
+
+def test_import_validates_hashes_and_counts(tmp_path):
+    path = tmp_path / "users.ndjson"
+    records = [
+        {**ALICE.model_dump(), "username": f"user{n}", "email": f"u{n}@example.com"}
+        for n in range(5)
+    ]
+    records.insert(2, {"username": "x", "email": "not an email"})
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n\n")
+
+    async def run():
+        pool = HashingPool(max_workers=2, max_pending=10)
+        report = user_import.ImportReport()
+        connection = CopyConnection()
+        chunks = user_import._chunks(user_import.iter_records(str(path)), 4)
+        for chunk in chunks:
+            rows = await user_import._hash_chunk(pool, chunk, report, 11)
+            await user_import._copy_chunk(connection, rows, report)
+        pool.shutdown()
+        return report, connection
+
+    report, connection = asyncio.run(run())
+    assert [len(rows) for rows in connection.copied] == [3, 2]
+    assert connection.copied[0][0][3] == "hashed11:correct horse"
+    assert (report.read, report.invalid) == (6, 1)
+    assert (report.inserted, report.duplicates) == (3, 2)
+
+
+def test_csv_records_are_read_with_their_header(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("username,email,password,display_name\nbob,b@example.com,pw,Bob\n")
+    assert list(user_import.iter_records(str(path))) == [
+        {
+            "username": "bob",
+            "email": "b@example.com",
+            "password": "pw",
+            "display_name": "Bob",
+        }
+    ]
@@ -0,0 +1,83 @@
+"""
+Test the in-process username index and the search queries
+"""
+
+import asyncio
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.broadcast import MemoryBroadcastBus
+from app.services.user_search import Mention, UsernameIndex
+from app.services.user_service import UserService
+
+
+class CapturingSession:
+    """Records the statement instead of running it."""
+
+    def __init__(self):
+        self.statement = None
+
+    async def scalars(self, statement):
+        self.statement = statement
+
+        class Result:
+            def all(self):
+                return []
+
+        return Result()
+
+
+def mention(username: str, display_name: str = "") -> Mention:
+    return Mention(uuid.uuid4(), username, display_name or username.title())
+
+
+def test_prefix_search_ranks_and_limits():
+    index = UsernameIndex()
+    for name in ["alex", "Al", "alexandra", "albert", "bob", "alfred_x", "al_b"]:
+        index.upsert(mention(name))
+
+    assert [m.username for m in index.search("al", 4)] == [
+        "Al",
+        "al_b",
+        "alex",
+        "albert",
+    ]
+    assert [m.username for m in index.search("ALEX", 10)] == ["alex", "alexandra"]
+    assert index.search("z", 10) == []
+
+
+def test_updates_move_renamed_users():
+    index = UsernameIndex()
+    user = mention("carol", "Carol")
+    index.upsert(user)
+    index.upsert(user._replace(display_name="Carol C"))
+    assert index.search("car", 5) == [user._replace(display_name="Carol C")]
+
+    index.upsert(user._replace(username="caz"))
+    assert [m.username for m in index.search("ca", 5)] == ["caz"]
+    assert len(index.keys) == 1
+
+
+def test_changes_reach_other_workers():
+    async def run():
+        bus = MemoryBroadcastBus()
+        here, there = UsernameIndex(bus=bus), UsernameIndex(bus=bus)
+        bus.set_channel_handler(there.channel, there._on_remote_update)
+        await bus.subscribe(there.channel)
+
+        user = mention("dana")
+        await here.publish(user)
+        await asyncio.sleep(0)
+        return there.search("da", 5)
+
+    assert [m.username for m in asyncio.run(run())] == ["dana"]
+
+
+def test_search_query_escapes_like_wildcards():
+    session = CapturingSession()
+    asyncio.run(UserService.search_users(session, "A_b%", 5))
+    sql = session.statement.compile(dialect=postgresql.dialect())
+
+    assert "similarity" in str(sql)
+    assert sql.params["lower_1"] == "%a\\_b\\%%"
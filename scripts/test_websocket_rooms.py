@@ -0,0 +1,56 @@
+"""
+Test WebSocket room access rules
+"""
+
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import websocket
+from app.services.message_service import MessageService, conversation_room
+
+USER_ID = str(uuid.uuid4())
+CONVERSATION_ID = uuid.uuid4()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def authenticate_token(token):
+        return USER_ID
+
+    async def is_member(db, conversation_id, user_id):
+        return conversation_id == CONVERSATION_ID and str(user_id) == USER_ID
+
+    monkeypatch.setattr(websocket, "authenticate_token", authenticate_token)
+    monkeypatch.setattr(MessageService, "is_member", is_member)
+    app = FastAPI()
+    app.include_router(websocket.router)
+    return TestClient(app)
+
+
+def test_non_members_cannot_join_a_conversation(client):
+    with client.websocket_connect("/ws?token=t") as ws:
+        ws.send_json({"action": "join", "room": conversation_room(uuid.uuid4())})
+        assert ws.receive_json() == {"type": "error", "detail": "not a member"}
+
+        ws.send_json({"action": "join", "room": "conversation:nope"})
+        assert ws.receive_json() == {"type": "error", "detail": "invalid room"}
+
+
+def test_members_join_but_cannot_publish(client):
+    room = conversation_room(CONVERSATION_ID)
+    with client.websocket_connect("/ws?token=t") as ws:
+        ws.send_json({"action": "join", "room": room})
+        ws.send_json({"action": "message", "room": room, "data": {"x": 1}})
+        assert ws.receive_json() == {"type": "error", "detail": "read-only room"}
+
+
+def test_other_rooms_stay_open(client):
+    with client.websocket_connect("/ws?token=t") as ws:
+        ws.send_json({"action": "join", "room": "lobby"})
+        ws.send_json({"action": "message", "room": "lobby", "data": "hi"})
+        frame = ws.receive_json()
+        assert frame["type"] == "message"
+        assert frame["sender"] == USER_ID